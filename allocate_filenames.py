@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Allocate a unique image file name for every painting before any download.
+
+Names follow the same scheme the old fix-up scripts arrived at after the fact:
+  artist-title.jpg              when no other painting shares that slug
+  artist-title-year.jpg         when the slug collides
+  artist-title-year-<id8>.jpg   when artist, title and year all collide
+
+Names set as imageName in the period JSONs, or recorded in image_manifest.json
+for an image file that exists, are pinned and never change; any other recorded
+name is only a reservation and is allocated afresh. The result depends only on
+the catalog contents, not on file order, and is saved to the manifest.
+"""
+
+import argparse
+import json
+import os
+from collections import Counter
+from pathlib import Path
+
+from image_manifest import MANIFEST_FILE, load_manifest, manifest_entry, save_manifest
+from slugs import slugify
+
+
+def load_period_paintings(periods_dir='paintings_ios/Resources/Data/Periods'):
+    """Return all painting records from the period JSON files."""
+    paintings = []
+    for json_file in sorted(Path(periods_dir).glob('*.json')):
+        with open(json_file, 'r', encoding='utf-8') as f:
+            paintings.extend(json.load(f)['paintings'])
+    return paintings
+
+
+def candidate_names(painting):
+    """Yield file names for a painting, from plainest to most specific."""
+    artist, title, year = painting['artist'], painting['title'], painting['year']
+    yield f"{slugify(f'{artist}-{title}')}.jpg"
+    yield f"{slugify(f'{artist}-{title}-{year}')}.jpg"
+    yield from id_suffixed_names(painting)
+
+
+def id_suffixed_names(painting):
+    """Yield artist-title-year-<id> names with an ever longer id prefix."""
+    artist, title, year = painting['artist'], painting['title'], painting['year']
+    painting_id = painting['id'].replace('-', '')
+    for length in range(8, len(painting_id) + 1, 4):
+        yield f"{slugify(f'{artist}-{title}-{year}-{painting_id[:length]}')}.jpg"
+
+
+def allocate_image_names(paintings, pinned):
+    """
+    Return {painting id: unique file name}.
+
+    pinned maps painting id -> name that must be kept. A name is considered
+    taken case-insensitively (the app bundle lives on a case-insensitive
+    file system).
+    """
+    assigned = {}
+    taken = set()
+
+    # Pinned names first, in id order so a clash between two pins is resolved
+    # the same way every time
+    for painting_id in sorted(pinned):
+        name = pinned[painting_id]
+        if name and name.lower() not in taken:
+            assigned[painting_id] = name
+            taken.add(name.lower())
+
+    pending = sorted((p for p in paintings if p['id'] not in assigned), key=lambda p: p['id'])
+
+    # Count how many paintings share each level's name, so every member of a
+    # collision group moves to the next level together (independent of order)
+    for level in range(3):
+        counts = Counter(_name_at(p, level).lower() for p in pending)
+        still_pending = []
+        for painting in pending:
+            name = _name_at(painting, level)
+            key = name.lower()
+            if level < 2 and (counts[key] > 1 or key in taken):
+                still_pending.append(painting)
+                continue
+            if key in taken:
+                # id prefix already used; lengthen it until unique (never
+                # fall back to the plain or year names, another painting
+                # in the group may still want those)
+                for name in id_suffixed_names(painting):
+                    if name.lower() not in taken:
+                        break
+                else:
+                    stem = name[:-len('.jpg')]
+                    counter = 2
+                    while f"{stem}-{counter}.jpg".lower() in taken:
+                        counter += 1
+                    name = f"{stem}-{counter}.jpg"
+                key = name.lower()
+            assigned[painting['id']] = name
+            taken.add(key)
+        pending = still_pending
+
+    return assigned
+
+
+def _name_at(painting, level):
+    names = candidate_names(painting)
+    for _ in range(level):
+        next(names)
+    return next(names)
+
+
+def allocate_and_record(paintings, manifest, images_dir='paintings_ios/Resources/Images'):
+    """Allocate names for all paintings and store them in the manifest."""
+    # Only a name with a file behind it is worth keeping; the rest are
+    # reallocated so slug fixes (e.g. accent folding) reach them
+    on_disk = set(os.listdir(images_dir)) if os.path.isdir(images_dir) else set()
+    pinned = {pid: entry['imageName'] for pid, entry in manifest['paintings'].items()
+              if entry.get('imageName') in on_disk}
+    for painting in paintings:
+        if painting.get('imageName') and painting['id'] not in pinned:
+            pinned[painting['id']] = painting['imageName']
+
+    assigned = allocate_image_names(paintings, pinned)
+    for painting_id, name in assigned.items():
+        manifest_entry(manifest, painting_id)['imageName'] = name
+    return assigned
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Allocate unique image file names before downloading.')
+    parser.add_argument('--periods-dir', default='paintings_ios/Resources/Data/Periods')
+    parser.add_argument('--images-dir', default='paintings_ios/Resources/Images')
+    parser.add_argument('--manifest', default=MANIFEST_FILE)
+    parser.add_argument('--dry-run', action='store_true', help="don't write the manifest")
+    args = parser.parse_args(argv)
+
+    paintings = load_period_paintings(args.periods_dir)
+    manifest = load_manifest(args.manifest)
+    before = {pid: e.get('imageName') for pid, e in manifest['paintings'].items()}
+
+    assigned = allocate_and_record(paintings, manifest, args.images_dir)
+
+    new = [pid for pid in assigned if not before.get(pid)]
+    suffixed = Counter()
+    for painting in paintings:
+        name = assigned[painting['id']]
+        plain, with_year = list(_name_at(painting, level) for level in range(2))
+        if name == plain:
+            suffixed['plain'] += 1
+        elif name == with_year:
+            suffixed['year'] += 1
+        else:
+            suffixed['other'] += 1
+
+    print(f"Paintings: {len(paintings)}")
+    print(f"Names allocated: {len(assigned)} ({len(new)} new)")
+    print(f"  artist-title: {suffixed['plain']}")
+    print(f"  artist-title-year: {suffixed['year']}")
+    print(f"  id suffix or kept legacy name: {suffixed['other']}")
+
+    if args.dry_run:
+        print("\nDry run: manifest not written")
+    else:
+        save_manifest(manifest, args.manifest)
+        print(f"\n✅ Manifest updated: {args.manifest}")
+
+if __name__ == '__main__':
+    main()
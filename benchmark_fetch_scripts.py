@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Benchmark the fetch scripts end-to-end against the local mock upstreams.
+
+Each script runs in its own child process inside a throwaway copy of the data,
+with urllib routed to mock_wiki_server. Wall time, requests sent and peak RSS
+are appended to benchmark_results.jsonl and compared with the previous run of
+the same script, mode and mock configuration.
+
+Usage:
+    python benchmark_fetch_scripts.py
+    python benchmark_fetch_scripts.py --scripts download_wikiart_images --modes nosleep
+    python benchmark_fetch_scripts.py --config mock_config.json --fail-on-regression
+"""
+
+import argparse
+import contextlib
+import hashlib
+import importlib
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from mock_wiki_server import MockWikiServer, install_mock_opener, load_config
+
+REPO_DIR = Path(__file__).resolve().parent
+
+SCRIPTS = [
+    'find_wikiart_urls_fast',
+    'find_wikiart_urls',
+    'find_wikidata_images',
+    'find_wikipedia_urls',
+    'download_wikiart_images',
+    'resolve_images',
+]
+
+# polite: the scripts' own time.sleep() pauses are kept
+# nosleep: pauses are skipped so only network and processing time remain
+MODES = ['polite', 'nosleep']
+
+
+class NoSleepTime:
+    """Stand-in for the time module with sleep() turned into a no-op."""
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+    @staticmethod
+    def sleep(seconds):
+        pass
+
+
+def prepare_workspace(csv_file):
+    """Copy the CSV and period JSONs into a fresh temporary directory."""
+    workdir = Path(tempfile.mkdtemp(prefix='paintings-bench-'))
+    shutil.copy(csv_file, workdir / 'paintings_wikiart_urls.csv')
+    shutil.copytree(REPO_DIR / 'paintings_ios/Resources/Data/Periods',
+                    workdir / 'paintings_ios/Resources/Data/Periods')
+    (workdir / 'paintings_ios/Resources/Images').mkdir(parents=True)
+    return workdir
+
+
+def run_child(script, mode, base_url, workdir, profile_dir=None):
+    """Run one script in this process (called in the child) and print metrics."""
+    sys.path.insert(0, str(REPO_DIR))
+    os.chdir(workdir)
+    install_mock_opener(base_url)
+    module = importlib.import_module(script)
+    fetch = importlib.import_module('fetch')
+    if mode == 'nosleep':
+        module.time = NoSleepTime()
+
+    start_wall = time.perf_counter()
+    start_cpu = time.process_time()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        module.main(['--profile', profile_dir] if profile_dir else [])
+    result = {
+        'wall_s': round(time.perf_counter() - start_wall, 3),
+        'cpu_s': round(time.process_time() - start_cpu, 3),
+        'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        'coalesced': fetch.fetch_stats()['coalesced'],
+        'decoded_bytes': fetch.fetch_stats()['bytes'],
+    }
+    print(json.dumps(result))
+
+
+def run_benchmark(server, script, mode, csv_file, profile_dir=None):
+    """Run one script/mode combination in a child process."""
+    workdir = prepare_workspace(csv_file)
+    command = [sys.executable, __file__, '--child', script, '--mode', mode,
+               '--base-url', server.base_url, '--workdir', str(workdir)]
+    if profile_dir:
+        command += ['--profile', str(Path(profile_dir).resolve() / mode)]
+    before = server.snapshot_stats()
+    try:
+        proc = subprocess.run(command, capture_output=True, text=True)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    after = server.snapshot_stats()
+
+    if proc.returncode != 0:
+        raise RuntimeError(f"{script} ({mode}) failed:\n{proc.stderr}")
+
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    counters = {k: v - before['counters'].get(k, 0) for k, v in after['counters'].items()
+                if v - before['counters'].get(k, 0)}
+    result['requests'] = after['requests'] - before['requests']
+    result['bytes_received'] = after['bytes_sent'] - before['bytes_sent']
+    result['counters'] = counters
+    return result
+
+
+def config_fingerprint(config, csv_file):
+    """Short hash identifying the mock configuration and fixture."""
+    digest = hashlib.sha1(json.dumps(config, sort_keys=True).encode('utf-8'))
+    with open(csv_file, 'rb') as f:
+        digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR,
+                              capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ''
+
+
+def load_previous_results(results_file):
+    """Map (script, mode, fingerprint, profiled) -> most recent recorded result."""
+    previous = {}
+    if Path(results_file).exists():
+        with open(results_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    key = (record['script'], record['mode'], record['fingerprint'],
+                           record.get('profiled', False))
+                    previous[key] = record
+    return previous
+
+
+def compare(record, baseline, tolerance):
+    """Return a list of regression messages for record against baseline."""
+    if not baseline:
+        return []
+    problems = []
+    if record['wall_s'] > baseline['wall_s'] * (1 + tolerance):
+        problems.append(f"wall time {baseline['wall_s']}s -> {record['wall_s']}s")
+    if record['requests'] > baseline['requests']:
+        problems.append(f"requests {baseline['requests']} -> {record['requests']}")
+    if record['peak_rss_kb'] > baseline['peak_rss_kb'] * (1 + tolerance):
+        problems.append(f"peak RSS {baseline['peak_rss_kb']} KB -> {record['peak_rss_kb']} KB")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the fetch scripts against the mock upstreams.')
+    parser.add_argument('--scripts', nargs='+', default=SCRIPTS, choices=SCRIPTS)
+    parser.add_argument('--modes', nargs='+', default=MODES, choices=MODES)
+    parser.add_argument('--csv', default=str(REPO_DIR / 'paintings_wikiart_urls.csv'))
+    parser.add_argument('--config', help='JSON file overriding the mock DEFAULT_CONFIG')
+    parser.add_argument('--results', default=str(REPO_DIR / 'benchmark_results.jsonl'))
+    parser.add_argument('--tolerance', type=float, default=0.15,
+                        help='allowed relative slowdown before flagging a regression')
+    parser.add_argument('--fail-on-regression', action='store_true')
+    parser.add_argument('--profile', metavar='DIR',
+                        help='also run each script with --profile, writing to DIR/<mode>/')
+    # Internal: run a single script inside the child process
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--mode', help=argparse.SUPPRESS)
+    parser.add_argument('--base-url', help=argparse.SUPPRESS)
+    parser.add_argument('--workdir', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.mode, args.base_url, args.workdir, args.profile)
+        return
+
+    config = load_config(args.config)
+    fingerprint = config_fingerprint(config, args.csv)
+    previous = load_previous_results(args.results)
+    revision = git_revision()
+
+    server = MockWikiServer(args.csv, config).start()
+    print(f"Mock upstreams on {server.base_url} (config {fingerprint})\n")
+
+    regressions = []
+    try:
+        for script in args.scripts:
+            for mode in args.modes:
+                print(f"Running {script} [{mode}]...", flush=True)
+                result = run_benchmark(server, script, mode, args.csv, args.profile)
+                record = {
+                    'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                    'revision': revision,
+                    'script': script,
+                    'mode': mode,
+                    'fingerprint': fingerprint,
+                    'profiled': bool(args.profile),
+                    **result,
+                }
+                baseline = previous.get((script, mode, fingerprint, record['profiled']))
+                problems = compare(record, baseline, args.tolerance)
+
+                with open(args.results, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(record) + '\n')
+
+                rate = record['requests'] / record['wall_s'] if record['wall_s'] else 0
+                print(f"  ⏱️  {record['wall_s']}s wall, {record['cpu_s']}s CPU, "
+                      f"{record['requests']} requests ({rate:.1f}/s), "
+                      f"{record['bytes_received'] / 1024:.0f} KB wire / {record['decoded_bytes'] / 1024:.0f} KB decoded, "
+                      f"{record['coalesced']} coalesced, "
+                      f"peak RSS {record['peak_rss_kb'] / 1024:.1f} MB")
+                for problem in problems:
+                    print(f"  ⚠️  Regression vs {baseline['revision'] or 'previous run'}: {problem}")
+                    regressions.append(f"{script} [{mode}]: {problem}")
+    finally:
+        server.stop()
+
+    print(f"\n{'='*70}")
+    print(f"Results appended to {args.results}")
+    if regressions:
+        print(f"⚠️  {len(regressions)} regression(s):")
+        for line in regressions:
+            print(f"  - {line}")
+    else:
+        print("✅ No regressions against previous runs")
+    print(f"{'='*70}")
+
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
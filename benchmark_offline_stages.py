@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Benchmark the offline pipeline stages on large synthetic catalogs.
+
+For each size a catalog is generated with synthetic_catalog.py (seeded, so
+runs are comparable), then every stage runs in its own child process on it.
+Per stage we record wall and CPU time, peak RSS, and file-system activity
+counted with an audit hook (files opened for reading/writing, renames,
+deletes, directory scans) plus the bytes read and written from
+/proc/self/io where available.
+
+Stages whose time grows clearly faster than the catalog (a quadratic loop)
+are flagged, as are stages that write much more than the catalog's size
+(whole-file rewrites). Results are appended to
+offline_benchmark_results.jsonl.
+
+    python benchmark_offline_stages.py
+    python benchmark_offline_stages.py --sizes 10000 100000 1000000 --stages split_by_period cleanup_old_images
+"""
+
+import argparse
+import contextlib
+import importlib
+import json
+import math
+import os
+import resource
+import runpy
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from synthetic_catalog import generate_catalog
+
+REPO_DIR = Path(__file__).resolve().parent
+PERIODS_DIR = Path('paintings_ios/Resources/Data/Periods')
+
+# Time growing faster than size^this between the two largest sizes is flagged
+SUPERLINEAR_EXPONENT = 1.3
+# Writing more than this many times the catalog's JSON size is flagged
+REWRITE_FACTOR = 3.0
+
+
+def stage_slugify():
+    from slugs import slugify, wikiart_candidates
+    from stream_transform import iter_csv
+    for row in iter_csv('paintings_wikiart_urls.csv'):
+        wikiart_candidates(row['artist'], row['title'], row['year'])
+        slugify(f"{row['artist']}-{row['title']}")
+
+
+def stage_detect_collisions():
+    from fix_duplicate_images import find_collisions
+    from stream_transform import iter_csv
+    find_collisions([row for row in iter_csv('paintings_wikiart_urls.csv') if row['wikiart_url']])
+
+
+def stage_find_duplicates():
+    from allocate_filenames import load_period_paintings
+    from find_duplicate_paintings import find_duplicate_clusters
+    find_duplicate_clusters(load_period_paintings(PERIODS_DIR))
+
+
+def stage_allocate_names():
+    from allocate_filenames import allocate_image_names, load_period_paintings
+    allocate_image_names(load_period_paintings(PERIODS_DIR), {})
+
+
+def stage_update_json():
+    from download_wikiart_images import update_period_files
+    from stream_transform import iter_csv
+    update_period_files({row['id']: row['imageName'] for row in iter_csv('paintings_wikiart_urls.csv')
+                         if row['imageName']})
+
+
+def stage_cleanup_old_images():
+    import cleanup_old_images
+    cleanup_old_images.main([])
+
+
+def stage_split_by_period():
+    runpy.run_path(str(REPO_DIR / 'split_by_period.py'), run_name='__main__')
+
+
+def stage_build_catalog_manifest():
+    from build_catalog_manifest import PAGE_SIZE, build_manifest
+    build_manifest(Path('paintings_ios/Resources/Data'), PAGE_SIZE)
+
+
+STAGES = {
+    'slugify': stage_slugify,
+    'detect_collisions': stage_detect_collisions,
+    'find_duplicates': stage_find_duplicates,
+    'allocate_names': stage_allocate_names,
+    'update_json': stage_update_json,
+    'cleanup_old_images': stage_cleanup_old_images,
+    'split_by_period': stage_split_by_period,
+    'build_catalog_manifest': stage_build_catalog_manifest,
+}
+
+# Imported before measuring, so module loading doesn't count as stage I/O
+STAGE_MODULES = ['slugs', 'stream_transform', 'fix_duplicate_images', 'find_duplicate_paintings',
+                 'allocate_filenames', 'download_wikiart_images', 'cleanup_old_images', 'build_catalog_manifest']
+
+
+class FileSystemCounter:
+    """Audit hook tallying file-system operations (hooks can't be removed; child processes only)."""
+
+    EVENTS = {
+        'os.rename': 'renames', 'os.replace': 'renames',
+        'os.remove': 'deletes', 'os.unlink': 'deletes', 'os.rmdir': 'deletes',
+        'os.listdir': 'dir_scans', 'os.scandir': 'dir_scans', 'glob.glob': 'dir_scans',
+        'os.mkdir': 'mkdirs',
+    }
+
+    def __init__(self):
+        self.counts = {'opens_read': 0, 'opens_write': 0, 'renames': 0, 'deletes': 0, 'dir_scans': 0, 'mkdirs': 0}
+        self.active = False
+
+    def __call__(self, event, args):
+        if not self.active:
+            return
+        if event == 'open':
+            path, mode, flags = args
+            if isinstance(path, int):
+                return
+            writing = (mode and any(c in mode for c in 'wax+')) or \
+                (mode is None and flags & (os.O_WRONLY | os.O_RDWR))
+            self.counts['opens_write' if writing else 'opens_read'] += 1
+        elif event in self.EVENTS:
+            self.counts[self.EVENTS[event]] += 1
+
+
+def read_proc_io():
+    """(bytes read, bytes written) by this process, or (None, None) off Linux."""
+    try:
+        with open('/proc/self/io', 'r') as f:
+            fields = dict(line.split(': ') for line in f.read().splitlines())
+        return int(fields['rchar']), int(fields['wchar'])
+    except (OSError, KeyError, ValueError):
+        return None, None
+
+
+def run_child(stage, workdir):
+    """Run one stage in this process (called in the child) and print metrics."""
+    sys.path.insert(0, str(REPO_DIR))
+    os.chdir(workdir)
+    for module in STAGE_MODULES:
+        importlib.import_module(module)
+    counter = FileSystemCounter()
+    sys.addaudithook(counter)
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        read_before, written_before = read_proc_io()
+        start_wall = time.perf_counter()
+        start_cpu = time.process_time()
+        counter.active = True
+        STAGES[stage]()
+        counter.active = False
+    result = {
+        'wall_s': round(time.perf_counter() - start_wall, 3),
+        'cpu_s': round(time.process_time() - start_cpu, 3),
+        'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        **counter.counts,
+    }
+    read_after, written_after = read_proc_io()
+    if read_after is not None:
+        result['bytes_read'] = read_after - read_before
+        result['bytes_written'] = written_after - written_before
+    print(json.dumps(result))
+
+
+def run_stage(stage, workdir):
+    command = [sys.executable, __file__, '--child', stage, '--workdir', str(workdir)]
+    proc = subprocess.run(command, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"{stage} failed:\n{proc.stderr}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def json_size(workdir):
+    return sum(path.stat().st_size for path in (workdir / PERIODS_DIR).glob('*.json'))
+
+
+def scaling_warnings(records):
+    """Flag stages whose time grows super-linearly between the two largest sizes."""
+    warnings = []
+    by_stage = {}
+    for record in records:
+        by_stage.setdefault(record['stage'], []).append(record)
+    for stage, runs in by_stage.items():
+        runs.sort(key=lambda r: r['size'])
+        if len(runs) < 2:
+            continue
+        small, large = runs[-2], runs[-1]
+        # Ignore stages too fast to time reliably
+        if small['wall_s'] < 0.05 or large['size'] == small['size']:
+            continue
+        exponent = math.log(large['wall_s'] / small['wall_s']) / math.log(large['size'] / small['size'])
+        if exponent > SUPERLINEAR_EXPONENT:
+            warnings.append(f"{stage}: time grows ~n^{exponent:.2f} "
+                            f"({small['size']} -> {large['size']}: {small['wall_s']}s -> {large['wall_s']}s)")
+    return warnings
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark offline stages on synthetic catalogs.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--stages', nargs='+', default=list(STAGES), choices=list(STAGES))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--results', default=str(REPO_DIR / 'offline_benchmark_results.jsonl'))
+    parser.add_argument('--keep', action='store_true', help="don't delete the generated catalogs")
+    # Internal: run a single stage inside the child process
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--workdir', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.workdir)
+        return
+
+    timestamp = datetime.now(timezone.utc).isoformat(timespec='seconds')
+    records = []
+    print(f"{'stage':<24} {'size':>9} {'wall s':>8} {'RSS MB':>8} {'opens r/w':>11} "
+          f"{'renames':>8} {'scans':>6} {'written':>10}")
+    for size in args.sizes:
+        workdir = Path(tempfile.mkdtemp(prefix=f'offline-bench-{size}-'))
+        try:
+            start = time.perf_counter()
+            generate_catalog(workdir, size, args.seed)
+            catalog_bytes = json_size(workdir)
+            print(f"-- {size} paintings generated in {time.perf_counter() - start:.1f}s "
+                  f"({catalog_bytes / 1024 / 1024:.1f} MB of period JSON) in {workdir}")
+
+            for stage in args.stages:
+                result = run_stage(stage, workdir)
+                record = {'timestamp': timestamp, 'stage': stage, 'size': size, 'seed': args.seed,
+                          'catalog_bytes': catalog_bytes, **result}
+                records.append(record)
+                with open(args.results, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(record) + '\n')
+
+                written = record.get('bytes_written')
+                flag = ''
+                if written is not None and written > catalog_bytes * REWRITE_FACTOR:
+                    flag = '  ⚠️  rewrites'
+                print(f"{stage:<24} {size:>9} {record['wall_s']:>8.2f} {record['peak_rss_kb'] / 1024:>8.1f} "
+                      f"{record['opens_read']:>5}/{record['opens_write']:<5} {record['renames']:>8} "
+                      f"{record['dir_scans']:>6} "
+                      f"{(f'{written / 1024 / 1024:.1f} MB' if written is not None else '-'):>10}{flag}")
+        finally:
+            if args.keep:
+                print(f"   kept {workdir}")
+            else:
+                shutil.rmtree(workdir, ignore_errors=True)
+
+    warnings = scaling_warnings(records)
+    print(f"\n{'='*70}")
+    print(f"Results appended to {args.results}")
+    if warnings:
+        print(f"⚠️  Super-linear stages:")
+        for line in warnings:
+            print(f"  - {line}")
+    else:
+        print("✅ Every stage scales roughly linearly")
+    print(f"{'='*70}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Build the catalog manifest the app loads before any painting data.
+
+For each period JSON in Resources/Data/Periods the manifest records the
+resource name, record count, byte size, content hash, artist list and a
+preview (the first painting's title and image), so the app can list periods
+from the manifest alone and decode a period's paintings only when it is
+opened. Periods larger than --page-size (default: about one screen of
+rows) are additionally split into fixed-size pages under
+Resources/Data/Pages, which the period screen loads as it scrolls.
+
+The period list is derived from the files on disk (ordered by median year),
+replacing the list that used to be hard-coded in PaintingsDataService.
+
+The same pass produces catalog_aggregates.json: artists (sorted) with their
+painting count, ids and periods, and each period's count and ids, in the
+order the app loads them. The Artists and Periods screens read these instead
+of rescanning every painting per row. The aggregates are checked against the
+period JSONs before the build finishes.
+
+    python build_catalog_manifest.py
+    python build_catalog_manifest.py --benchmark 10000 100000
+"""
+
+import argparse
+import hashlib
+import json
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from file_digests import write_json_atomic
+from profiling import add_profile_argument, create_profiler
+from synthetic_catalog import generate_catalog
+
+DATA_DIR = Path('paintings_ios/Resources/Data')
+MANIFEST_NAME = 'catalog_manifest.json'
+MANIFEST_VERSION = 1
+AGGREGATES_NAME = 'catalog_aggregates.json'
+AGGREGATES_VERSION = 1
+# Rows the period screen shows before the user scrolls
+PAGE_SIZE = 12
+
+
+def build_manifest(data_dir, page_size):
+    """Write pages and catalog_manifest.json for data_dir; return the manifest."""
+    periods_dir = data_dir / 'Periods'
+    pages_dir = data_dir / 'Pages'
+
+    periods = []
+    page_files = set()
+    period_ids = {}      # file stem -> painting ids in file order
+    artist_ids = {}      # artist -> {file stem -> painting ids}
+    for json_file in sorted(periods_dir.glob('*.json')):
+        raw = json_file.read_bytes()
+        paintings = json.loads(raw)['paintings']
+        period_ids[json_file.stem] = [p['id'] for p in paintings]
+        for p in paintings:
+            artist_ids.setdefault(p['artist'], {}).setdefault(json_file.stem, []).append(p['id'])
+        entry = {
+            'period': paintings[0]['period'] if paintings else json_file.stem,
+            'file': json_file.stem,
+            'recordCount': len(paintings),
+            'byteSize': len(raw),
+            'sha256': hashlib.sha256(raw).hexdigest(),
+            'artists': sorted({p['artist'] for p in paintings}),
+            'preview': {'title': paintings[0]['title'], 'imageName': paintings[0].get('imageName', '')}
+                       if paintings else None,
+            'pages': [],
+        }
+        if len(paintings) > page_size:
+            pages_dir.mkdir(parents=True, exist_ok=True)
+            for number, start in enumerate(range(0, len(paintings), page_size), 1):
+                page_name = f"{json_file.stem}-p{number:03d}"
+                page_path = pages_dir / f"{page_name}.json"
+                page = {'paintings': paintings[start:start + page_size]}
+                encoded = json.dumps(page, indent=2, ensure_ascii=False)
+                if not page_path.exists() or page_path.read_text(encoding='utf-8') != encoded:
+                    page_path.write_text(encoded, encoding='utf-8')
+                page_files.add(page_path.name)
+                entry['pages'].append(page_name)
+        median_year = statistics.median(p['year'] for p in paintings) if paintings else 0
+        periods.append((median_year, entry))
+
+    # Drop pages left over from periods that shrank or were removed
+    if pages_dir.exists():
+        for stale in pages_dir.glob('*.json'):
+            if stale.name not in page_files:
+                stale.unlink()
+
+    manifest = {
+        'version': MANIFEST_VERSION,
+        'pageSize': page_size,
+        'totalRecords': sum(entry['recordCount'] for _, entry in periods),
+        'periods': [entry for _, entry in sorted(periods, key=lambda item: (item[0], item[1]['file']))],
+    }
+    write_json_atomic(data_dir / MANIFEST_NAME, manifest, indent=2)
+    write_json_atomic(data_dir / AGGREGATES_NAME,
+                      build_aggregates(manifest, period_ids, artist_ids), indent=2)
+    return manifest
+
+
+def build_aggregates(manifest, period_ids, artist_ids):
+    """Artist and period lookups, with ids in the app's load order (manifest order)."""
+    order = [entry['file'] for entry in manifest['periods']]
+    names = {entry['file']: entry['period'] for entry in manifest['periods']}
+
+    artists = []
+    for artist in sorted(artist_ids):
+        by_period = artist_ids[artist]
+        ids = [painting_id for stem in order for painting_id in by_period.get(stem, [])]
+        artists.append({
+            'name': artist,
+            'count': len(ids),
+            'ids': ids,
+            'periods': [names[stem] for stem in order if stem in by_period],
+        })
+
+    return {
+        'version': AGGREGATES_VERSION,
+        'totalRecords': manifest['totalRecords'],
+        'artists': artists,
+        'periods': [{'period': names[stem], 'count': len(period_ids[stem]), 'ids': period_ids[stem]}
+                    for stem in order],
+    }
+
+
+def check_aggregates(data_dir):
+    """
+    Recount catalog_aggregates.json from the period JSONs, independently of
+    build_aggregates (paintings are grouped once by artist and by period).
+
+    Returns a list of mismatches (empty if the aggregates are consistent).
+    """
+    with open(data_dir / AGGREGATES_NAME, 'r', encoding='utf-8') as f:
+        aggregates = json.load(f)
+
+    total = 0
+    by_artist = {}
+    by_period = {}
+    for json_file in sorted((data_dir / 'Periods').glob('*.json')):
+        with open(json_file, 'r', encoding='utf-8') as f:
+            for p in json.load(f)['paintings']:
+                total += 1
+                by_artist.setdefault(p['artist'], []).append(p)
+                by_period.setdefault(p['period'], []).append(p['id'])
+
+    problems = []
+    if aggregates['totalRecords'] != total:
+        problems.append(f"totalRecords {aggregates['totalRecords']} != {total} paintings")
+
+    expected_artists = sorted(by_artist)
+    if [a['name'] for a in aggregates['artists']] != expected_artists:
+        problems.append('artist list does not match the paintings')
+    for artist in aggregates['artists']:
+        own = by_artist.get(artist['name'], [])
+        if artist['count'] != len(own) or len(artist['ids']) != len(own) or \
+                set(artist['ids']) != {p['id'] for p in own}:
+            problems.append(f"artist {artist['name']!r}: {artist['count']} recorded, {len(own)} found")
+        if set(artist['periods']) != {p['period'] for p in own}:
+            problems.append(f"artist {artist['name']!r}: periods {artist['periods']} do not match")
+
+    for period in aggregates['periods']:
+        own = by_period.get(period['period'], [])
+        if period['count'] != len(own):
+            problems.append(f"period {period['period']!r}: {period['count']} recorded, {len(own)} found")
+        elif period['ids'] != own:
+            problems.append(f"period {period['period']!r}: ids do not match the period file")
+    if sum(period['count'] for period in aggregates['periods']) != total:
+        problems.append('period counts do not add up to totalRecords')
+
+    return problems
+
+
+def run_benchmark(sizes, page_size):
+    """Compare decoding every period file with manifest + first page of one period."""
+    print(f"{'records':>10} {'load all (ms)':>15} {'manifest (ms)':>15} {'first screen (ms)':>19}")
+    for size in sizes:
+        workdir = Path(tempfile.mkdtemp(prefix='catalog-bench-'))
+        try:
+            generate_catalog(workdir, size, image_fraction=0, orphan_rate=0)
+            data_dir = workdir / 'paintings_ios/Resources/Data'
+            manifest = build_manifest(data_dir, page_size)
+
+            start = time.perf_counter()
+            for json_file in sorted((data_dir / 'Periods').glob('*.json')):
+                with open(json_file, 'r', encoding='utf-8') as f:
+                    json.load(f)
+            load_all = time.perf_counter() - start
+
+            start = time.perf_counter()
+            with open(data_dir / MANIFEST_NAME, 'r', encoding='utf-8') as f:
+                loaded = json.load(f)
+            manifest_only = time.perf_counter() - start
+
+            first = loaded['periods'][0]
+            shard = (data_dir / 'Pages' / f"{first['pages'][0]}.json" if first['pages']
+                     else data_dir / 'Periods' / f"{first['file']}.json")
+            with open(shard, 'r', encoding='utf-8') as f:
+                json.load(f)
+            first_screen = time.perf_counter() - start
+
+            print(f"{manifest['totalRecords']:>10} {load_all * 1000:>15.1f} "
+                  f"{manifest_only * 1000:>15.1f} {first_screen * 1000:>19.1f}")
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build the sharded catalog manifest.')
+    parser.add_argument('--data-dir', type=Path, default=DATA_DIR)
+    parser.add_argument('--page-size', type=int, default=PAGE_SIZE, help='records per page for large periods')
+    parser.add_argument('--benchmark', type=int, nargs='+', metavar='N',
+                        help='measure load time on synthetic catalogs of N records instead')
+    add_profile_argument(parser)
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        run_benchmark(args.benchmark, args.page_size)
+        return
+
+    profiler = create_profiler('build_catalog_manifest', args.profile)
+    profiler.begin('build')
+    manifest = build_manifest(args.data_dir, args.page_size)
+
+    profiler.begin('check_aggregates')
+    problems = check_aggregates(args.data_dir)
+    if problems:
+        print(f"❌ {AGGREGATES_NAME} does not match the period files:")
+        for problem in problems:
+            print(f"    {problem}")
+        sys.exit(1)
+
+    print(f"✅ Wrote {args.data_dir / MANIFEST_NAME}")
+    print(f"✅ Wrote {args.data_dir / AGGREGATES_NAME} (checked against the period files)")
+    print(f"  {len(manifest['periods'])} periods, {manifest['totalRecords']} records")
+    for entry in manifest['periods']:
+        pages = f", {len(entry['pages'])} pages" if entry['pages'] else ''
+        print(f"    {entry['file']:<30} {entry['recordCount']:>5} records "
+              f"{entry['byteSize'] / 1024:>7.1f} KB{pages}")
+
+    profiler.finish()
+
+if __name__ == '__main__':
+    main()
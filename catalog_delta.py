@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Build and apply delta packages between two catalog snapshots.
+
+A snapshot is a Resources-style directory containing Data/Periods/*.json,
+the other Data resources (catalog_manifest.json, catalog_aggregates.json,
+Pages/*.json, ...) and Images/. The delta is a zip holding only what changed:
+
+    manifest.json          format, per-period record counts, resource and
+                           image changes with SHA-1/size, and checksums of
+                           the target snapshot for verification
+    records/<file>.json    added/changed records, removed ids and the new id
+                           order for each changed period file
+    resources/<path>       added or changed Data files, whole
+    images/<name>          added or changed image files
+
+Usage:
+    python catalog_delta.py diff OLD_DIR NEW_DIR -o delta.zip
+    python catalog_delta.py apply OLD_DIR delta.zip -o NEW_DIR
+
+Diffing works one period file at a time and streams image bytes into the zip,
+so memory stays bounded by the largest period file plus the image name list.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import zipfile
+from datetime import datetime, timezone
+from pathlib import Path
+
+from file_digests import sha1_file
+
+DELTA_FORMAT = 2
+DATA_SUBDIR = Path('Data')
+PERIODS_SUBDIR = DATA_SUBDIR / 'Periods'
+IMAGES_SUBDIR = Path('Images')
+COPY_BUFFER = 1024 * 1024
+
+
+def canonical_digest(data):
+    """SHA-256 of a JSON value, independent of formatting and key order."""
+    encoded = json.dumps(data, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+def tree_digest(pairs):
+    """Digest of sorted (name, digest) pairs describing a whole directory."""
+    digest = hashlib.sha256()
+    for name, value in sorted(pairs):
+        digest.update(f"{name}:{value}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def load_period(path):
+    if not path.exists():
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_period(path, data):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+
+def list_files(directory, pattern='*'):
+    if not directory.exists():
+        return set()
+    return {p.name for p in directory.glob(pattern) if p.is_file()}
+
+
+def image_digests(directory):
+    """Yield (name, sha1, size) for every file in an images directory."""
+    if not directory.exists():
+        return
+    with os.scandir(directory) as entries:
+        for entry in sorted(entries, key=lambda e: e.name):
+            if entry.is_file() and not entry.name.startswith('.'):
+                yield entry.name, sha1_file(entry.path), entry.stat().st_size
+
+
+def resource_digests(data_dir):
+    """Yield (path, sha1, size) for Data files outside Periods (manifest, aggregates, pages)."""
+    if not data_dir.exists():
+        return
+    for path in sorted(data_dir.rglob('*.json')):
+        relative = path.relative_to(data_dir)
+        if relative.parts[0] != PERIODS_SUBDIR.name and path.is_file():
+            yield relative.as_posix(), sha1_file(path), path.stat().st_size
+
+
+def diff_files(old_digests, new_digests, new_dir, zf, prefix, changes):
+    """
+    Stream added/changed files into zf under prefix and record them in changes.
+
+    Returns the target (name, sha1) pairs.
+    """
+    old_index = {name: sha1 for name, sha1, _ in old_digests}
+    target = []
+    for name, sha1, size in new_digests:
+        target.append((name, sha1))
+        previous = old_index.pop(name, None)
+        if previous == sha1:
+            continue
+        bucket = 'added' if previous is None else 'changed'
+        changes[bucket][name] = {'sha1': sha1, 'size': size}
+        with open(new_dir / name, 'rb') as src, \
+                zf.open(zipfile.ZipInfo(f"{prefix}/{name}"), 'w', force_zip64=True) as dst:
+            shutil.copyfileobj(src, dst, COPY_BUFFER)
+    changes['removed'] = sorted(old_index)
+    return target
+
+
+def diff_period(old, new):
+    """Return the record delta between two period documents (None if equal)."""
+    old_records = {p['id']: p for p in old['paintings']} if old else {}
+    new_ids = [p['id'] for p in new['paintings']]
+    new_id_set = set(new_ids)
+    upserts = [p for p in new['paintings'] if old_records.get(p['id']) != p]
+    removed = [pid for pid in old_records if pid not in new_id_set]
+    header = {k: v for k, v in new.items() if k != 'paintings'}
+    old_header = {k: v for k, v in old.items() if k != 'paintings'} if old else {}
+    old_ids = [p['id'] for p in old['paintings']] if old else None
+
+    if old is not None and not upserts and not removed and old_ids == new_ids and header == old_header:
+        return None
+    return {'upserts': upserts, 'removed': removed, 'order': new_ids, 'header': header}
+
+
+def build_delta(old_root, new_root, output):
+    old_periods, new_periods = old_root / PERIODS_SUBDIR, new_root / PERIODS_SUBDIR
+    old_images, new_images = old_root / IMAGES_SUBDIR, new_root / IMAGES_SUBDIR
+    old_data, new_data = old_root / DATA_SUBDIR, new_root / DATA_SUBDIR
+
+    manifest = {
+        'format': DELTA_FORMAT,
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'periods': {},
+        'resources': {'added': {}, 'changed': {}, 'removed': []},
+        'images': {'added': {}, 'changed': {}, 'removed': []},
+    }
+    target_periods = []
+
+    with zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        # Records: one period file in memory at a time
+        for name in sorted(list_files(old_periods, '*.json') | list_files(new_periods, '*.json')):
+            old = load_period(old_periods / name)
+            new = load_period(new_periods / name)
+            if new is None:
+                manifest['periods'][name] = {'removed_file': True}
+                continue
+            target_periods.append((name, canonical_digest(new)))
+            delta = diff_period(old, new)
+            if delta is None:
+                continue
+            zf.writestr(f"records/{name}", json.dumps(delta, ensure_ascii=False))
+            manifest['periods'][name] = {
+                'upserts': len(delta['upserts']),
+                'removed': len(delta['removed']),
+                'records': len(delta['order']),
+                'sha256': target_periods[-1][1],
+            }
+
+        # The catalog manifest, aggregates and pages describe the records, so
+        # they travel whole with them; images: only new or changed bytes,
+        # stored uncompressed
+        target_resources = diff_files(resource_digests(old_data), resource_digests(new_data),
+                                      new_data, zf, 'resources', manifest['resources'])
+        target_images = diff_files(image_digests(old_images), image_digests(new_images),
+                                   new_images, zf, 'images', manifest['images'])
+
+        manifest['target'] = {
+            'periods_digest': tree_digest(target_periods),
+            'resources_digest': tree_digest(target_resources),
+            'images_digest': tree_digest(target_images),
+            'period_count': len(target_periods),
+            'resource_count': len(target_resources),
+            'image_count': len(target_images),
+        }
+        zf.writestr('manifest.json', json.dumps(manifest, indent=2, ensure_ascii=False))
+
+    return manifest
+
+
+def apply_delta(old_root, delta_file, output):
+    if output.exists():
+        raise FileExistsError(f"{output} already exists")
+    shutil.copytree(old_root, output)
+    periods_dir, images_dir = output / PERIODS_SUBDIR, output / IMAGES_SUBDIR
+    periods_dir.mkdir(parents=True, exist_ok=True)
+    images_dir.mkdir(parents=True, exist_ok=True)
+
+    with zipfile.ZipFile(delta_file) as zf:
+        manifest = json.loads(zf.read('manifest.json'))
+        if manifest['format'] != DELTA_FORMAT:
+            raise ValueError(f"unsupported delta format {manifest['format']}")
+
+        for name, info in manifest['periods'].items():
+            path = periods_dir / name
+            if info.get('removed_file'):
+                path.unlink(missing_ok=True)
+                continue
+            delta = json.loads(zf.read(f"records/{name}"))
+            old = load_period(path)
+            records = {p['id']: p for p in old['paintings']} if old else {}
+            for pid in delta['removed']:
+                records.pop(pid, None)
+            for painting in delta['upserts']:
+                records[painting['id']] = painting
+            write_period(path, {**delta['header'], 'paintings': [records[pid] for pid in delta['order']]})
+
+        for prefix, target_dir in (('resources', output / DATA_SUBDIR), ('images', images_dir)):
+            changes = manifest[prefix]
+            for name in changes['removed']:
+                (target_dir / name).unlink(missing_ok=True)
+            for bucket in ('added', 'changed'):
+                for name in changes[bucket]:
+                    (target_dir / name).parent.mkdir(parents=True, exist_ok=True)
+                    with zf.open(f"{prefix}/{name}") as src, open(target_dir / name, 'wb') as dst:
+                        shutil.copyfileobj(src, dst, COPY_BUFFER)
+
+    return manifest, verify_snapshot(output, manifest)
+
+
+def verify_snapshot(root, manifest):
+    """Return a list of problems comparing root with the manifest's target."""
+    problems = []
+    periods = []
+    for path in sorted((root / PERIODS_SUBDIR).glob('*.json')):
+        digest = canonical_digest(load_period(path))
+        periods.append((path.name, digest))
+        expected = manifest['periods'].get(path.name, {}).get('sha256')
+        if expected and expected != digest:
+            problems.append(f"record checksum mismatch: {path.name}")
+    if tree_digest(periods) != manifest['target']['periods_digest']:
+        problems.append('period files differ from the target snapshot')
+
+    for kind, digests in (('resource', resource_digests(root / DATA_SUBDIR)),
+                          ('image', image_digests(root / IMAGES_SUBDIR))):
+        changes = manifest[f"{kind}s"]
+        files = []
+        for name, sha1, _ in digests:
+            files.append((name, sha1))
+            expected = (changes['added'].get(name) or changes['changed'].get(name) or {}).get('sha1')
+            if expected and expected != sha1:
+                problems.append(f"{kind} checksum mismatch: {name}")
+        if tree_digest(files) != manifest['target'][f"{kind}s_digest"]:
+            problems.append(f"{kind} files differ from the target snapshot")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build or apply catalog delta packages.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    diff_cmd = commands.add_parser('diff', help='build a delta from OLD to NEW')
+    diff_cmd.add_argument('old', type=Path)
+    diff_cmd.add_argument('new', type=Path)
+    diff_cmd.add_argument('-o', '--output', type=Path, required=True)
+    apply_cmd = commands.add_parser('apply', help='rebuild NEW from OLD and a delta, then verify')
+    apply_cmd.add_argument('old', type=Path)
+    apply_cmd.add_argument('delta', type=Path)
+    apply_cmd.add_argument('-o', '--output', type=Path, required=True)
+    args = parser.parse_args(argv)
+
+    if args.command == 'diff':
+        manifest = build_delta(args.old, args.new, args.output)
+        resources, images = manifest['resources'], manifest['images']
+        print(f"✅ Delta written: {args.output} ({args.output.stat().st_size / 1024:.1f} KB)")
+        print(f"  Period files changed: {len(manifest['periods'])}")
+        for name, info in manifest['periods'].items():
+            if info.get('removed_file'):
+                print(f"    {name}: removed")
+            else:
+                print(f"    {name}: {info['upserts']} added/changed, {info['removed']} removed")
+        print(f"  Data resources: {len(resources['added'])} added, {len(resources['changed'])} changed, "
+              f"{len(resources['removed'])} removed")
+        print(f"  Images: {len(images['added'])} added, {len(images['changed'])} changed, "
+              f"{len(images['removed'])} removed")
+        return
+
+    manifest, problems = apply_delta(args.old, args.delta, args.output)
+    if problems:
+        for problem in problems:
+            print(f"  ❌ {problem}")
+        print(f"❌ Rebuilt snapshot at {args.output} does NOT match the delta's target")
+        sys.exit(1)
+    print(f"✅ Rebuilt {args.output}: {manifest['target']['period_count']} period files, "
+          f"{manifest['target']['resource_count']} data resources, {manifest['target']['image_count']} images, checksums verified")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+"""
+Append-only journal of field-level catalog changes.
+
+Instead of rewriting paintings_wikiart_urls.csv and the period JSON files
+for a handful of edits, scripts append one line per change to
+catalog_journal/tail.jsonl:
+
+    {"ts": "...", "id": "<painting id>", "field": "wikipedia_url",
+     "old": "", "new": "https://...", "source": "find_wikidata_images"}
+
+Writes cost O(changes): entries are buffered and appended in batches, with
+one fsync per batch, under a lock file so several scripts can journal at
+once without clobbering each other.
+
+Reads go through the latest snapshot (the CSV and JSON files as they are)
+with the journal tail applied on top - see iter_csv_view() and
+iter_json_view(). `compact` folds the tail into new snapshots (CSV,
+Periods/*.json and paintings.json, each rewritten only if it changed) and
+archives the tail as a segment. The archived segments are the audit trail:
+`log` shows a painting's history and `rebuild --at` writes the catalog as it
+was at any past moment by undoing later changes from their old values.
+
+JSON records only take fields they already carry (the app's files don't
+grow CSV-only columns like wikiart_url); the CSV takes every field, adding
+columns as needed. Edits made without the journal are part of the snapshot
+and can't be rebuilt past.
+
+    python catalog_journal.py status
+    python catalog_journal.py log --id 4fd20c6b-c02f-4f3e-b25d-58b493fdf92e
+    python catalog_journal.py compact
+    python catalog_journal.py rebuild --at 2026-10-01T00:00:00 -o /tmp/catalog-october
+"""
+
+import argparse
+import fcntl
+import json
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from stream_transform import iter_csv, iter_json_array, transform_csv, transform_json
+
+JOURNAL_DIR = Path('catalog_journal')
+CSV_FILE = Path('paintings_wikiart_urls.csv')
+DATA_DIR = Path('paintings_ios/Resources/Data')
+TAIL_NAME = 'tail.jsonl'
+LOCK_NAME = '.lock'
+
+# A batch is appended and fsynced when it reaches either limit (or on flush/close)
+BATCH_SIZE = 256
+BATCH_SECONDS = 1.0
+
+
+def now():
+    return datetime.now(timezone.utc).isoformat(timespec='microseconds')
+
+
+def parse_time(text):
+    """ISO date or timestamp; without a zone it is taken as UTC."""
+    moment = datetime.fromisoformat(text)
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+
+class JournalLock:
+    """Exclusive flock on the journal's lock file (writers per batch, compaction throughout)."""
+
+    def __init__(self, directory):
+        self.path = Path(directory) / LOCK_NAME
+
+    def __enter__(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(self.fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        fcntl.flock(self.fd, fcntl.LOCK_UN)
+        os.close(self.fd)
+        return False
+
+
+class Journal:
+    """Buffered writer of change entries; use as a context manager so the last batch lands."""
+
+    def __init__(self, source, directory=JOURNAL_DIR, batch_size=BATCH_SIZE, batch_seconds=BATCH_SECONDS):
+        self.source = source
+        self.directory = Path(directory)
+        self.batch_size = batch_size
+        self.batch_seconds = batch_seconds
+        self.pending = []
+        self.batch_started = None
+        self.stats = {'entries': 0, 'batches': 0, 'bytes': 0}
+
+    def record(self, painting_id, field, new, old=None):
+        """Journal field := new for a painting (old is its current value); False if unchanged."""
+        if new == old:
+            return False
+        entry = {'ts': now(), 'id': painting_id, 'field': field, 'old': old, 'new': new, 'source': self.source}
+        self.pending.append(json.dumps(entry, ensure_ascii=False) + '\n')
+        if self.batch_started is None:
+            self.batch_started = time.monotonic()
+        if len(self.pending) >= self.batch_size or time.monotonic() - self.batch_started >= self.batch_seconds:
+            self.flush()
+        return True
+
+    def flush(self):
+        """Append the pending entries in one write and fsync them."""
+        if not self.pending:
+            return
+        data = ''.join(self.pending).encode('utf-8')
+        with JournalLock(self.directory):
+            fd = os.open(self.directory / TAIL_NAME, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, data)
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        self.stats['entries'] += len(self.pending)
+        self.stats['batches'] += 1
+        self.stats['bytes'] += len(data)
+        self.pending = []
+        self.batch_started = None
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def read_entries(path):
+    """Yield the entries of one journal file (a torn last line from a crash is skipped)."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+    except FileNotFoundError:
+        return
+
+
+def segment_paths(directory=JOURNAL_DIR):
+    """Archived segments, oldest first."""
+    return sorted(Path(directory).glob('segment-*.jsonl'))
+
+
+def history(directory=JOURNAL_DIR):
+    """Every journaled entry, archived segments first, then the tail."""
+    for path in segment_paths(directory) + [Path(directory) / TAIL_NAME]:
+        yield from read_entries(path)
+
+
+def pending_changes(entries):
+    """Return {painting id: {field: value}} with the latest value per field."""
+    changes = {}
+    for entry in entries:
+        changes.setdefault(entry['id'], {})[entry['field']] = entry['new']
+    return changes
+
+
+def apply_changes(record, fields, add_fields=False):
+    """
+    Set fields on record (None removes the field). Only fields the record
+    already has, unless add_fields. Returns whether anything changed.
+    """
+    changed = False
+    for field, value in fields.items():
+        if not add_fields and field not in record:
+            continue
+        if value is None:
+            changed |= record.pop(field, None) is not None
+        elif record.get(field) != value:
+            record[field] = value
+            changed = True
+    return changed
+
+
+def _csv_value(value):
+    return '' if value is None else str(value)
+
+
+def iter_csv_view(csv_file=CSV_FILE, directory=JOURNAL_DIR):
+    """Yield the CSV rows with the journal tail applied."""
+    changes = pending_changes(read_entries(Path(directory) / TAIL_NAME))
+    for row in iter_csv(csv_file):
+        fields = changes.get(row['id'])
+        if fields:
+            apply_changes(row, {field: _csv_value(value) for field, value in fields.items()}, add_fields=True)
+        yield row
+
+
+def iter_json_view(path, directory=JOURNAL_DIR):
+    """Yield the records of a paintings JSON file with the journal tail applied."""
+    changes = pending_changes(read_entries(Path(directory) / TAIL_NAME))
+    for record in iter_json_array(path):
+        fields = changes.get(record['id'])
+        if fields:
+            apply_changes(record, fields)
+        yield record
+
+
+def json_snapshots(data_dir=DATA_DIR):
+    return sorted((Path(data_dir) / 'Periods').glob('*.json')) + [Path(data_dir) / 'paintings.json']
+
+
+def _fold(changes, csv_file, data_dir, csv_output, json_output):
+    """
+    Write the snapshots with changes applied; csv_output and json_output map
+    source paths to destinations. Files without a changed record are copied
+    (or, in place, left alone). Returns {'csv_rows', 'json_records', 'files'}.
+    """
+    stats = {'csv_rows': 0, 'json_records': 0, 'files': 0}
+    new_columns = sorted({field for fields in changes.values() for field in fields})
+
+    def apply_csv(row):
+        fields = changes.get(row['id'])
+        if fields and apply_changes(row, {f: _csv_value(v) for f, v in fields.items()}, add_fields=True):
+            stats['csv_rows'] += 1
+        return row
+
+    target = csv_output(csv_file)
+    touches_csv = any(row['id'] in changes for row in iter_csv(csv_file))
+    if touches_csv or target != csv_file:
+        transform_csv(csv_file, [apply_csv], add_columns=new_columns, output=target)
+        stats['files'] += touches_csv
+
+    def apply_json(record):
+        fields = changes.get(record['id'])
+        if fields and apply_changes(record, fields):
+            stats['json_records'] += 1
+        return record
+
+    for path in json_snapshots(data_dir):
+        if not path.exists():
+            continue
+        target = json_output(path)
+        # A read-only scan first, so unchanged files aren't rewritten
+        touched = any(changes.get(record['id']) and any(f in record for f in changes[record['id']])
+                      for record in iter_json_array(path))
+        if touched:
+            transform_json(path, [apply_json], output=target)
+            stats['files'] += 1
+        elif target != path:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(path, target)
+    return stats
+
+
+def compact(directory=JOURNAL_DIR, csv_file=CSV_FILE, data_dir=DATA_DIR):
+    """
+    Fold the tail into the snapshots and archive it as a segment.
+
+    Holds the journal lock throughout, so writers wait rather than append to
+    a tail being folded. Safe to rerun after a crash: applying a change twice
+    gives the same snapshot.
+    """
+    directory = Path(directory)
+    tail = directory / TAIL_NAME
+    with JournalLock(directory):
+        entries = list(read_entries(tail))
+        if not entries:
+            return {'entries': 0}
+        # A change whose old value isn't the previous change's new value was
+        # made from a stale read by a concurrent script; the latest one wins
+        latest = {}
+        conflicts = 0
+        for entry in entries:
+            key = (entry['id'], entry['field'])
+            if key in latest and latest[key] != entry['old']:
+                conflicts += 1
+            latest[key] = entry['new']
+
+        changes = pending_changes(entries)
+        stats = _fold(changes, Path(csv_file), data_dir, lambda path: path, lambda path: path)
+        segment = directory / f"segment-{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%fZ')}.jsonl"
+        os.replace(tail, segment)
+        dir_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+    return {'entries': len(entries), 'paintings': len(changes), 'conflicts': conflicts,
+            'segment': segment.name, **stats}
+
+
+def rebuild(at, output, directory=JOURNAL_DIR, csv_file=CSV_FILE, data_dir=DATA_DIR):
+    """
+    Write the catalog as of time at under output (same layout as the repo).
+
+    Starts from the snapshot plus tail and undoes every later change: each
+    field gets the old value of its first change after at.
+    """
+    undo = {}
+    current = pending_changes(read_entries(Path(directory) / TAIL_NAME))
+    for entry in history(directory):
+        if parse_time(entry['ts']) > at:
+            undo.setdefault(entry['id'], {}).setdefault(entry['field'], entry['old'])
+    changes = {}
+    for painting_id in current.keys() | undo.keys():
+        changes[painting_id] = {**current.get(painting_id, {}), **undo.get(painting_id, {})}
+    output, data_dir = Path(output), Path(data_dir)
+    return _fold(changes, Path(csv_file), data_dir,
+                 lambda path: output / CSV_FILE.name,
+                 lambda path: output / DATA_DIR / path.relative_to(data_dir))
+
+
+def bench(size, count):
+    """Time journaling count changes against rewriting the CSV and period files once."""
+    from synthetic_catalog import generate_catalog
+
+    workdir = Path(tempfile.mkdtemp(prefix='journal-bench-'))
+    try:
+        generate_catalog(workdir, size, image_fraction=0, orphan_rate=0)
+        csv_file, data_dir = workdir / CSV_FILE, workdir / DATA_DIR
+        ids = [row['id'] for _, row in zip(range(count), iter_csv(csv_file))]
+
+        start = time.perf_counter()
+        edits = set(ids)
+        transform_csv(csv_file, [lambda row: {**row, 'wikipedia_url': 'x'} if row['id'] in edits else row])
+        for path in sorted((data_dir / 'Periods').glob('*.json')):
+            transform_json(path, [lambda record: record])
+        rewrite = time.perf_counter() - start
+        rewritten = csv_file.stat().st_size + sum(p.stat().st_size for p in (data_dir / 'Periods').glob('*.json'))
+
+        start = time.perf_counter()
+        with Journal('bench', workdir / JOURNAL_DIR) as journal:
+            for painting_id in ids:
+                journal.record(painting_id, 'wikipedia_url', 'y', 'x')
+        journaled = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = compact(workdir / JOURNAL_DIR, csv_file, data_dir)
+        compaction = time.perf_counter() - start
+        return {'rewrite_s': rewrite, 'rewrite_bytes': rewritten, 'journal_s': journaled,
+                'journal_bytes': journal.stats['bytes'], 'fsyncs': journal.stats['batches'],
+                'compact_s': compaction, 'compacted_files': result['files']}
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Inspect, compact or rebuild from the catalog change journal.')
+    parser.add_argument('--journal-dir', type=Path, default=JOURNAL_DIR)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('status', help='summarize the tail and the archived segments')
+    log = subparsers.add_parser('log', help='print journaled changes, oldest first')
+    log.add_argument('--id', help='only this painting')
+    log.add_argument('--field', help='only this field')
+    log.add_argument('--since', type=parse_time, help='only changes after this time')
+    subparsers.add_parser('compact', help='fold the tail into the CSV and JSON snapshots')
+    rebuild_parser = subparsers.add_parser('rebuild', help='write the catalog as it was at a past time')
+    rebuild_parser.add_argument('--at', type=parse_time, required=True, help='ISO date or timestamp (UTC)')
+    rebuild_parser.add_argument('-o', '--output', type=Path, required=True)
+    bench_parser = subparsers.add_parser('bench', help='journal vs full rewrite on a synthetic catalog')
+    bench_parser.add_argument('--size', type=int, default=100000, help='paintings in the catalog')
+    bench_parser.add_argument('--changes', type=int, default=100)
+    args = parser.parse_args(argv)
+
+    if args.command == 'status':
+        tail = list(read_entries(args.journal_dir / TAIL_NAME))
+        changes = pending_changes(tail)
+        segments = segment_paths(args.journal_dir)
+        print(f"Tail: {len(tail)} changes to {len(changes)} paintings waiting for compaction")
+        if tail:
+            sources = sorted({entry['source'] for entry in tail})
+            print(f"  from {', '.join(sources)}, {tail[0]['ts']} .. {tail[-1]['ts']}")
+        archived = sum(1 for path in segments for _ in read_entries(path))
+        print(f"Archived: {archived} changes in {len(segments)} segments")
+
+    elif args.command == 'log':
+        for entry in history(args.journal_dir):
+            if ((args.id and entry['id'] != args.id) or (args.field and entry['field'] != args.field)
+                    or (args.since and parse_time(entry['ts']) <= args.since)):
+                continue
+            print(f"{entry['ts']}  {entry['id']}  {entry['field']}: "
+                  f"{entry['old']!r} -> {entry['new']!r}  ({entry['source']})")
+
+    elif args.command == 'compact':
+        result = compact(args.journal_dir)
+        if not result['entries']:
+            print("✅ Nothing to compact")
+            return
+        print(f"✅ Folded {result['entries']} changes to {result['paintings']} paintings into "
+              f"{result['files']} files ({result['csv_rows']} CSV rows, {result['json_records']} JSON records)")
+        print(f"   Archived as {args.journal_dir / result['segment']}")
+        if result['conflicts']:
+            print(f"⚠️  {result['conflicts']} changes were made from stale values (the latest one was kept); "
+                  f"see `log`")
+
+    elif args.command == 'rebuild':
+        if args.output.exists() and any(args.output.iterdir()):
+            parser.error(f"{args.output} is not empty")
+        result = rebuild(args.at, args.output, args.journal_dir)
+        print(f"✅ Catalog as of {args.at.isoformat()} written to {args.output}")
+        print(f"   {result['csv_rows']} CSV rows and {result['json_records']} JSON records differ from the snapshot")
+
+    else:
+        result = bench(args.size, args.changes)
+        print(f"{args.changes} changes on a {args.size}-painting catalog:")
+        print(f"  rewrite CSV + period JSON: {result['rewrite_s']:.2f}s, "
+              f"{result['rewrite_bytes'] / 1024 / 1024:.1f} MB written")
+        print(f"  journal:                   {result['journal_s'] * 1000:.1f} ms, "
+              f"{result['journal_bytes'] / 1024:.1f} KB written, {result['fsyncs']} fsyncs")
+        print(f"  compaction:                {result['compact_s']:.2f}s, {result['compacted_files']} files rewritten")
+
+if __name__ == '__main__':
+    main()
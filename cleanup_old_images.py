@@ -1,66 +1,170 @@
 #!/usr/bin/env python3
 """
-Remove old image files that weren't downloaded by the WikiArt script.
+Find image files that nothing references and check image references for
+consistency.
+
+The live set is built from the imageName values actually stored in the period
+JSONs, the CSV and the quiz data (so the -year / -id suffixed names written by
+fix_duplicate_images.py and fix_remaining_duplicates.py are kept), then
+compared against a single os.scandir pass over the images directory.
+
+Reports orphan files, dangling references and CSV/JSON mismatches. By default
+nothing is changed; use --quarantine to move orphans aside or --delete to
+remove them.
 """
 
+import argparse
 import csv
-import re
+import json
+import os
+import shutil
+import sys
+from datetime import datetime
 from pathlib import Path
 
-def slugify(text):
-    """Convert text to filename-safe slug."""
-    text = text.lower()
-    text = re.sub(r'\([^)]*\)', '', text)
-    text = re.sub(r'[^\w\s-]', '', text)
-    text = re.sub(r'[\s_]+', '-', text)
-    text = re.sub(r'-+', '-', text)
-    return text.strip('-')
-
-def main():
-    # Read CSV to get list of valid image filenames
-    csv_file = 'paintings_wikiart_urls.csv'
-    valid_filenames = set()
-
-    print("Reading valid image filenames from CSV...")
+from profiling import add_profile_argument, create_profiler
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+
+def collect_json_references(periods_dir):
+    """Return {painting id: imageName} from all period JSON files."""
+    references = {}
+    for json_file in sorted(periods_dir.glob('*.json')):
+        with open(json_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        for painting in data['paintings']:
+            references[painting['id']] = painting.get('imageName', '')
+    return references
+
+
+def collect_csv_references(csv_file):
+    """Return {painting id: imageName} from the CSV (empty if absent)."""
+    references = {}
+    if not Path(csv_file).exists():
+        return references
     with open(csv_file, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            if row['wikiart_url']:  # Only paintings with URLs
-                # Generate the expected filename
-                filename_slug = slugify(f"{row['artist']}-{row['title']}")
-                filename = f"{filename_slug}.jpg"
-                valid_filenames.add(filename)
+        for row in csv.DictReader(f):
+            references[row['id']] = row.get('imageName', '') or ''
+    return references
+
 
-    print(f"Found {len(valid_filenames)} valid image filenames\n")
+def collect_quiz_references(quiz_file):
+    """Return image file names mentioned anywhere in the quiz data."""
+    names = set()
+    if not Path(quiz_file).exists():
+        return names
+    with open(quiz_file, 'r', encoding='utf-8') as f:
+        stack = [json.load(f)]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            for key, value in node.items():
+                if key == 'imageName' and isinstance(value, str) and value:
+                    names.add(value)
+                else:
+                    stack.append(value)
+        elif isinstance(node, list):
+            stack.extend(node)
+        elif isinstance(node, str) and node.lower().endswith(IMAGE_EXTENSIONS):
+            names.add(node)
+    return names
 
-    # Get all files in Images directory
-    images_dir = Path('paintings_ios/Resources/Images')
-    all_images = list(images_dir.glob('*.jpg'))
 
-    print(f"Found {len(all_images)} total image files in directory")
+def scan_image_files(images_dir):
+    """Single os.scandir pass returning the set of image file names."""
+    with os.scandir(images_dir) as entries:
+        return {entry.name for entry in entries
+                if entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS)}
 
-    # Find old files to remove
-    old_files = []
-    for image_file in all_images:
-        if image_file.name not in valid_filenames:
-            old_files.append(image_file)
 
-    print(f"Found {len(old_files)} old files to remove\n")
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Find unreferenced images and inconsistent image references.')
+    parser.add_argument('--images-dir', default='paintings_ios/Resources/Images')
+    parser.add_argument('--periods-dir', default='paintings_ios/Resources/Data/Periods')
+    parser.add_argument('--quiz-file', default='paintings_ios/Resources/Data/periods_quizzes.json')
+    parser.add_argument('--csv', default='paintings_wikiart_urls.csv')
+    action = parser.add_mutually_exclusive_group()
+    action.add_argument('--quarantine', nargs='?', const='image_quarantine', metavar='DIR',
+                        help='move orphan files into DIR/<timestamp>/ (default: image_quarantine)')
+    action.add_argument('--delete', action='store_true', help='delete orphan files')
+    add_profile_argument(parser)
+    args = parser.parse_args(argv)
+    profiler = create_profiler('cleanup_old_images', args.profile)
 
-    if not old_files:
-        print("✅ No old files to remove!")
-        return
+    images_dir = Path(args.images_dir)
 
-    # Remove old files
-    print("Removing old files...")
-    for old_file in old_files:
-        old_file.unlink()
-        print(f"  ✅ Removed: {old_file.name}")
+    profiler.begin('collect_references')
+    print("Collecting image references...")
+    json_refs = collect_json_references(Path(args.periods_dir))
+    csv_refs = collect_csv_references(args.csv)
+    quiz_refs = collect_quiz_references(args.quiz_file)
+
+    live = {name for name in json_refs.values() if name}
+    live.update(name for name in csv_refs.values() if name)
+    live.update(quiz_refs)
+    print(f"  Period JSONs: {sum(1 for n in json_refs.values() if n)} paintings with images")
+    print(f"  CSV: {sum(1 for n in csv_refs.values() if n)} rows with imageName")
+    print(f"  Quiz data: {len(quiz_refs)} image references")
+    print(f"Live set: {len(live)} file names\n")
+
+    profiler.begin('scan_images')
+    on_disk = scan_image_files(images_dir)
+    print(f"Found {len(on_disk)} image files in {images_dir}\n")
+
+    profiler.begin('compare')
+    orphans = sorted(on_disk - live)
+    dangling = sorted(live - on_disk)
+
+    # CSV rows whose imageName disagrees with the period JSON for the same id
+    mismatches = sorted(
+        (painting_id, name, json_refs[painting_id])
+        for painting_id, name in csv_refs.items()
+        if name and painting_id in json_refs and json_refs[painting_id] != name
+    )
+    csv_only = sorted(set(csv_refs) - set(json_refs))
+    json_only = sorted(set(json_refs) - set(csv_refs)) if csv_refs else []
+
+    print(f"🗂️  Orphan files (unreferenced): {len(orphans)}")
+    for name in orphans:
+        print(f"    {name}")
+    print(f"🔗 Dangling references (no file): {len(dangling)}")
+    for name in dangling:
+        print(f"    {name}")
+    print(f"⚖️  CSV/JSON imageName mismatches: {len(mismatches)}")
+    for painting_id, csv_name, json_name in mismatches:
+        print(f"    {painting_id}: CSV={csv_name!r} JSON={json_name!r}")
+    print(f"    Ids only in CSV: {len(csv_only)}, only in JSON: {len(json_only)}")
+    for painting_id in csv_only:
+        print(f"    CSV only: {painting_id}")
+    for painting_id in json_only:
+        print(f"    JSON only: {painting_id}")
+
+    profiler.begin('apply')
+    if orphans and (args.quarantine or args.delete):
+        if not live:
+            print("\n❌ No image references found - refusing to remove every image.")
+            profiler.finish()
+            sys.exit(1)
+
+        if args.quarantine:
+            target = Path(args.quarantine) / datetime.now().strftime('%Y%m%d-%H%M%S')
+            target.mkdir(parents=True, exist_ok=True)
+            for name in orphans:
+                shutil.move(str(images_dir / name), str(target / name))
+            print(f"\n📦 Moved {len(orphans)} orphan files to {target}/")
+        else:
+            for name in orphans:
+                (images_dir / name).unlink()
+            print(f"\n🗑️  Deleted {len(orphans)} orphan files")
+    elif orphans:
+        print("\nDry run: nothing changed (use --quarantine or --delete)")
 
     print(f"\n{'='*70}")
-    print(f"✅ Removed {len(old_files)} old image files")
-    print(f"Remaining images: {len(all_images) - len(old_files)}")
+    print(f"Orphans: {len(orphans)}, dangling: {len(dangling)}, mismatches: {len(mismatches)}")
     print(f"{'='*70}")
 
+    profiler.finish()
+
 if __name__ == '__main__':
     main()
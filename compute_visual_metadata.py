@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Precompute visual metadata for every painting image and store it in the
+period JSON records, so the app can draw a correctly sized, colored
+placeholder before AsyncImage has decoded the JPEG.
+
+Adds to each record with an image:
+    width, height, aspectRatio   pixel dimensions
+    dominantColors               palette from k-means on a downsample, by share
+    blurHash                     BlurHash string (https://blurha.sh)
+
+Images are processed in a process pool; results are cached by content digest
+in .cache/visual_metadata.json so only new or changed images are decoded.
+Requires Pillow and NumPy.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from pathlib import Path
+
+from file_digests import CACHE_DIR, StatCache
+from profiling import add_profile_argument, create_profiler
+
+try:
+    import numpy as np
+    from PIL import Image
+except ImportError:
+    np = None
+    Image = None
+
+VISUAL_FIELDS = ('width', 'height', 'aspectRatio', 'dominantColors', 'blurHash')
+
+BASE83 = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~'
+
+PALETTE_SAMPLE_SIZE = 64
+BLURHASH_SAMPLE_SIZE = 32
+
+
+def encode_base83(value, length):
+    return ''.join(BASE83[(value // 83 ** (length - i - 1)) % 83] for i in range(length))
+
+
+def srgb_to_linear(values):
+    v = values / 255.0
+    return np.where(v <= 0.04045, v / 12.92, ((v + 0.055) / 1.055) ** 2.4)
+
+
+def linear_to_srgb(value):
+    v = min(max(value, 0.0), 1.0)
+    if v <= 0.0031308:
+        return int(v * 12.92 * 255 + 0.5)
+    return int((1.055 * v ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def blurhash(pixels, components_x, components_y):
+    """Encode an (h, w, 3) uint8 array as a BlurHash string."""
+    height, width, _ = pixels.shape
+    linear = srgb_to_linear(pixels.astype(np.float64))
+
+    cos_x = np.cos(np.pi * np.outer(np.arange(components_x), np.arange(width)) / width)
+    cos_y = np.cos(np.pi * np.outer(np.arange(components_y), np.arange(height)) / height)
+    # factors[j, i, c] = sum over pixels of cos_y[j, y] * cos_x[i, x] * linear[y, x, c]
+    factors = np.einsum('jy,ix,yxc->jic', cos_y, cos_x, linear) / (width * height)
+    factors[1:, :, :] *= 2
+    factors[0, 1:, :] *= 2
+    factors = factors.reshape(-1, 3)
+
+    dc, ac = factors[0], factors[1:]
+    result = encode_base83((components_x - 1) + (components_y - 1) * 9, 1)
+
+    if len(ac):
+        quantised_max = int(max(0, min(82, np.floor(np.abs(ac).max() * 166 - 0.5))))
+        maximum = (quantised_max + 1) / 166
+    else:
+        quantised_max, maximum = 0, 1
+    result += encode_base83(quantised_max, 1)
+
+    r, g, b = (linear_to_srgb(c) for c in dc)
+    result += encode_base83((r << 16) + (g << 8) + b, 4)
+
+    scaled = np.sign(ac / maximum) * np.abs(ac / maximum) ** 0.5
+    quantised = np.clip(np.floor(scaled * 9 + 9.5), 0, 18).astype(int)
+    for qr, qg, qb in quantised:
+        result += encode_base83(qr * 19 * 19 + qg * 19 + qb, 2)
+    return result
+
+
+def dominant_colors(pixels, k, iterations=12):
+    """
+    Vectorized k-means over an (n, 3) pixel array.
+
+    Returns hex colors ordered by cluster share. Seeded k-means++ so the
+    palette is deterministic for a given image.
+    """
+    points = pixels.reshape(-1, 3).astype(np.float32)
+    k = min(k, len(np.unique(points, axis=0)))
+    rng = np.random.default_rng(0)
+
+    centers = [points[rng.integers(len(points))]]
+    for _ in range(1, k):
+        d2 = ((points[:, None, :] - np.array(centers)[None, :, :]) ** 2).sum(axis=2).min(axis=1)
+        centers.append(points[rng.choice(len(points), p=d2 / d2.sum())])
+    centers = np.array(centers)
+
+    for _ in range(iterations):
+        labels = ((points[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2).argmin(axis=1)
+        counts = np.bincount(labels, minlength=k)
+        sums = np.stack([np.bincount(labels, weights=points[:, c], minlength=k) for c in range(3)], axis=1)
+        moved = np.where(counts[:, None] > 0, sums / np.maximum(counts, 1)[:, None], centers)
+        if np.allclose(moved, centers, atol=0.5):
+            centers = moved
+            break
+        centers = moved
+
+    order = np.argsort(-counts)
+    return ['#{:02x}{:02x}{:02x}'.format(*np.clip(np.rint(centers[i]), 0, 255).astype(int))
+            for i in order if counts[i] > 0]
+
+
+def analyze_image(path, previous_sha1, palette_size, components):
+    """Worker: compute visual metadata for one image file."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    sha1 = hashlib.sha1(data).hexdigest()
+    if sha1 == previous_sha1:
+        return {'sha1': sha1, 'unchanged': True}
+
+    try:
+        with Image.open(path) as img:
+            img = img.convert('RGB')
+            width, height = img.size
+
+            sample = img.copy()
+            sample.thumbnail((PALETTE_SAMPLE_SIZE, PALETTE_SAMPLE_SIZE))
+            palette = dominant_colors(np.asarray(sample), palette_size)
+
+            # Keep the aspect ratio for the blur so components line up
+            img.thumbnail((BLURHASH_SAMPLE_SIZE, BLURHASH_SAMPLE_SIZE))
+            components_x, components_y = components
+            if width < height:
+                components_x, components_y = components_y, components_x
+            hash_string = blurhash(np.asarray(img), components_x, components_y)
+    except Exception as e:
+        return {'sha1': sha1, 'error': str(e)}
+
+    return {
+        'sha1': sha1,
+        'width': width,
+        'height': height,
+        'aspectRatio': round(width / height, 4),
+        'dominantColors': palette,
+        'blurHash': hash_string,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Precompute image dimensions, palette and BlurHash.')
+    parser.add_argument('--images-dir', default='paintings_ios/Resources/Images')
+    parser.add_argument('--periods-dir', default='paintings_ios/Resources/Data/Periods')
+    parser.add_argument('--palette-size', type=int, default=5)
+    parser.add_argument('--components', type=int, nargs=2, default=(4, 3), metavar=('X', 'Y'),
+                        help='BlurHash components along the long and short side')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--cache', default=str(CACHE_DIR / 'visual_metadata.json'))
+    add_profile_argument(parser)
+    args = parser.parse_args(argv)
+
+    if np is None or Image is None:
+        print("❌ Pillow and NumPy are required: pip install pillow numpy")
+        sys.exit(1)
+
+    profiler = create_profiler('compute_visual_metadata', args.profile)
+    images_dir = Path(args.images_dir)
+    periods_dir = Path(args.periods_dir)
+
+    profiler.begin('load')
+    period_files = {}
+    referenced = set()
+    for json_file in sorted(periods_dir.glob('*.json')):
+        with open(json_file, 'r', encoding='utf-8') as f:
+            period_files[json_file] = json.load(f)
+        referenced.update(p['imageName'] for p in period_files[json_file]['paintings'] if p.get('imageName'))
+
+    settings = {'palette_size': args.palette_size, 'components': list(args.components)}
+    cache = StatCache(args.cache)
+    if any(e.get('settings') != settings for e in cache.entries.values()):
+        cache.entries = {}
+
+    metadata = {}
+    todo = []
+    missing = []
+    for name in sorted(referenced):
+        try:
+            stat = (images_dir / name).stat()
+        except FileNotFoundError:
+            missing.append(name)
+            continue
+        entry = cache.lookup(name, stat)
+        if entry:
+            metadata[name] = entry
+        else:
+            todo.append((name, stat, cache.entries.get(name, {}).get('sha1')))
+
+    print(f"Images referenced: {len(referenced)} (cached: {len(metadata)}, to analyze: {len(todo)})")
+
+    profiler.begin('analyze')
+    failed = 0
+    if todo:
+        workers = max(1, min(args.workers or 1, len(todo)))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            outcomes = pool.map(analyze_image, [str(images_dir / n) for n, _, _ in todo],
+                                [prev for _, _, prev in todo], repeat(args.palette_size),
+                                repeat(tuple(args.components)),
+                                chunksize=max(1, len(todo) // (workers * 8)))
+            for (name, stat, _), outcome in zip(todo, outcomes):
+                if outcome.get('error'):
+                    print(f"  ❌ {name}: {outcome['error']}")
+                    failed += 1
+                    continue
+                if outcome.get('unchanged'):
+                    fields = {k: v for k, v in cache.entries[name].items()
+                              if k not in ('size', 'mtime_ns', 'sha1')}
+                else:
+                    fields = {k: v for k, v in outcome.items() if k != 'sha1'}
+                    fields['settings'] = settings
+                metadata[name] = cache.store(name, stat, outcome['sha1'], **fields)
+
+    cache.prune(metadata)
+    cache.save()
+
+    profiler.begin('update_json')
+    updated_files = 0
+    for json_file, data in period_files.items():
+        modified = False
+        for painting in data['paintings']:
+            entry = metadata.get(painting.get('imageName'))
+            for field in VISUAL_FIELDS:
+                value = entry[field] if entry else None
+                if value is None and field in painting:
+                    del painting[field]
+                    modified = True
+                elif value is not None and painting.get(field) != value:
+                    painting[field] = value
+                    modified = True
+        if modified:
+            with open(json_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+            print(f"✅ Updated: {json_file.name}")
+            updated_files += 1
+
+    print(f"\n{'='*70}")
+    print(f"VISUAL METADATA COMPLETE")
+    print(f"{'='*70}")
+    print(f"Analyzed this run: {len(todo) - failed}, failed: {failed}, missing files: {len(missing)}")
+    print(f"Updated {updated_files} JSON files")
+    print(f"{'='*70}")
+
+    profiler.finish()
+
+if __name__ == '__main__':
+    main()
@@ -1,171 +1,239 @@
 #!/usr/bin/env python3
 """
 Download images from WikiArt URLs and update JSON files with image filenames.
+
+Images already on disk are checked against the remote resource (Commons
+SHA-1/size, or the ETag/Content-Length of the upload) using a local digest
+cache in .cache/download_images.json: identical files are skipped, stale or
+truncated ones are replaced.
+
+With --lease-db, several processes or hosts can share one run: each worker
+leases paintings from the shared database (see work_leases.py), and the
+last one to finish writes the manifest and period JSON files.
+
+Paintings are processed in priority order (see work_scheduler.py), so a run
+cut short - or bounded with --deadline - completes the earliest quizzes'
+periods first.
+
+    python download_wikiart_images.py --lease-db /shared/download.db --worker-id a &
+    python download_wikiart_images.py --lease-db /shared/download.db --worker-id b &
+
+With --trace FILE, each painting is recorded as a trace of its page fetch,
+cache lookup, remote check, downloads and writes (see tracing.py).
 """
 
+import argparse
+import hashlib
 import json
 import csv
+import os
 import re
-import urllib.request
-import urllib.error
 import time
 from pathlib import Path
 
-def slugify(text):
-    """Convert text to filename-safe slug."""
-    text = text.lower()
-    # Remove content in parentheses
-    text = re.sub(r'\([^)]*\)', '', text)
-    # Remove special characters
-    text = re.sub(r'[^\w\s-]', '', text)
-    # Replace spaces with hyphens
-    text = re.sub(r'[\s_]+', '-', text)
-    # Remove multiple hyphens
-    text = re.sub(r'-+', '-', text)
-    return text.strip('-')
-
-def get_image_url_from_wikiart(page_url):
-    """Extract the actual image URL from a WikiArt page."""
-    try:
-        req = urllib.request.Request(page_url, headers={'User-Agent': 'Mozilla/5.0'})
-        with urllib.request.urlopen(req, timeout=10) as response:
-            html = response.read().decode('utf-8')
-
-        # Look for the main painting image URL
-        # WikiArt uses patterns like: <img itemprop="image" src="...">
-        # or in a data attribute
-
-        # Pattern 1: itemprop="image"
-        match = re.search(r'itemprop="image"[^>]+content="([^"]+)"', html)
+from allocate_filenames import allocate_and_record, load_period_paintings
+from fetch import fetch_download, fetch_parsed, iter_text, print_fetch_stats
+from file_digests import CACHE_DIR, StatCache, sha1_file
+from image_manifest import load_manifest, manifest_entry, save_manifest
+from image_renditions import TARGET_WIDTH, download_candidates, rendition_label
+from profiling import add_profile_argument, create_profiler
+from tracing import add_trace_arguments, create_tracer, span, trace, traced
+from remote_metadata import compare_local, probe_remote
+from work_leases import DEFAULT_TTL, LeaseStore, default_worker_id, run_worker
+from work_scheduler import Budget, Scheduler, add_schedule_arguments
+
+LEASE_STAGE = 'download_wikiart_images'
+
+# Tried in order: the meta tags in <head> first, then a large <img> in the body
+IMAGE_URL_PATTERNS = [
+    re.compile(r'itemprop="image"[^>]+content="([^"]+)"'),
+    re.compile(r'property="og:image"[^>]+content="([^"]+)"'),
+    re.compile(r'<img[^>]+src="(https://uploads\d+\.wikiart\.org/images/[^"]+\.jpg[^"]*)"'),
+]
+
+def extract_image_url(body):
+    """Scan a WikiArt page as it streams in; stop once the image URL is known."""
+    html = ''
+    for chunk in iter_text(body):
+        # Re-scan a little of the previous text so matches can span chunks
+        window_start = max(0, len(html) - 1024)
+        html += chunk
+        match = IMAGE_URL_PATTERNS[0].search(html, window_start)
         if match:
             return match.group(1)
-
-        # Pattern 2: og:image meta tag
-        match = re.search(r'property="og:image"[^>]+content="([^"]+)"', html)
-        if match:
-            return match.group(1)
-
-        # Pattern 3: Look for large image in img tags
-        match = re.search(r'<img[^>]+src="(https://uploads\d+\.wikiart\.org/images/[^"]+\.jpg[^"]*)"', html)
+        # Meta tags only appear in <head>, so once it is complete og:image
+        # is the best we will get
+        head_end = html.find('</head>')
+        if head_end != -1:
+            match = IMAGE_URL_PATTERNS[1].search(html, 0, head_end)
+            if match:
+                return match.group(1)
+
+    for pattern in IMAGE_URL_PATTERNS[1:]:
+        match = pattern.search(html)
         if match:
             return match.group(1)
+    return None
 
+@traced
+def get_image_url_from_wikiart(page_url):
+    """Extract the actual image URL from a WikiArt page."""
+    try:
+        return fetch_parsed(page_url, extract_image_url)
     except Exception as e:
         print(f"    Error extracting image URL: {e}")
 
     return None
 
+@traced
 def download_image(image_url, output_path):
-    """Download an image from URL to output path."""
+    """Download an image from URL to output path; return its sha1/size/etag or None."""
     try:
-        req = urllib.request.Request(image_url, headers={'User-Agent': 'Mozilla/5.0'})
-        with urllib.request.urlopen(req, timeout=30) as response:
-            data = response.read()
-            with open(output_path, 'wb') as f:
+        data, headers = fetch_download(image_url)
+        # Write next to the target and rename, so an interrupted run can't
+        # leave a truncated image behind
+        tmp_path = output_path.with_name(f".{output_path.name}.part")
+        with span('write', bytes=len(data)):
+            with open(tmp_path, 'wb') as f:
                 f.write(data)
-        return True
+            os.replace(tmp_path, output_path)
+        return {'sha1': hashlib.sha1(data).hexdigest(), 'size': len(data), 'etag': headers.get('etag')}
     except Exception as e:
         print(f"    Error downloading: {e}")
-        return False
-
-def main():
-    # Read CSV with WikiArt URLs
-    csv_file = 'paintings_wikiart_urls.csv'
-
-    # Create output directory for images
-    images_dir = Path('paintings_ios/Resources/Images')
-    images_dir.mkdir(parents=True, exist_ok=True)
-
-    print(f"Reading {csv_file}...")
-
-    paintings_with_urls = []
-    with open(csv_file, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            if row['wikiart_url']:  # Only process paintings with URLs
-                paintings_with_urls.append(row)
-
-    print(f"Found {len(paintings_with_urls)} paintings with WikiArt URLs")
-    print(f"Images will be saved to: {images_dir}\n")
-
-    # Download images
-    downloaded = 0
-    failed = 0
-
-    for i, painting in enumerate(paintings_with_urls, 1):
-        title = painting['title']
-        artist = painting['artist']
-        wikiart_url = painting['wikiart_url']
-
-        # Create filename from artist and title
-        filename_slug = slugify(f"{artist}-{title}")
-        image_filename = f"{filename_slug}.jpg"
-        output_path = images_dir / image_filename
-
-        print(f"[{i}/{len(paintings_with_urls)}] {title} by {artist}")
-
-        # Skip if already downloaded
-        if output_path.exists():
-            print(f"  ⏭️  Already exists: {image_filename}")
-            painting['image_filename'] = image_filename
-            downloaded += 1
-            continue
-
-        # Get image URL from WikiArt page
+        return None
+
+def local_digest(cache, path):
+    """Digest-cache entry for an existing image, or None if it is missing."""
+    with span('digest_cache') as lookup:
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            lookup.set(exists=False)
+            return None
+        entry = cache.lookup(path.name, stat)
+        lookup.set(exists=True, hit=entry is not None)
+        if entry is None:
+            sha1 = sha1_file(path)
+            previous = cache.lookup_digest(path.name, sha1) or {}
+            # Download provenance only carries over if the content is unchanged
+            fields = {k: previous[k] for k in ('source_url', 'etag') if previous.get(k)}
+            entry = cache.store(path.name, stat, sha1, **fields)
+        return entry
+
+def process_painting(painting, image_filename, entry, digests, images_dir, target_width):
+    """
+    Make sure one painting's image is on disk and current.
+
+    entry is the painting's image_manifest record (read only). Returns a
+    JSON-serializable result: 'status' (up_to_date, unverified, downloaded
+    or failed), 'image_filename', 'replaced', 'bytes_avoided', and
+    'manifest' - the fields to merge into the manifest record.
+    """
+    title = painting['title']
+    artist = painting['artist']
+    wikiart_url = painting['wikiart_url']
+    output_path = images_dir / image_filename
+    result = {'status': 'failed', 'image_filename': '', 'replaced': False, 'bytes_avoided': 0, 'manifest': {}}
+
+    print(f"{title} by {artist}")
+
+    local = local_digest(digests, output_path)
+    image_url = None
+
+    # An existing file is replaced only if the URL it was downloaded from
+    # has changed; without that provenance it is kept and only the remote
+    # metadata of the preferred rendition is recorded
+    if local:
+        source_url = entry.get('source_url') or local.get('source_url')
+        check_url = source_url
+        if not check_url:
+            image_url = get_image_url_from_wikiart(wikiart_url)
+            check_url = download_candidates(image_url, target_width)[0] if image_url else None
+        try:
+            with span('probe_remote', url=check_url):
+                remote = probe_remote(check_url) if check_url else None
+        except Exception as e:
+            print(f"    Error checking remote: {e}")
+            remote = None
+        verdict = compare_local(local, remote, check_url, source_url)
+        if verdict != 'stale':
+            label = 'Up to date' if verdict == 'identical' else 'Already exists (unverified)'
+            print(f"  ⏭️  {label}: {image_filename}")
+            result['image_filename'] = image_filename
+            if remote:
+                result['manifest']['remote'] = remote
+            if verdict == 'identical':
+                result['status'] = 'up_to_date'
+                result['bytes_avoided'] = local['size']
+            else:
+                result['status'] = 'unverified'
+            return result
+        print(f"  ♻️  Stale, replacing: {image_filename}")
+        result['replaced'] = True
+
+    # Get image URL from WikiArt page
+    if not image_url:
         print(f"  🔍 Fetching from: {wikiart_url}")
         image_url = get_image_url_from_wikiart(wikiart_url)
 
-        if not image_url:
-            print(f"  ❌ Could not find image URL")
-            failed += 1
-            painting['image_filename'] = ''
-            continue
-
-        print(f"  📥 Downloading image...")
-        if download_image(image_url, output_path):
-            file_size = output_path.stat().st_size / 1024  # KB
-            print(f"  ✅ Saved: {image_filename} ({file_size:.1f} KB)")
-            painting['image_filename'] = image_filename
-            downloaded += 1
-        else:
-            print(f"  ❌ Download failed")
-            failed += 1
-            painting['image_filename'] = ''
-
-        # Be nice to WikiArt's servers
+    if not image_url:
+        print(f"  ❌ Could not find image URL")
+        return result
+
+    # Preferred rendition first; the one the page advertises if that isn't available
+    saved_url = None
+    for candidate_url in download_candidates(image_url, target_width):
+        print(f"  📥 Downloading image ({rendition_label(candidate_url)})...")
+        saved = download_image(candidate_url, output_path)
+        if saved:
+            saved_url = candidate_url
+            break
+
+    if saved_url:
+        print(f"  ✅ Saved: {image_filename} ({saved['size'] / 1024:.1f} KB)")
+        digests.store(image_filename, output_path.stat(), saved['sha1'],
+                      source_url=saved_url, etag=saved['etag'])
+        result['status'] = 'downloaded'
+        result['image_filename'] = image_filename
+        result['manifest'] = {
+            'source_url': saved_url,
+            'rendition': rendition_label(saved_url),
+            'remote': {k: v for k, v in saved.items() if v is not None},
+        }
+    else:
+        print(f"  ❌ Download failed")
+
+    # Be nice to WikiArt's servers
+    with span('politeness_delay'):
         time.sleep(0.5)
-
-        # Progress update every 25 images
-        if i % 25 == 0:
-            print(f"\n{'='*70}")
-            print(f"Progress: {i}/{len(paintings_with_urls)}")
-            print(f"Downloaded: {downloaded}, Failed: {failed}")
-            print(f"{'='*70}\n")
-
+    return result
+
+def traced_process_painting(painting, image_filename, *args):
+    """process_painting() as the root span of the painting's trace."""
+    with trace('process_painting', painting['id'], title=painting['title'], artist=painting['artist']) as root:
+        result = process_painting(painting, image_filename, *args)
+        root.set(status=result['status'])
+        return result
+
+def apply_result(manifest, painting, result):
+    painting['image_filename'] = result['image_filename']
+    manifest_entry(manifest, painting['id']).update(result['manifest'])
+
+def print_summary(results):
+    counts = {}
+    for result in results:
+        counts[result['status']] = counts.get(result['status'], 0) + 1
     print(f"\n{'='*70}")
     print(f"IMAGE DOWNLOAD COMPLETE")
     print(f"{'='*70}")
-    print(f"Successfully downloaded: {downloaded}")
-    print(f"Failed: {failed}")
-    print(f"{'='*70}\n")
-
-    # Now update JSON files
-    print("Updating JSON files with image filenames...\n")
-
-    # Create a mapping of painting ID to image filename
-    id_to_filename = {}
-    for painting in paintings_with_urls:
-        if painting.get('image_filename'):
-            id_to_filename[painting['id']] = painting['image_filename']
-
-    # Read all paintings from CSV to get the mapping
-    all_paintings_map = {}
-    with open(csv_file, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            all_paintings_map[row['id']] = row
-
-    # Update JSON files
+    print(f"Successfully downloaded: {len(results) - counts.get('failed', 0)}")
+    print(f"Failed: {counts.get('failed', 0)}")
+    print(f"Up to date (skipped): {counts.get('up_to_date', 0)}, "
+          f"stale replaced: {sum(1 for r in results if r['replaced'])}, "
+          f"bytes avoided: {sum(r['bytes_avoided'] for r in results) / 1024 / 1024:.1f} MB")
+
+def update_period_files(id_to_filename):
+    """Set imageName in the period JSONs; return (paintings, files) updated."""
     periods_dir = Path('paintings_ios/Resources/Data/Periods')
     updated_files = 0
     updated_paintings = 0
@@ -188,11 +256,165 @@ def main():
             print(f"✅ Updated: {json_file.name}")
             updated_files += 1
 
+    return updated_paintings, updated_files
+
+def run_leased(args, paintings_with_urls, image_names, manifest, digests, images_dir):
+    """
+    Worker mode: process the paintings this worker leases from args.lease_db.
+
+    Returns every painting's result once all workers are done if this worker
+    won the finalize claim, else None (another worker writes the outputs).
+    """
+    store = LeaseStore(args.lease_db, ttl=args.lease_ttl)
+    worker = args.worker_id or default_worker_id()
+    by_id = {painting['id']: painting for painting in paintings_with_urls}
+    new = store.add_tasks(LEASE_STAGE, by_id)
+    print(f"Worker {worker}: {new} new tasks registered in {args.lease_db}, "
+          f"{len(store.live_workers())} other workers live\n")
+
+    def handle(painting_id):
+        painting = by_id[painting_id]
+        return traced_process_painting(painting, image_names[painting_id],
+                                       manifest_entry(manifest, painting_id), digests, images_dir, args.target_width)
+
+    finished, duplicates = run_worker(store, LEASE_STAGE, worker, handle, batch=2)
+    # Each worker keeps its own view of the digest cache; entries lost to a
+    # concurrent save only cost a re-hash on the next run
+    digests.save()
+    print(f"\nWorker {worker}: finished {finished} paintings, {duplicates} already done by others")
+
+    if not store.claim_finalize(LEASE_STAGE, worker):
+        print("Another worker writes the manifest and period files.")
+        return None
+    print("All tasks finished; this worker writes the manifest and period files.")
+    results = store.results(LEASE_STAGE)
+    for painting_id, result in results.items():
+        if painting_id in by_id:
+            apply_result(manifest, by_id[painting_id], result)
+    return list(results.values())
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Download images from WikiArt URLs and update JSON files.')
+    parser.add_argument('--target-width', type=int, default=TARGET_WIDTH,
+                        help='download the smallest server-side rendition at least this wide '
+                             '(never one larger than the page advertises)')
+    parser.add_argument('--lease-db', type=Path,
+                        help='share the work with other workers through this lease database '
+                             '(finished tasks are not redone; use a new file for a new run)')
+    parser.add_argument('--worker-id', help='name of this worker (default: host-pid)')
+    parser.add_argument('--lease-ttl', type=float, default=DEFAULT_TTL, help='seconds before an unrenewed lease expires')
+    add_schedule_arguments(parser)
+    add_profile_argument(parser)
+    add_trace_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.deadline is not None and args.lease_db:
+        parser.error('--deadline is not supported with --lease-db')
+    profiler = create_profiler('download_wikiart_images', args.profile)
+    tracer = create_tracer('download_wikiart_images', args.trace, args.trace_sample, args.trace_format)
+
+    # Read CSV with WikiArt URLs
+    csv_file = 'paintings_wikiart_urls.csv'
+
+    # Create output directory for images
+    images_dir = Path('paintings_ios/Resources/Images')
+    images_dir.mkdir(parents=True, exist_ok=True)
+
+    profiler.begin('read_csv')
+    print(f"Reading {csv_file}...")
+
+    with open(csv_file, 'r', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    # Only process paintings with URLs
+    paintings_with_urls = [row for row in rows if row['wikiart_url']]
+
+    print(f"Found {len(paintings_with_urls)} paintings with WikiArt URLs")
+
+    # Allocate every painting's final, collision-free file name before any
+    # network I/O, so collisions never cost a second download
+    profiler.begin('allocate_names')
+    manifest = load_manifest()
+    catalog = load_period_paintings()
+    image_names = allocate_and_record(catalog, manifest, images_dir)
+    if not args.lease_db:
+        # Workers leave shared files alone until the finalizing one saves
+        save_manifest(manifest)
+    print(f"Images will be saved to: {images_dir}\n")
+
+    profiler.begin('schedule')
+    scheduler = Scheduler('download_wikiart_images', catalog, manifest, images_dir=images_dir)
+    if not args.file_order:
+        total = len(paintings_with_urls)
+        fitting, rest = scheduler.plan(paintings_with_urls, args.deadline)
+        scheduler.describe(fitting, total)
+        paintings_with_urls = fitting + rest
+        print()
+
+    # Download images
+    profiler.begin('download')
+    digests = StatCache(CACHE_DIR / 'download_images.json')
+
+    if args.lease_db:
+        results = run_leased(args, paintings_with_urls, image_names, manifest, digests, images_dir)
+        if results is None:
+            print_fetch_stats()
+            tracer.finish()
+            profiler.finish()
+            return
+    else:
+        results = []
+        budget = Budget(args.deadline)
+        for i, painting in enumerate(paintings_with_urls, 1):
+            if not budget.fits(scheduler.expected_seconds(painting)):
+                continue
+            print(f"[{i}/{len(paintings_with_urls)}] ", end='')
+            started = time.monotonic()
+            # File name allocated up front (see allocate_filenames.py)
+            result = traced_process_painting(painting, image_names[painting['id']],
+                                             manifest_entry(manifest, painting['id']), digests,
+                                             images_dir, args.target_width)
+            apply_result(manifest, painting, result)
+            results.append(result)
+            downloaded = result['manifest'].get('remote', {}).get('size', 0) if result['status'] == 'downloaded' else 0
+            scheduler.observe(painting, time.monotonic() - started, result['status'] != 'failed', downloaded)
+
+            # Progress update every 25 images
+            if i % 25 == 0:
+                failed = sum(1 for r in results if r['status'] == 'failed')
+                print(f"\n{'='*70}")
+                print(f"Progress: {i}/{len(paintings_with_urls)}")
+                print(f"Downloaded: {len(results) - failed}, Failed: {failed}")
+                print(f"{'='*70}\n")
+        digests.save()
+        scheduler.save()
+        if budget.skipped:
+            print(f"\n⏰ Deadline reached: skipped {budget.skipped} lower-priority paintings")
+
+    save_manifest(manifest)
+
+    print_summary(results)
+    print_fetch_stats()
+    tracer.finish()
+    print(f"{'='*70}\n")
+
+    # Now update JSON files
+    profiler.begin('update_json')
+    print("Updating JSON files with image filenames...\n")
+
+    # Create a mapping of painting ID to image filename
+    id_to_filename = {}
+    for painting in paintings_with_urls:
+        if painting.get('image_filename'):
+            id_to_filename[painting['id']] = painting['image_filename']
+
+    updated_paintings, updated_files = update_period_files(id_to_filename)
+
     print(f"\n{'='*70}")
     print(f"JSON UPDATE COMPLETE")
     print(f"{'='*70}")
     print(f"Updated {updated_paintings} paintings in {updated_files} JSON files")
     print(f"{'='*70}")
 
+    profiler.finish()
+
 if __name__ == '__main__':
     main()
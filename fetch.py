@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP layer for the fetch scripts.
+
+Every request goes through urllib.request.urlopen (so an installed opener,
+such as the mock server's, still applies) and through a singleflight group:
+concurrent callers asking for the same resource - same method, same
+normalized URL, same parser - share one network operation and its result.
+Nothing is cached once the operation completes; this only collapses
+duplicates that are in flight at the same time, e.g. the duplicated
+Hockney/de Kooning entries resolved by parallel workers.
+
+    from fetch import fetch_json, fetch_text, fetch_bytes, fetch_parsed, fetch_status, fetch_headers
+
+Requests advertise gzip/deflate and bodies are decompressed as they are read.
+Parsers passed to request() get a file-like ResponseBody and can stop early;
+only what they consumed is transferred. Counters for wire and decoded bytes
+are available from fetch_stats() and print_fetch_stats(). Inside a trace
+(see tracing.py) each request is an 'http' span with its status and sizes.
+"""
+
+import codecs
+import io
+import json
+import string
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+import zlib
+
+from tracing import span
+
+USER_AGENT = 'Mozilla/5.0'
+ACCEPT_ENCODING = 'gzip, deflate'
+CHUNK_SIZE = 64 * 1024
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+# Everything printable in ASCII is left alone, including existing %-escapes
+URI_SAFE = string.punctuation
+
+
+def normalize_url(url):
+    """Canonical form of a URL for use as a coalescing key."""
+    parts = urllib.parse.urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    path = urllib.parse.quote(urllib.parse.unquote(parts.path), safe="/!:@$&'()*+,;=-._~") or '/'
+    query = urllib.parse.urlencode(sorted(urllib.parse.parse_qsl(parts.query, keep_blank_values=True)))
+    return urllib.parse.urlunsplit((scheme, host, path, query, ''))
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Run fn once per key among concurrent callers; everyone gets its outcome."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.coalesced += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+                leader = True
+
+        if leader:
+            try:
+                call.result = fn()
+            except BaseException as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+        else:
+            call.done.wait()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+
+class DecodingReader(io.RawIOBase):
+    """Raw stream over a response body that undoes gzip/deflate on the fly."""
+
+    def __init__(self, response):
+        self._response = response
+        self.encoding = (response.headers.get('Content-Encoding') or 'identity').strip().lower()
+        if self.encoding in ('gzip', 'x-gzip'):
+            self._decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif self.encoding in ('identity', 'deflate'):
+            # deflate is chosen on the first chunk: zlib-wrapped or raw
+            self._decoder = None
+        else:
+            raise ValueError(f"unsupported Content-Encoding: {self.encoding}")
+        self._pending = b''
+        self._offset = 0
+        self._eof = False
+        self.wire_bytes = 0
+        self.decoded_bytes = 0
+
+    def readable(self):
+        return True
+
+    def _fill(self):
+        while self._offset >= len(self._pending) and not self._eof:
+            if self._decoder is not None and self._decoder.unconsumed_tail:
+                data = self._decoder.unconsumed_tail
+            else:
+                data = self._response.read(CHUNK_SIZE)
+                self.wire_bytes += len(data)
+                if not data:
+                    self._eof = True
+                    self._pending = self._decoder.flush() if self._decoder is not None else b''
+                    self._offset = 0
+                    return
+                if self.encoding == 'deflate' and self._decoder is None:
+                    zlib_header = len(data) >= 2 and data[0] & 0x0F == 8 and (data[0] << 8 | data[1]) % 31 == 0
+                    self._decoder = zlib.decompressobj(zlib.MAX_WBITS if zlib_header else -zlib.MAX_WBITS)
+            # Bounded output per step so a small body can't expand unchecked
+            self._pending = self._decoder.decompress(data, CHUNK_SIZE) if self._decoder is not None else data
+            self._offset = 0
+
+    def readinto(self, buffer):
+        self._fill()
+        n = min(len(buffer), len(self._pending) - self._offset)
+        buffer[:n] = self._pending[self._offset:self._offset + n]
+        self._offset += n
+        self.decoded_bytes += n
+        return n
+
+
+class ResponseBody(io.BufferedReader):
+    """Buffered, decompressed response body that also carries status and headers."""
+
+    def __init__(self, response):
+        self.decoder = DecodingReader(response)
+        super().__init__(self.decoder, CHUNK_SIZE)
+        self.status = response.status
+        self.headers = response.headers
+
+
+def iter_text(body, encoding='utf-8'):
+    """Yield a body as decoded text chunks, for parsers that can stop early."""
+    decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+    while True:
+        chunk = body.read1(CHUNK_SIZE)
+        if not chunk:
+            tail = decoder.decode(b'', final=True)
+            if tail:
+                yield tail
+            return
+        yield decoder.decode(chunk)
+
+
+_flight = SingleFlight()
+_stats_lock = threading.Lock()
+_stats = {'wire_bytes': 0, 'bytes': 0, 'compressed_responses': 0, 'errors': 0}
+
+
+def to_uri(url):
+    """Percent-encode non-ASCII characters and spaces (e.g. accented slugs)."""
+    return urllib.parse.quote(url, safe=URI_SAFE)
+
+
+def _count(**deltas):
+    with _stats_lock:
+        for key, value in deltas.items():
+            _stats[key] += value
+
+
+def request(url, parse, timeout=10, method='GET', headers=None):
+    """
+    Open url and return parse(body), coalescing identical concurrent calls.
+
+    parse receives a ResponseBody (decompressed, file-like) and must consume
+    what it needs before returning; its return value is what every caller
+    receives. Only calls passing the same parse object are coalesced, so
+    closures and lambdas never share another caller's result.
+    """
+    extra = tuple(sorted((headers or {}).items()))
+    key = (method, normalize_url(url), parse, extra)
+
+    def run():
+        http.set(coalesced=False)
+        req_headers = {'User-Agent': USER_AGENT, 'Accept-Encoding': ACCEPT_ENCODING, **dict(extra)}
+        req = urllib.request.Request(to_uri(url), headers=req_headers, method=method)
+        try:
+            with urllib.request.urlopen(req, timeout=timeout) as response:
+                body = ResponseBody(response)
+                try:
+                    return parse(body)
+                finally:
+                    decoder = body.decoder
+                    http.set(status=body.status, wire_bytes=decoder.wire_bytes, bytes=decoder.decoded_bytes)
+                    _count(wire_bytes=decoder.wire_bytes, bytes=decoder.decoded_bytes,
+                           compressed_responses=int(decoder.encoding != 'identity'))
+        except Exception as e:
+            if isinstance(e, urllib.error.HTTPError):
+                http.set(status=e.code)
+            _count(errors=1)
+            raise
+
+    # Left True if another caller's identical request ran instead of ours
+    with span('http', method=method, url=url, coalesced=True) as http:
+        return _flight.do(key, run)
+
+
+def _read_bytes(body):
+    return body.read()
+
+
+def _read_text(body):
+    return body.read().decode('utf-8')
+
+
+def _read_json(body):
+    return json.load(body)
+
+
+def _read_status(body):
+    return body.status
+
+
+def _read_headers(body):
+    return {name.lower(): value for name, value in body.headers.items()}
+
+
+def _read_bytes_and_headers(body):
+    return body.read(), _read_headers(body)
+
+
+def fetch_bytes(url, timeout=30):
+    """GET url and return the body."""
+    return request(url, _read_bytes, timeout)
+
+
+def fetch_download(url, timeout=30):
+    """GET url and return (body, headers with lower-cased names)."""
+    return request(url, _read_bytes_and_headers, timeout)
+
+
+def fetch_text(url, timeout=10):
+    """GET url and return the body decoded as UTF-8."""
+    return request(url, _read_text, timeout)
+
+
+def fetch_json(url, timeout=10):
+    """GET url and parse the JSON body as it streams in."""
+    return request(url, _read_json, timeout)
+
+
+def fetch_parsed(url, parse, timeout=10):
+    """GET url and return parse(body), letting parse stop reading early."""
+    return request(url, parse, timeout)
+
+
+def fetch_status(url, timeout=10, method='HEAD', headers=None):
+    """Return the HTTP status of url (errors raise urllib.error.HTTPError)."""
+    return request(url, _read_status, timeout, method, headers)
+
+
+def fetch_headers(url, timeout=10):
+    """HEAD url and return its response headers with lower-cased names."""
+    return request(url, _read_headers, timeout, 'HEAD')
+
+
+def fetch_stats():
+    """Snapshot of the request counters."""
+    with _stats_lock:
+        stats = dict(_stats)
+    stats['requests'] = _flight.executed
+    stats['coalesced'] = _flight.coalesced
+    return stats
+
+
+def print_fetch_stats():
+    stats = fetch_stats()
+    print(f"Network: {stats['requests']} requests, {stats['coalesced']} duplicates coalesced, "
+          f"{stats['errors']} errors")
+    print(f"Transfer: {stats['wire_bytes'] / 1024:.1f} KB on the wire, {stats['bytes'] / 1024:.1f} KB "
+          f"decoded ({stats['compressed_responses']} compressed responses)")
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Content digests and a stat-keyed cache for files under Resources/Images.
+
+Entries are keyed by file name and remember (size, mtime_ns, sha1) together
+with whatever a tool derived from the file, so reruns only hash and process
+files whose size or mtime changed, and a touched-but-identical file is
+recognised by its digest.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+CACHE_DIR = Path('.cache')
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def sha1_file(path):
+    """Return the hex SHA-1 of a file, read in chunks."""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_json_atomic(path, data, indent=None):
+    """Write JSON to a temp file next to path, then rename it into place."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=indent, ensure_ascii=False)
+        os.replace(tmp_name, path)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+
+
+class StatCache:
+    """JSON-backed cache of per-file results keyed by (size, mtime, digest)."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.entries = {}
+        self.dirty = False
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f).get('files', {})
+
+    def lookup(self, name, stat):
+        """Return the cached entry if size and mtime still match, else None."""
+        entry = self.entries.get(name)
+        if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            return entry
+        return None
+
+    def lookup_digest(self, name, sha1):
+        """Return the cached entry for name if its content digest matches."""
+        entry = self.entries.get(name)
+        if entry and entry['sha1'] == sha1:
+            return entry
+        return None
+
+    def store(self, name, stat, sha1, **fields):
+        """Record an entry for name with the file's current stat."""
+        self.entries[name] = {
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'sha1': sha1,
+            **fields,
+        }
+        self.dirty = True
+        return self.entries[name]
+
+    def prune(self, live_names):
+        """Drop entries for files that no longer exist."""
+        for name in set(self.entries) - set(live_names):
+            del self.entries[name]
+            self.dirty = True
+
+    def save(self):
+        if self.dirty:
+            write_json_atomic(self.path, {'files': self.entries})
+            self.dirty = False
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Find paintings that appear more than once in Resources/Data/Periods under
+slightly different titles, years or periods - the records behind the image
+name collisions fix_duplicate_images.py and fix_remaining_duplicates.py had
+to untangle.
+
+Record linkage in three steps, near-linear in the catalog size:
+
+1. Blocking: records are grouped by normalized artist (accent-folded,
+   word order ignored) and year bucket. Each bucket is compared with itself
+   and the next one, so a pair never straddles a boundary unseen; the
+   period is ignored on purpose.
+2. Comparison: pairs within a block are scored on title similarity
+   (candidate_scoring's token-set/Jaro-Winkler kernel) and year distance.
+   Titles numbering different works of a series ("No. 3" vs "No. 4",
+   "I" vs "II") or with different notes ("Untitled (Perfect Lovers)" vs
+   "Untitled (Portrait of Ross in L.A.)") never match, and generic titles
+   ("Self-Portrait", "Untitled") only match in the same year. Blocks
+   larger than BLOCK_LIMIT are compared with a sorted neighbourhood over
+   two title keys instead of every pair.
+3. Clustering: pairs scoring at least THRESHOLD are joined into clusters
+   (union-find), each reported with its records and pairwise scores.
+
+Results go to .cache/duplicate_paintings.json. Exits with status 1 if any
+likely duplicates are found.
+
+    python find_duplicate_paintings.py
+    python find_duplicate_paintings.py --threshold 0.8
+"""
+
+import argparse
+import re
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+from allocate_filenames import load_period_paintings
+from candidate_scoring import title_similarity, tokens
+from file_digests import CACHE_DIR, write_json_atomic
+from profiling import add_profile_argument, create_profiler
+from slugs import fold, slugify
+
+OUTPUT_FILE = CACHE_DIR / 'duplicate_paintings.json'
+THRESHOLD = 0.9
+YEAR_BUCKET = 10
+# Blocks (two buckets) up to this size compare every pair; larger ones use a window
+BLOCK_LIMIT = 60
+WINDOW = 8
+# Quick reject before the string kernel: share of title words two records must have in common
+MIN_SHARED_WORDS = 0.6
+
+_ROMAN_NUMERALS = frozenset({'i', 'ii', 'iii', 'iv', 'v', 'vi', 'vii', 'viii', 'ix', 'x', 'xi', 'xii'})
+_PARENTHESES = re.compile(r'\(([^)]*)\)')
+# Titles an artist reuses for different works
+GENERIC_TITLES = frozenset({'untitled', 'composition', 'self-portrait', 'portrait', 'study', 'landscape',
+                            'still-life', 'nude', 'sketch', 'abstraction'})
+
+
+class Record:
+    """A painting with its comparison features computed once."""
+
+    __slots__ = ('painting', 'year', 'words', 'numbers', 'notes', 'key', 'sorted_key', 'generic')
+
+    def __init__(self, painting):
+        self.painting = painting
+        try:
+            self.year = int(painting.get('year'))
+        except (TypeError, ValueError):
+            self.year = None
+        self.words = frozenset(tokens(painting['title'], keep_stopwords=True))
+        self.numbers = frozenset(word for word in self.words if word.isdigit() or word in _ROMAN_NUMERALS)
+        self.notes = tuple(tokens(' '.join(_PARENTHESES.findall(painting['title']))))
+        self.key = ' '.join(tokens(painting['title'], keep_stopwords=True))
+        self.sorted_key = ' '.join(sorted(self.words))
+        self.generic = slugify(painting['title']) in GENERIC_TITLES
+
+
+def artist_key(artist):
+    """Artist name folded and with word order ignored ("Gogh, Vincent van" = "Vincent van Gogh")."""
+    return ' '.join(sorted(tokens(artist or '', keep_stopwords=True))) or fold(artist or '')
+
+
+def pair_score(a, b):
+    """Likelihood in [0, 1] that two records of one artist are the same painting."""
+    if a.numbers != b.numbers or (a.generic and a.year != b.year):
+        return 0.0
+    if a.key == b.key:
+        title = 1.0
+    else:
+        shared = len(a.words & b.words) / max(len(a.words), len(b.words), 1)
+        if shared < MIN_SHARED_WORDS:
+            return 0.0
+        # A note on one side only is an addition; different notes on both mean different works
+        title = title_similarity(a.painting['title'], b.painting['title'], strip_notes=not (a.notes and b.notes))
+    if a.year is None or b.year is None:
+        year = 0.5
+    else:
+        year = max(0.0, 1 - abs(a.year - b.year) / YEAR_BUCKET)
+    return 0.85 * title + 0.15 * year
+
+
+def candidate_pairs(records):
+    """Yield index pairs within one block worth scoring."""
+    if len(records) <= BLOCK_LIMIT:
+        for i in range(len(records)):
+            for j in range(i + 1, len(records)):
+                yield i, j
+        return
+    # Sorted neighbourhood: neighbours on either title key, each pair once
+    seen = set()
+    for key in (lambda i: records[i].key, lambda i: records[i].sorted_key):
+        order = sorted(range(len(records)), key=key)
+        for position, i in enumerate(order):
+            for j in order[position + 1:position + 1 + WINDOW]:
+                pair = (i, j) if i < j else (j, i)
+                if pair not in seen:
+                    seen.add(pair)
+                    yield pair
+
+
+def find_duplicate_clusters(paintings, threshold=THRESHOLD):
+    """
+    Return (clusters, stats). A cluster is {'score', 'paintings', 'pairs'},
+    with pairs as [id, id, score]; clusters are sorted by score, best first.
+    """
+    blocks = defaultdict(list)
+    for painting in paintings:
+        record = Record(painting)
+        bucket = record.year // YEAR_BUCKET if record.year is not None else None
+        blocks[artist_key(painting.get('artist')), bucket].append(record)
+
+    parent = {}
+
+    def find(record):
+        root = record
+        while parent.get(root, root) is not root:
+            root = parent[root]
+        # Path compression
+        while record is not root:
+            parent[record], record = root, parent.get(record, root)
+        return root
+
+    matches = []
+    stats = {'records': len(paintings), 'blocks': len(blocks), 'comparisons': 0, 'matches': 0}
+    for (artist, bucket), records in blocks.items():
+        # Compare with the next bucket too, so years across a boundary meet
+        following = blocks.get((artist, bucket + 1), []) if bucket is not None else []
+        block = records + following
+        for i, j in candidate_pairs(block):
+            if i >= len(records) and j >= len(records):
+                continue  # both in the next bucket: compared with that block
+            a, b = block[i], block[j]
+            if a.year is not None and b.year is not None and abs(a.year - b.year) > YEAR_BUCKET:
+                continue
+            stats['comparisons'] += 1
+            score = pair_score(a, b)
+            if score >= threshold:
+                matches.append((a, b, score))
+                root_a, root_b = find(a), find(b)
+                if root_a is not root_b:
+                    parent[root_b] = root_a
+
+    groups = defaultdict(list)
+    for a, b, score in matches:
+        groups[id(find(a))].append((a, b, score))
+    clusters = []
+    for pairs in groups.values():
+        members = list({id(r): r for a, b, _ in pairs for r in (a, b)}.values())
+        clusters.append({
+            'score': round(max(score for _, _, score in pairs), 3),
+            'paintings': [{field: r.painting.get(field) for field in ('id', 'title', 'artist', 'year', 'period')}
+                          for r in members],
+            'pairs': [[a.painting['id'], b.painting['id'], round(score, 3)] for a, b, score in pairs],
+        })
+    clusters.sort(key=lambda cluster: (-cluster['score'], cluster['paintings'][0]['artist'] or ''))
+    stats['matches'] = len(matches)
+    return clusters, stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Find paintings listed more than once in the period files.')
+    parser.add_argument('--periods-dir', type=Path, default=Path('paintings_ios/Resources/Data/Periods'))
+    parser.add_argument('--output', type=Path, default=OUTPUT_FILE)
+    parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                        help=f'lowest pair score reported as a duplicate (default {THRESHOLD})')
+    add_profile_argument(parser)
+    args = parser.parse_args(argv)
+    profiler = create_profiler('find_duplicate_paintings', args.profile)
+
+    profiler.begin('load')
+    paintings = load_period_paintings(args.periods_dir)
+    print(f"Loaded {len(paintings)} paintings from {args.periods_dir}")
+
+    profiler.begin('link')
+    clusters, stats = find_duplicate_clusters(paintings, args.threshold)
+    print(f"Compared {stats['comparisons']} pairs in {stats['blocks']} artist/year blocks "
+          f"(all pairs would be {len(paintings) * (len(paintings) - 1) // 2})")
+
+    profiler.begin('write')
+    write_json_atomic(args.output, {'threshold': args.threshold, 'stats': stats, 'clusters': clusters}, indent=2)
+
+    print(f"\n{'='*70}")
+    if clusters:
+        duplicates = sum(len(cluster['paintings']) for cluster in clusters)
+        print(f"⚠️  {len(clusters)} clusters of likely duplicates ({duplicates} records):")
+        for cluster in clusters[:20]:
+            print(f"  {cluster['score']:.2f}")
+            for painting in cluster['paintings']:
+                print(f"    - {painting['title']} ({painting['year']}, {painting['period']}) by {painting['artist']}")
+        if len(clusters) > 20:
+            print(f"  ... and {len(clusters) - 20} more")
+    else:
+        print("✅ No likely duplicates found")
+    print(f"Report: {args.output}")
+    print(f"{'='*70}")
+
+    profiler.finish()
+    if clusters:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
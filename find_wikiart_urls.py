@@ -2,64 +2,74 @@
 """
 Find actual WikiArt URLs for all paintings using WikiArt's search API.
 Uses only standard library - no external dependencies.
+
+With --trace FILE, each painting's probes are recorded as one trace
+(see tracing.py).
 """
 
+import argparse
 import json
 import csv
 import time
-import urllib.request
-import urllib.parse
-import re
 from pathlib import Path
 
-def slugify(text):
-    """Convert text to WikiArt-compatible URL slug."""
-    text = text.lower()
-    # Remove content in parentheses
-    text = re.sub(r'\([^)]*\)', '', text)
-    # Remove special characters except spaces and hyphens
-    text = re.sub(r'[^\w\s-]', '', text)
-    # Replace spaces and underscores with hyphens
-    text = re.sub(r'[\s_]+', '-', text)
-    # Remove multiple hyphens
-    text = re.sub(r'-+', '-', text)
-    return text.strip('-')
-
-def try_wikiart_url(url):
-    """Try to access a WikiArt URL and see if it exists."""
-    try:
-        req = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0'})
-        with urllib.request.urlopen(req, timeout=5) as response:
-            if response.status == 200:
-                return True
-    except:
-        pass
-    return False
+from fetch import print_fetch_stats
+from profiling import add_profile_argument, create_profiler
+from slugs import wikiart_candidates
+from tracing import add_trace_arguments, create_tracer, trace, traced
+from url_probe import FOUND, MISSING, default_timeouts, probe_first, reprobe_inconclusive
+
+CSV_FIELDS = [
+    'id', 'title', 'artist', 'year', 'period',
+    'museum', 'location', 'imageName', 'wikiart_url', 'wikiart_status'
+]
+
+@traced
+def probe_wikiart(artist, title, year):
+    """Probe WikiArt URL patterns; return (found/missing/inconclusive, url)."""
+    # Ranked slug variants, year-suffixed form first (see slugs.py)
+    return probe_first(wikiart_candidates(artist, title, year))
 
+@traced
 def find_wikiart_url(artist, title, year):
     """Find WikiArt URL for a painting by trying common patterns."""
-    artist_slug = slugify(artist)
-    title_slug = slugify(title)
-
-    # Try various URL patterns that WikiArt uses
-    patterns = [
-        # Without year
-        f"https://www.wikiart.org/en/{artist_slug}/{title_slug}",
-        # With year at end
-        f"https://www.wikiart.org/en/{artist_slug}/{title_slug}-{year}",
-        # With "the-" prefix
-        f"https://www.wikiart.org/en/{artist_slug}/the-{title_slug}",
-        f"https://www.wikiart.org/en/{artist_slug}/the-{title_slug}-{year}",
-    ]
-
-    for url in patterns:
-        if try_wikiart_url(url):
-            return url
-
-    return None
-
-def main():
+    return probe_wikiart(artist, title, year)[1]
+
+def probe_painting(painting, reprobe=False):
+    """probe_wikiart() for one painting, as the root span of its trace."""
+    with trace('probe_painting', painting['id'], title=painting['title'], artist=painting['artist'],
+               reprobe=reprobe) as root:
+        outcome, url = probe_wikiart(painting['artist'], painting['title'], painting['year'])
+        root.set(outcome=outcome)
+        return outcome, url
+
+def csv_row(painting, outcome, url):
+    """CSV row for a painting and its probe result."""
+    return {
+        'id': painting['id'],
+        'title': painting['title'],
+        'artist': painting['artist'],
+        'year': painting['year'],
+        'period': painting['period'],
+        'museum': painting['museum'],
+        'location': painting['location'],
+        'imageName': painting.get('imageName', ''),
+        'wikiart_url': url if url else '',
+        'wikiart_status': outcome,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Find WikiArt URLs for all paintings by probing URL patterns.')
+    parser.add_argument('--rounds', type=int, default=2, help='re-probe rounds for inconclusive results')
+    parser.add_argument('--retry-delay', type=float, default=5.0, help='seconds before the first re-probe round')
+    add_profile_argument(parser)
+    add_trace_arguments(parser)
+    args = parser.parse_args(argv)
+    profiler = create_profiler('find_wikiart_urls', args.profile)
+    tracer = create_tracer('find_wikiart_urls', args.trace, args.trace_sample, args.trace_format)
+
     # Read all paintings
+    profiler.begin('load_paintings')
     periods_dir = Path('paintings_ios/Resources/Data/Periods')
     all_paintings = []
 
@@ -72,64 +82,75 @@ def main():
     print("\nSearching WikiArt for URLs...")
     print("This will take a while as we try multiple URL patterns for each painting.\n")
 
-    # Create CSV with results
+    # Probe every painting, writing each row as it comes in so an interrupted
+    # run keeps what it found; then retry the inconclusive ones
+    profiler.begin('probe')
     output_file = 'paintings_wikiart_urls.csv'
+    results = {}
+    by_id = {painting['id']: painting for painting in all_paintings}
 
     with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
-        fieldnames = [
-            'id', 'title', 'artist', 'year', 'period',
-            'museum', 'location', 'imageName', 'wikiart_url'
-        ]
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        writer = csv.DictWriter(csvfile, fieldnames=CSV_FIELDS)
         writer.writeheader()
 
-        found_count = 0
-        not_found_count = 0
-
         for i, painting in enumerate(all_paintings, 1):
             print(f"[{i}/{len(all_paintings)}] {painting['title']} by {painting['artist']}")
 
-            url = find_wikiart_url(painting['artist'], painting['title'], painting['year'])
+            outcome, url = results[painting['id']] = probe_painting(painting)
+            writer.writerow(csv_row(painting, outcome, url))
+            csvfile.flush()
 
             if url:
                 print(f"  ✅ {url}")
-                found_count += 1
-            else:
+            elif outcome == MISSING:
                 print(f"  ❌ Not found on WikiArt")
-                not_found_count += 1
-
-            row = {
-                'id': painting['id'],
-                'title': painting['title'],
-                'artist': painting['artist'],
-                'year': painting['year'],
-                'period': painting['period'],
-                'museum': painting['museum'],
-                'location': painting['location'],
-                'imageName': painting.get('imageName', ''),
-                'wikiart_url': url if url else ''
-            }
-
-            writer.writerow(row)
+            else:
+                print(f"  ❔ Inconclusive (timeout or server error)")
 
             # Be nice to WikiArt's servers - small delay
             time.sleep(0.3)
 
             # Progress update every 25 paintings
             if i % 25 == 0:
+                found_count = sum(1 for o, _ in results.values() if o == FOUND)
                 print(f"\n{'='*70}")
                 print(f"Progress: {i}/{len(all_paintings)} processed")
                 print(f"Found: {found_count} ({found_count/i*100:.1f}%)")
-                print(f"Not found: {not_found_count}")
+                print(f"Not found: {i - found_count}")
                 print(f"{'='*70}\n")
 
+    def reprobe(painting_id):
+        return probe_painting(by_id[painting_id], reprobe=True)
+
+    before = dict(results)
+    reprobe_inconclusive(results, reprobe, args.rounds, args.retry_delay, sleep=time.sleep)
+    default_timeouts().save()
+
+    # Rewrite the CSV only if a re-probe changed something
+    if results != before:
+        profiler.begin('write_csv')
+        with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=CSV_FIELDS)
+            writer.writeheader()
+            for painting in all_paintings:
+                writer.writerow(csv_row(painting, *results[painting['id']]))
+
+    found_count = sum(1 for outcome, _ in results.values() if outcome == FOUND)
+    not_found_count = sum(1 for outcome, _ in results.values() if outcome == MISSING)
+    inconclusive_count = len(results) - found_count - not_found_count
+
     print(f"\n{'='*70}")
     print(f"FINAL RESULTS")
     print(f"{'='*70}")
     print(f"✅ CSV file created: {output_file}")
     print(f"Found: {found_count}/{len(all_paintings)} ({found_count/len(all_paintings)*100:.1f}%)")
     print(f"Not found: {not_found_count}/{len(all_paintings)}")
+    print(f"Inconclusive: {inconclusive_count}/{len(all_paintings)}")
+    print_fetch_stats()
+    tracer.finish()
     print(f"{'='*70}")
 
+    profiler.finish()
+
 if __name__ == '__main__':
     main()
@@ -1,122 +1,153 @@
 #!/usr/bin/env python3
 """
-Find actual WikiArt URLs for paintings - faster version with shorter timeouts.
+Find actual WikiArt URLs for paintings - faster version with short, per-host
+adaptive timeouts (see url_probe.py).
+
+Each painting ends up found, missing (every pattern 404'd) or inconclusive
+(timeouts, resets, 429/5xx). Inconclusive ones are re-probed at the end of
+the run, and again on a later run with --reprobe; the outcome is kept in
+the wikiart_status column so the fallbacks only handle confirmed misses.
+
+With --trace FILE, each painting's probes are recorded as one trace
+(see tracing.py).
 """
 
+import argparse
 import json
 import csv
 import time
-import urllib.request
-import urllib.error
-import re
 import sys
 from pathlib import Path
 
-def slugify(text):
-    """Convert text to WikiArt-compatible URL slug."""
-    text = text.lower()
-    # Remove content in parentheses
-    text = re.sub(r'\([^)]*\)', '', text)
-    # Remove special characters except spaces and hyphens
-    text = re.sub(r'[^\w\s-]', '', text)
-    # Replace spaces and underscores with hyphens
-    text = re.sub(r'[\s_]+', '-', text)
-    # Remove multiple hyphens
-    text = re.sub(r'-+', '-', text)
-    return text.strip('-')
-
-def try_url(url):
-    """Try URL with short timeout."""
-    try:
-        req = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0'}, method='HEAD')
-        with urllib.request.urlopen(req, timeout=2) as response:
-            return response.status == 200
-    except (urllib.error.URLError, urllib.error.HTTPError, TimeoutError):
-        return False
-    except:
-        return False
-
-def find_wikiart_url(artist, title, year):
-    """Find WikiArt URL by trying common patterns."""
-    artist_slug = slugify(artist)
-    title_slug = slugify(title)
+from fetch import print_fetch_stats
+from profiling import add_profile_argument, create_profiler
+from slugs import wikiart_candidates
+from tracing import add_trace_arguments, create_tracer, trace, traced
+from url_probe import FOUND, INCONCLUSIVE, MISSING, default_timeouts, probe_first, reprobe_inconclusive
 
-    # Try common URL patterns
-    patterns = [
-        f"https://www.wikiart.org/en/{artist_slug}/{title_slug}",
-        f"https://www.wikiart.org/en/{artist_slug}/{title_slug}-{year}",
-        f"https://www.wikiart.org/en/{artist_slug}/the-{title_slug}",
-        f"https://www.wikiart.org/en/{artist_slug}/the-{title_slug}-{year}",
-    ]
+CSV_FIELDS = [
+    'id', 'title', 'artist', 'year', 'period',
+    'museum', 'location', 'imageName', 'wikiart_url', 'wikiart_status'
+]
 
-    for url in patterns:
-        if try_url(url):
-            return url
+@traced
+def probe_wikiart(artist, title, year):
+    """Probe common URL patterns; return (found/missing/inconclusive, url)."""
+    # Ranked slug variants, year-suffixed form first (see slugs.py)
+    return probe_first(wikiart_candidates(artist, title, year))
 
-    return None
+@traced
+def find_wikiart_url(artist, title, year):
+    """Find WikiArt URL by trying common patterns."""
+    return probe_wikiart(artist, title, year)[1]
+
+def probe_painting(painting, reprobe=False):
+    """probe_wikiart() for one painting, as the root span of its trace."""
+    with trace('probe_painting', painting['id'], title=painting['title'], artist=painting['artist'],
+               reprobe=reprobe) as root:
+        outcome, url = probe_wikiart(painting['artist'], painting['title'], painting['year'])
+        root.set(outcome=outcome)
+        return outcome, url
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Find WikiArt URLs for all paintings with short probe timeouts.')
+    parser.add_argument('--reprobe', action='store_true',
+                        help='only re-probe paintings marked inconclusive in the existing CSV')
+    parser.add_argument('--rounds', type=int, default=2, help='re-probe rounds for inconclusive results')
+    parser.add_argument('--retry-delay', type=float, default=5.0, help='seconds before the first re-probe round')
+    add_profile_argument(parser)
+    add_trace_arguments(parser)
+    args = parser.parse_args(argv)
+    profiler = create_profiler('find_wikiart_urls_fast', args.profile)
+    tracer = create_tracer('find_wikiart_urls_fast', args.trace, args.trace_sample, args.trace_format)
+    output_file = 'paintings_wikiart_urls.csv'
 
-def main():
     # Read all paintings
-    periods_dir = Path('paintings_ios/Resources/Data/Periods')
-    all_paintings = []
-
-    print("Loading paintings...", flush=True)
-    for json_file in sorted(periods_dir.glob('*.json')):
-        with open(json_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            all_paintings.extend(data['paintings'])
-
-    print(f"Total paintings: {len(all_paintings)}\n", flush=True)
+    profiler.begin('load_paintings')
+    if args.reprobe:
+        with open(output_file, 'r', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            fieldnames = list(reader.fieldnames)
+            rows = list(reader)
+        if 'wikiart_status' not in fieldnames:
+            fieldnames.append('wikiart_status')
+        todo = [row for row in rows if row.get('wikiart_status') == INCONCLUSIVE]
+        print(f"Re-probing {len(todo)} inconclusive of {len(rows)} paintings\n", flush=True)
+    else:
+        periods_dir = Path('paintings_ios/Resources/Data/Periods')
+        fieldnames = CSV_FIELDS
+        rows = []
+
+        print("Loading paintings...", flush=True)
+        for json_file in sorted(periods_dir.glob('*.json')):
+            with open(json_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+                for painting in data['paintings']:
+                    rows.append({
+                        'id': painting['id'],
+                        'title': painting['title'],
+                        'artist': painting['artist'],
+                        'year': painting['year'],
+                        'period': painting['period'],
+                        'museum': painting['museum'],
+                        'location': painting['location'],
+                        'imageName': painting.get('imageName', ''),
+                    })
+        todo = rows
+
+        print(f"Total paintings: {len(rows)}\n", flush=True)
     print("Searching WikiArt...\n", flush=True)
 
-    # Create CSV with results
-    output_file = 'paintings_wikiart_urls.csv'
+    profiler.begin('probe')
+    results = {}
+    by_id = {row['id']: row for row in todo}
+    marks = {FOUND: '✅', MISSING: '❌', INCONCLUSIVE: '❔'}
 
-    with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
-        fieldnames = [
-            'id', 'title', 'artist', 'year', 'period',
-            'museum', 'location', 'imageName', 'wikiart_url'
-        ]
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
+    for i, row in enumerate(todo, 1):
+        title = row['title'][:50]  # Truncate for display
+        print(f"[{i}/{len(todo)}] {title}...", end=' ', flush=True)
 
-        found_count = 0
+        results[row['id']] = probe_painting(row)
+        print(marks[results[row['id']][0]], flush=True)
 
-        for i, painting in enumerate(all_paintings, 1):
-            title = painting['title'][:50]  # Truncate for display
-            print(f"[{i}/{len(all_paintings)}] {title}...", end=' ', flush=True)
+        # Smaller delay
+        time.sleep(0.1)
 
-            url = find_wikiart_url(painting['artist'], painting['title'], painting['year'])
+        # Progress updates
+        if i % 50 == 0:
+            found = sum(1 for outcome, _ in results.values() if outcome == FOUND)
+            print(f"\nProgress: {i}/{len(todo)} | Found: {found} ({found/i*100:.1f}%)\n", flush=True)
 
-            if url:
-                print(f"✅", flush=True)
-                found_count += 1
-            else:
-                print(f"❌", flush=True)
+    def reprobe(painting_id):
+        return probe_painting(by_id[painting_id], reprobe=True)
 
-            writer.writerow({
-                'id': painting['id'],
-                'title': painting['title'],
-                'artist': painting['artist'],
-                'year': painting['year'],
-                'period': painting['period'],
-                'museum': painting['museum'],
-                'location': painting['location'],
-                'imageName': painting.get('imageName', ''),
-                'wikiart_url': url or ''
-            })
+    reprobe_inconclusive(results, reprobe, args.rounds, args.retry_delay, sleep=time.sleep)
+    default_timeouts().save()
 
-            # Smaller delay
-            time.sleep(0.1)
+    profiler.begin('write_csv')
+    for painting_id, (outcome, url) in results.items():
+        by_id[painting_id]['wikiart_url'] = url or ''
+        by_id[painting_id]['wikiart_status'] = outcome
 
-            # Progress updates
-            if i % 50 == 0:
-                print(f"\nProgress: {i}/{len(all_paintings)} | Found: {found_count} ({found_count/i*100:.1f}%)\n", flush=True)
+    with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+
+    counts = {outcome: 0 for outcome in marks}
+    for outcome, _ in results.values():
+        counts[outcome] += 1
 
     print(f"\n{'='*70}")
-    print(f"✅ Done! CSV created: {output_file}")
-    print(f"Found: {found_count}/{len(all_paintings)} ({found_count/len(all_paintings)*100:.1f}%)")
+    print(f"✅ Done! CSV {'updated' if args.reprobe else 'created'}: {output_file}")
+    print(f"Found: {counts[FOUND]}/{len(todo)} ({counts[FOUND]/max(len(todo), 1)*100:.1f}%)")
+    print(f"Confirmed missing: {counts[MISSING]}, inconclusive: {counts[INCONCLUSIVE]}"
+          f"{' (rerun with --reprobe)' if counts[INCONCLUSIVE] else ''}")
+    print_fetch_stats()
+    tracer.finish()
     print(f"{'='*70}")
 
+    profiler.finish()
+
 if __name__ == '__main__':
     main()
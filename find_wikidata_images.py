@@ -1,16 +1,30 @@
 #!/usr/bin/env python3
 """
 Find images from Wikidata for paintings without WikiArt URLs.
+
+With --trace FILE, each painting's searches and requests are recorded as
+one trace (see tracing.py).
 """
 
-import csv
-import json
-import urllib.request
+import argparse
+import re
 import urllib.parse
 import time
 
-def search_wikidata(title, artist):
-    """Search Wikidata for a painting and return image URL."""
+from candidate_scoring import THRESHOLD, rank_candidates, score_candidate
+from catalog_journal import Journal, iter_csv_view
+from fetch import fetch_json, print_fetch_stats
+from image_renditions import TARGET_WIDTH
+from profiling import add_profile_argument, create_profiler
+from stream_transform import count_csv, transform_csv
+from tracing import add_trace_arguments, create_tracer, trace, traced
+
+# Wikidata time values look like "+1889-00-00T00:00:00Z"
+INCEPTION_YEAR = re.compile(r'([+-]?\d+)-')
+
+@traced
+def search_wikidata(title, artist, year=None):
+    """Search Wikidata for a painting and return the image URL of the best verified match."""
     try:
         # Build search query
         search_query = f"{title} {artist}"
@@ -19,107 +33,143 @@ def search_wikidata(title, artist):
         # Search Wikidata using wbsearchentities API
         search_url = f"https://www.wikidata.org/w/api.php?action=wbsearchentities&search={encoded_query}&language=en&limit=5&format=json"
 
-        req = urllib.request.Request(search_url, headers={'User-Agent': 'Mozilla/5.0'})
-        with urllib.request.urlopen(req, timeout=10) as response:
-            data = json.loads(response.read().decode('utf-8'))
-
-            if 'search' not in data or len(data['search']) == 0:
-                return None
-
-            # Try each search result
-            for result in data['search']:
-                entity_id = result['id']
-
-                # Get entity data including image (P18)
-                entity_url = f"https://www.wikidata.org/w/api.php?action=wbgetentities&ids={entity_id}&props=claims&format=json"
+        data = fetch_json(search_url)
 
-                req2 = urllib.request.Request(entity_url, headers={'User-Agent': 'Mozilla/5.0'})
-                with urllib.request.urlopen(req2, timeout=10) as response2:
-                    entity_data = json.loads(response2.read().decode('utf-8'))
-
-                    if 'entities' not in entity_data:
-                        continue
-
-                    entity = entity_data['entities'].get(entity_id, {})
-                    claims = entity.get('claims', {})
-
-                    # Check for image property (P18)
-                    if 'P18' in claims and len(claims['P18']) > 0:
-                        # Get image filename
-                        image_filename = claims['P18'][0]['mainsnak']['datavalue']['value']
-
-                        # Construct Wikimedia Commons URL
-                        # Need to get actual file URL from Commons API
-                        image_url = get_commons_image_url(image_filename)
-                        if image_url:
-                            return image_url
+        if 'search' not in data or len(data['search']) == 0:
+            return None
 
-                    # Also try checking for Wikimedia Commons category (P373)
-                    # or Commons gallery (P935) as fallback
+        # One request for every hit's claims, one more for their creators' names
+        entity_ids = [result['id'] for result in data['search']]
+        entities = get_entities(entity_ids, 'claims|labels')
+        creator_ids = {claim_value(entity, 'P170', {}).get('id') for entity in entities.values()} - {None}
+        creators = get_entities(sorted(creator_ids), 'labels') if creator_ids else {}
+
+        # Only hits with an image (P18) are candidates
+        candidates = []
+        for entity_id in entity_ids:
+            entity = entities.get(entity_id, {})
+            image_filename = claim_value(entity, 'P18')
+            if not image_filename:
+                continue
+            inception = INCEPTION_YEAR.match(claim_value(entity, 'P571', {}).get('time', ''))
+            candidates.append({
+                'title': label(entity),
+                'creator': label(creators.get(claim_value(entity, 'P170', {}).get('id'), {})),
+                'year': inception.group(1) if inception else None,
+                'file': image_filename,
+            })
+
+        # Best verified candidate first; its image's proportions are checked last
+        painting = {'title': title, 'artist': artist, 'year': year}
+        for _, candidate in rank_candidates(painting, candidates):
+            info = get_commons_image_info(candidate['file'])
+            if not info:
+                continue
+            candidate['width'], candidate['height'] = info['width'], info['height']
+            if score_candidate(painting, candidate)[0] >= THRESHOLD:
+                return info['url']
 
-            return None
+        return None
 
     except Exception as e:
         print(f"    Error: {e}")
         return None
 
-def get_commons_image_url(filename):
-    """Get the actual image URL from Wikimedia Commons."""
+def get_entities(entity_ids, props):
+    """Fetch several Wikidata entities (at most 50) in one request."""
+    ids = urllib.parse.quote('|'.join(entity_ids))
+    entity_url = f"https://www.wikidata.org/w/api.php?action=wbgetentities&ids={ids}&props={props}&languages=en&format=json"
+    return fetch_json(entity_url).get('entities', {})
+
+def claim_value(entity, prop, default=None):
+    """Value of an entity's first claim for prop, or default."""
+    for claim in entity.get('claims', {}).get(prop, []):
+        return claim.get('mainsnak', {}).get('datavalue', {}).get('value', default)
+    return default
+
+def label(entity):
+    return entity.get('labels', {}).get('en', {}).get('value')
+
+@traced
+def get_commons_image_info(filename, width=TARGET_WIDTH):
+    """
+    Get {'url', 'width', 'height'} for a Wikimedia Commons image, with the
+    URL scaled to width when Commons can.
+    """
     try:
         encoded_filename = urllib.parse.quote(f"File:{filename}")
-        api_url = f"https://commons.wikimedia.org/w/api.php?action=query&titles={encoded_filename}&prop=imageinfo&iiprop=url&format=json"
+        api_url = f"https://commons.wikimedia.org/w/api.php?action=query&titles={encoded_filename}&prop=imageinfo&iiprop=url|size&iiurlwidth={width}&format=json"
 
-        req = urllib.request.Request(api_url, headers={'User-Agent': 'Mozilla/5.0'})
-        with urllib.request.urlopen(req, timeout=10) as response:
-            data = json.loads(response.read().decode('utf-8'))
+        data = fetch_json(api_url)
 
-            pages = data.get('query', {}).get('pages', {})
-            for page_id, page_data in pages.items():
-                if 'imageinfo' in page_data and len(page_data['imageinfo']) > 0:
-                    return page_data['imageinfo'][0]['url']
+        pages = data.get('query', {}).get('pages', {})
+        for page_id, page_data in pages.items():
+            if 'imageinfo' in page_data and len(page_data['imageinfo']) > 0:
+                # thumburl is the original itself when that is already small enough
+                info = page_data['imageinfo'][0]
+                return {'url': info.get('thumburl') or info['url'],
+                        'width': info.get('width'), 'height': info.get('height')}
 
-            return None
+        return None
 
     except Exception as e:
         print(f"    Error getting Commons URL: {e}")
         return None
 
-def main():
-    # Read CSV
-    csv_file = 'paintings_wikiart_urls.csv'
-    rows = []
+@traced
+def get_commons_image_url(filename, width=TARGET_WIDTH):
+    """Get a Wikimedia Commons image URL, scaled to width when Commons can."""
+    info = get_commons_image_info(filename, width)
+    return info['url'] if info else None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Find images on Wikidata for paintings without WikiArt URLs.')
+    parser.add_argument('--journal', action='store_true',
+                        help='record found URLs in the catalog journal instead of rewriting the CSV')
+    add_profile_argument(parser)
+    add_trace_arguments(parser)
+    args = parser.parse_args(argv)
+    profiler = create_profiler('find_wikidata_images', args.profile)
+    tracer = create_tracer('find_wikidata_images', args.trace, args.trace_sample, args.trace_format)
 
-    print("Reading CSV...")
-    with open(csv_file, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        fieldnames = reader.fieldnames
-        for row in reader:
-            rows.append(row)
-
-    # Add wikipedia_url column if not exists
-    if 'wikipedia_url' not in fieldnames:
-        fieldnames = list(fieldnames) + ['wikipedia_url']
-        for row in rows:
-            if 'wikipedia_url' not in row:
-                row['wikipedia_url'] = ''
+    csv_file = 'paintings_wikiart_urls.csv'
 
     # Find paintings without WikiArt URLs
-    paintings_without_urls = [row for row in rows if not row.get('wikiart_url', '').strip()]
+    # Inconclusive WikiArt probes are retried with find_wikiart_urls_fast.py --reprobe, not here
+    def needs_search(row):
+        return not row.get('wikiart_url', '').strip() and row.get('wikiart_status') != 'inconclusive'
+
+    profiler.begin('read_csv')
+    print("Reading CSV...")
+    if args.journal:
+        # Read through the journal, so URLs found by a run not yet compacted count
+        total = sum(1 for row in iter_csv_view(csv_file) if needs_search(row))
+    else:
+        total = count_csv(csv_file, needs_search)
 
-    print(f"Found {len(paintings_without_urls)} paintings without WikiArt URLs")
+    print(f"Found {total} paintings without WikiArt URLs")
     print(f"Searching Wikidata for images...\n")
 
+    profiler.begin('search')
     found_count = 0
     not_found_count = 0
+    i = 0
+
+    # Rows stream from the CSV through the search into a temp copy that
+    # replaces the CSV once every row is written
+    def search_row(row):
+        nonlocal i, found_count, not_found_count
+        if not needs_search(row):
+            return row
+        i += 1
 
-    for i, row in enumerate(paintings_without_urls, 1):
         title = row['title']
         artist = row['artist']
 
-        print(f"[{i}/{len(paintings_without_urls)}] {title} by {artist}")
+        print(f"[{i}/{total}] {title} by {artist}")
 
         # Search Wikidata
-        image_url = search_wikidata(title, artist)
+        image_url = search_wikidata(title, artist, row.get('year'))
 
         if image_url:
             print(f"  ✅ {image_url[:80]}...")
@@ -134,24 +184,44 @@ def main():
         # Progress update every 25 paintings
         if i % 25 == 0:
             print(f"\n{'='*70}")
-            print(f"Progress: {i}/{len(paintings_without_urls)}")
+            print(f"Progress: {i}/{total}")
             print(f"Found: {found_count} ({found_count/i*100:.1f}%)")
             print(f"Not found: {not_found_count}")
             print(f"{'='*70}\n")
 
-    # Write updated CSV
-    with open(csv_file, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(rows)
+        return row
+
+    def traced_search_row(row):
+        """search_row() as the root span of the painting's trace."""
+        if not needs_search(row):
+            return row
+        with trace('search_painting', row['id'], title=row['title'], artist=row['artist']):
+            return search_row(row)
+
+    if args.journal:
+        with Journal('find_wikidata_images') as journal:
+            for row in iter_csv_view(csv_file):
+                old_url = row.get('wikipedia_url', '')
+                row = traced_search_row(row)
+                journal.record(row['id'], 'wikipedia_url', row.get('wikipedia_url', ''), old_url)
+    else:
+        # Adds the wikipedia_url column if it doesn't exist yet
+        transform_csv(csv_file, [traced_search_row], add_columns=['wikipedia_url'])
 
     print(f"\n{'='*70}")
     print(f"FINAL RESULTS")
     print(f"{'='*70}")
-    print(f"✅ CSV updated: {csv_file}")
-    print(f"Found images: {found_count}/{len(paintings_without_urls)} ({found_count/len(paintings_without_urls)*100:.1f}%)")
-    print(f"Not found: {not_found_count}/{len(paintings_without_urls)}")
+    if args.journal:
+        print(f"✅ Journaled {journal.stats['entries']} changes (run catalog_journal.py compact to fold them in)")
+    else:
+        print(f"✅ CSV updated: {csv_file}")
+    print(f"Found images: {found_count}/{total} ({found_count/total*100:.1f}%)")
+    print(f"Not found: {not_found_count}/{total}")
+    print_fetch_stats()
+    tracer.finish()
     print(f"{'='*70}")
 
+    profiler.finish()
+
 if __name__ == '__main__':
     main()
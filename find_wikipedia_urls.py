@@ -1,116 +1,159 @@
 #!/usr/bin/env python3
 """
 Find Wikipedia image URLs for paintings without WikiArt URLs.
+
+With --trace FILE, each painting's searches and requests are recorded as
+one trace (see tracing.py).
 """
 
-import csv
-import json
-import urllib.request
+import argparse
 import urllib.parse
 import time
 import re
 from pathlib import Path
 
-def search_wikipedia(painting_title, artist):
-    """Search Wikipedia for a painting and return the page title."""
+from candidate_scoring import rank_candidates
+from catalog_journal import Journal, iter_csv_view
+from fetch import fetch_json, print_fetch_stats
+from image_renditions import TARGET_WIDTH
+from profiling import add_profile_argument, create_profiler
+from stream_transform import count_csv, transform_csv
+from tracing import add_trace_arguments, create_tracer, trace, traced
+
+DISAMBIGUATED = re.compile(r'^(.*?)\s*\(([^)]*)\)$')
+GENERIC_NOTE = re.compile(r'\b(?:paintings?|series|artwork|picture|mural|fresco|triptych)\b', re.IGNORECASE)
+
+def page_candidate(page_title, painting_title=''):
+    """
+    Turn a Wikipedia page title into a scoring candidate. A disambiguation
+    note names the creator or year: "Water Lilies (Monet series)",
+    "The Scream (1893 painting)", unless the painting's own title has it.
+    """
+    match = DISAMBIGUATED.match(page_title)
+    if not match or match.group(2).lower() in painting_title.lower():
+        return {'title': page_title, 'page': page_title}
+    title, note = match.groups()
+    candidate = {'title': title, 'page': page_title}
+    note = GENERIC_NOTE.sub('', note).strip(' ,')
+    if re.fullmatch(r'\d{3,4}', note):
+        candidate['year'] = note
+    elif note:
+        candidate['creator'] = note
+    return candidate
+
+@traced
+def search_wikipedia(painting_title, artist, year=None):
+    """Search Wikipedia for a painting and return the title of the best verified page."""
     try:
         # Search Wikipedia
         search_query = f"{painting_title} {artist}"
         encoded_query = urllib.parse.quote(search_query)
         search_url = f"https://en.wikipedia.org/w/api.php?action=opensearch&search={encoded_query}&limit=5&format=json"
 
-        req = urllib.request.Request(search_url, headers={'User-Agent': 'Mozilla/5.0'})
-        with urllib.request.urlopen(req, timeout=10) as response:
-            data = json.loads(response.read().decode('utf-8'))
+        data = fetch_json(search_url)
 
-            # data format: [query, [titles], [descriptions], [urls]]
-            if len(data) > 3 and len(data[1]) > 0:
-                # Return first result title
-                return data[1][0]
+        # data format: [query, [titles], [descriptions], [urls]]
+        if len(data) > 3 and len(data[1]) > 0:
+            # The first result is often the artist's biography or a namesake
+            painting = {'title': painting_title, 'artist': artist, 'year': year}
+            ranked = rank_candidates(painting, [page_candidate(title, painting_title) for title in data[1]])
+            if ranked:
+                return ranked[0][1]['page']
 
     except Exception as e:
         print(f"    Error searching Wikipedia: {e}")
 
     return None
 
+@traced
 def get_wikipedia_image_url(page_title):
     """Get the main image URL from a Wikipedia page."""
     try:
         # Get page info including images
         encoded_title = urllib.parse.quote(page_title)
-        api_url = f"https://en.wikipedia.org/w/api.php?action=query&titles={encoded_title}&prop=pageimages|images&format=json&pithumbsize=1000"
-
-        req = urllib.request.Request(api_url, headers={'User-Agent': 'Mozilla/5.0'})
-        with urllib.request.urlopen(req, timeout=10) as response:
-            data = json.loads(response.read().decode('utf-8'))
-
-            pages = data.get('query', {}).get('pages', {})
-            for page_id, page_data in pages.items():
-                # Try to get the main thumbnail
-                if 'thumbnail' in page_data:
-                    return page_data['thumbnail']['source']
-
-                # Try to get images list and fetch the first one
-                if 'images' in page_data and len(page_data['images']) > 0:
-                    # Get first image filename
-                    first_image = page_data['images'][0]['title']
-
-                    # Get image URL
-                    image_api_url = f"https://en.wikipedia.org/w/api.php?action=query&titles={urllib.parse.quote(first_image)}&prop=imageinfo&iiprop=url&format=json"
-                    req2 = urllib.request.Request(image_api_url, headers={'User-Agent': 'Mozilla/5.0'})
-                    with urllib.request.urlopen(req2, timeout=10) as response2:
-                        img_data = json.loads(response2.read().decode('utf-8'))
-                        img_pages = img_data.get('query', {}).get('pages', {})
-                        for img_page_id, img_page_data in img_pages.items():
-                            if 'imageinfo' in img_page_data and len(img_page_data['imageinfo']) > 0:
-                                return img_page_data['imageinfo'][0]['url']
+        api_url = f"https://en.wikipedia.org/w/api.php?action=query&titles={encoded_title}&prop=pageimages|images&format=json&pithumbsize={TARGET_WIDTH}"
+
+        data = fetch_json(api_url)
+
+        pages = data.get('query', {}).get('pages', {})
+        for page_id, page_data in pages.items():
+            # Try to get the main thumbnail
+            if 'thumbnail' in page_data:
+                return page_data['thumbnail']['source']
+
+            # Try to get images list and fetch the first one
+            if 'images' in page_data and len(page_data['images']) > 0:
+                # Get first image filename
+                first_image = page_data['images'][0]['title']
+
+                # Get image URL
+                image_api_url = f"https://en.wikipedia.org/w/api.php?action=query&titles={urllib.parse.quote(first_image)}&prop=imageinfo&iiprop=url&iiurlwidth={TARGET_WIDTH}&format=json"
+                img_data = fetch_json(image_api_url)
+                img_pages = img_data.get('query', {}).get('pages', {})
+                for img_page_id, img_page_data in img_pages.items():
+                    if 'imageinfo' in img_page_data and len(img_page_data['imageinfo']) > 0:
+                        info = img_page_data['imageinfo'][0]
+                        return info.get('thumburl') or info['url']
 
     except Exception as e:
         print(f"    Error getting Wikipedia image: {e}")
 
     return None
 
-def main():
-    # Read CSV
-    csv_file = 'paintings_wikiart_urls.csv'
-    rows = []
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Find Wikipedia image URLs for paintings without WikiArt URLs.')
+    parser.add_argument('--journal', action='store_true',
+                        help='record found URLs in the catalog journal instead of rewriting the CSV')
+    add_profile_argument(parser)
+    add_trace_arguments(parser)
+    args = parser.parse_args(argv)
+    profiler = create_profiler('find_wikipedia_urls', args.profile)
+    tracer = create_tracer('find_wikipedia_urls', args.trace, args.trace_sample, args.trace_format)
 
-    print("Reading CSV...")
-    with open(csv_file, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        fieldnames = reader.fieldnames
-        for row in reader:
-            rows.append(row)
-
-    # Add wikipedia_url column if not exists
-    if 'wikipedia_url' not in fieldnames:
-        fieldnames = list(fieldnames) + ['wikipedia_url']
-        for row in rows:
-            row['wikipedia_url'] = ''
+    csv_file = 'paintings_wikiart_urls.csv'
 
     # Find paintings without WikiArt URLs
-    paintings_without_urls = [row for row in rows if not row.get('wikiart_url', '').strip()]
+    # Inconclusive WikiArt probes are retried with find_wikiart_urls_fast.py --reprobe, not here
+    def needs_search(row):
+        return not row.get('wikiart_url', '').strip() and row.get('wikiart_status') != 'inconclusive'
 
-    print(f"Found {len(paintings_without_urls)} paintings without WikiArt URLs")
+    profiler.begin('read_csv')
+    print("Reading CSV...")
+    if args.journal:
+        # Read through the journal, so URLs found by a run not yet compacted count
+        total = sum(1 for row in iter_csv_view(csv_file) if needs_search(row))
+    else:
+        total = count_csv(csv_file, needs_search)
+
+    print(f"Found {total} paintings without WikiArt URLs")
     print(f"Searching Wikipedia for images...\n")
 
+    profiler.begin('search')
     found_count = 0
     not_found_count = 0
+    i = 0
+
+    # Rows stream from the CSV through the search into a temp copy that
+    # replaces the CSV once every row is written
+    def search_row(row):
+        nonlocal i, found_count, not_found_count
+        if not needs_search(row):
+            return row
+        i += 1
 
-    for i, row in enumerate(paintings_without_urls, 1):
         title = row['title']
         artist = row['artist']
 
-        print(f"[{i}/{len(paintings_without_urls)}] {title} by {artist}")
+        print(f"[{i}/{total}] {title} by {artist}")
 
         # Search Wikipedia
-        wiki_page = search_wikipedia(title, artist)
+        wiki_page = search_wikipedia(title, artist, row.get('year'))
 
         if not wiki_page:
             print(f"  ❌ Not found on Wikipedia")
             not_found_count += 1
             time.sleep(0.5)
-            continue
+            return row
 
         print(f"  🔍 Found page: {wiki_page}")
 
@@ -130,24 +173,44 @@ def main():
         # Progress update every 25 paintings
         if i % 25 == 0:
             print(f"\n{'='*70}")
-            print(f"Progress: {i}/{len(paintings_without_urls)}")
+            print(f"Progress: {i}/{total}")
             print(f"Found: {found_count}, Not found: {not_found_count}")
             print(f"{'='*70}\n")
 
-    # Write updated CSV
-    with open(csv_file, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(rows)
+        return row
+
+    def traced_search_row(row):
+        """search_row() as the root span of the painting's trace."""
+        if not needs_search(row):
+            return row
+        with trace('search_painting', row['id'], title=row['title'], artist=row['artist']):
+            return search_row(row)
+
+    if args.journal:
+        with Journal('find_wikipedia_urls') as journal:
+            for row in iter_csv_view(csv_file):
+                old_url = row.get('wikipedia_url', '')
+                row = traced_search_row(row)
+                journal.record(row['id'], 'wikipedia_url', row.get('wikipedia_url', ''), old_url)
+    else:
+        # Adds the wikipedia_url column if it doesn't exist yet
+        transform_csv(csv_file, [traced_search_row], add_columns=['wikipedia_url'])
 
     print(f"\n{'='*70}")
     print(f"FINAL RESULTS")
     print(f"{'='*70}")
-    print(f"✅ CSV updated: {csv_file}")
-    print(f"Found Wikipedia images: {found_count}/{len(paintings_without_urls)}")
-    print(f"Not found: {not_found_count}/{len(paintings_without_urls)}")
-    print(f"Success rate: {found_count/len(paintings_without_urls)*100:.1f}%")
+    if args.journal:
+        print(f"✅ Journaled {journal.stats['entries']} changes (run catalog_journal.py compact to fold them in)")
+    else:
+        print(f"✅ CSV updated: {csv_file}")
+    print(f"Found Wikipedia images: {found_count}/{total}")
+    print(f"Not found: {not_found_count}/{total}")
+    print(f"Success rate: {found_count/total*100:.1f}%")
+    print_fetch_stats()
+    tracer.finish()
     print(f"{'='*70}")
 
+    profiler.finish()
+
 if __name__ == '__main__':
     main()
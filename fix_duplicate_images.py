@@ -2,30 +2,27 @@
 """
 Fix duplicate image filenames by including year in filename.
 Re-download the affected paintings and update JSON files.
+
+Superseded by allocate_filenames.py, which assigns collision-free names
+before download_wikiart_images.py fetches anything. Only needed to repair
+image folders downloaded before the allocator existed.
 """
 
+import argparse
 import json
 import csv
 import re
-import urllib.request
 import time
 from pathlib import Path
 
-def slugify(text):
-    """Convert text to filename-safe slug."""
-    text = text.lower()
-    text = re.sub(r'\([^)]*\)', '', text)
-    text = re.sub(r'[^\w\s-]', '', text)
-    text = re.sub(r'[\s_]+', '-', text)
-    text = re.sub(r'-+', '-', text)
-    return text.strip('-')
+from fetch import fetch_bytes, fetch_text, print_fetch_stats
+from profiling import add_profile_argument, create_profiler
+from slugs import slugify
 
 def get_image_url_from_wikiart(page_url):
     """Extract the actual image URL from a WikiArt page."""
     try:
-        req = urllib.request.Request(page_url, headers={'User-Agent': 'Mozilla/5.0'})
-        with urllib.request.urlopen(req, timeout=10) as response:
-            html = response.read().decode('utf-8')
+        html = fetch_text(page_url)
 
         # Pattern 1: itemprop="image"
         match = re.search(r'itemprop="image"[^>]+content="([^"]+)"', html)
@@ -50,21 +47,38 @@ def get_image_url_from_wikiart(page_url):
 def download_image(image_url, output_path):
     """Download an image from URL to output path."""
     try:
-        req = urllib.request.Request(image_url, headers={'User-Agent': 'Mozilla/5.0'})
-        with urllib.request.urlopen(req, timeout=30) as response:
-            data = response.read()
-            with open(output_path, 'wb') as f:
-                f.write(data)
+        data = fetch_bytes(image_url)
+        with open(output_path, 'wb') as f:
+            f.write(data)
         return True
     except Exception as e:
         print(f"    Error downloading: {e}")
         return False
 
-def main():
+def find_collisions(paintings):
+    """Return {artist-title.jpg: [paintings]} for names shared by several paintings."""
+    filename_to_paintings = {}
+    for painting in paintings:
+        filename_slug = slugify(f"{painting['artist']}-{painting['title']}")
+        filename = f"{filename_slug}.jpg"
+
+        if filename not in filename_to_paintings:
+            filename_to_paintings[filename] = []
+        filename_to_paintings[filename].append(painting)
+
+    return {k: v for k, v in filename_to_paintings.items() if len(v) > 1}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Fix duplicate image filenames by including the year.')
+    add_profile_argument(parser)
+    args = parser.parse_args(argv)
+    profiler = create_profiler('fix_duplicate_images', args.profile)
+
     # Read CSV to find all paintings
     csv_file = 'paintings_wikiart_urls.csv'
     all_paintings = []
 
+    profiler.begin('read_csv')
     print("Reading CSV...")
     with open(csv_file, 'r', encoding='utf-8') as f:
         reader = csv.DictReader(f)
@@ -72,29 +86,21 @@ def main():
             if row['wikiart_url']:
                 all_paintings.append(row)
 
-    # Find paintings with duplicate filenames
-    filename_to_paintings = {}
-    for painting in all_paintings:
-        filename_slug = slugify(f"{painting['artist']}-{painting['title']}")
-        filename = f"{filename_slug}.jpg"
-
-        if filename not in filename_to_paintings:
-            filename_to_paintings[filename] = []
-        filename_to_paintings[filename].append(painting)
-
-    # Find duplicates
-    duplicates = {k: v for k, v in filename_to_paintings.items() if len(v) > 1}
+    profiler.begin('detect_collisions')
+    duplicates = find_collisions(all_paintings)
 
     print(f"Found {len(duplicates)} filename collisions affecting {sum(len(v) for v in duplicates.values())} paintings\n")
 
     if not duplicates:
         print("✅ No duplicates found!")
+        profiler.finish()
         return
 
     # Images directory
     images_dir = Path('paintings_ios/Resources/Images')
 
     # Process each duplicate group
+    profiler.begin('redownload')
     updated_paintings = {}  # Map painting ID to new filename
 
     for dup_filename, paintings in duplicates.items():
@@ -144,6 +150,7 @@ def main():
     print(f"{'='*70}\n")
 
     # Update JSON files with new filenames
+    profiler.begin('update_json')
     periods_dir = Path('paintings_ios/Resources/Data/Periods')
     updated_count = 0
 
@@ -168,7 +175,10 @@ def main():
     print(f"{'='*70}")
     print(f"Fixed {len(duplicates)} filename collisions")
     print(f"Updated {updated_count} paintings in JSON files")
+    print_fetch_stats()
     print(f"{'='*70}")
 
+    profiler.finish()
+
 if __name__ == '__main__':
     main()
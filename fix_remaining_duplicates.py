@@ -1,30 +1,27 @@
 #!/usr/bin/env python3
 """
 Fix remaining duplicate filenames by using painting ID as final unique identifier.
+
+Superseded by allocate_filenames.py, which assigns collision-free names
+before download_wikiart_images.py fetches anything. Only needed to repair
+image folders downloaded before the allocator existed.
 """
 
+import argparse
 import json
 import csv
 import re
-import urllib.request
 import time
 from pathlib import Path
 
-def slugify(text):
-    """Convert text to filename-safe slug."""
-    text = text.lower()
-    text = re.sub(r'\([^)]*\)', '', text)
-    text = re.sub(r'[^\w\s-]', '', text)
-    text = re.sub(r'[\s_]+', '-', text)
-    text = re.sub(r'-+', '-', text)
-    return text.strip('-')
+from fetch import fetch_bytes, fetch_text, print_fetch_stats
+from profiling import add_profile_argument, create_profiler
+from slugs import slugify
 
 def get_image_url_from_wikiart(page_url):
     """Extract the actual image URL from a WikiArt page."""
     try:
-        req = urllib.request.Request(page_url, headers={'User-Agent': 'Mozilla/5.0'})
-        with urllib.request.urlopen(req, timeout=10) as response:
-            html = response.read().decode('utf-8')
+        html = fetch_text(page_url)
 
         match = re.search(r'itemprop="image"[^>]+content="([^"]+)"', html)
         if match:
@@ -46,21 +43,25 @@ def get_image_url_from_wikiart(page_url):
 def download_image(image_url, output_path):
     """Download an image from URL to output path."""
     try:
-        req = urllib.request.Request(image_url, headers={'User-Agent': 'Mozilla/5.0'})
-        with urllib.request.urlopen(req, timeout=30) as response:
-            data = response.read()
-            with open(output_path, 'wb') as f:
-                f.write(data)
+        data = fetch_bytes(image_url)
+        with open(output_path, 'wb') as f:
+            f.write(data)
         return True
     except Exception as e:
         print(f"    Error downloading: {e}")
         return False
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Fix remaining duplicate filenames using the painting ID.')
+    add_profile_argument(parser)
+    args = parser.parse_args(argv)
+    profiler = create_profiler('fix_remaining_duplicates', args.profile)
+
     # Read CSV to find all paintings
     csv_file = 'paintings_wikiart_urls.csv'
     all_paintings = []
 
+    profiler.begin('read_csv')
     print("Reading CSV...")
     with open(csv_file, 'r', encoding='utf-8') as f:
         reader = csv.DictReader(f)
@@ -68,6 +69,7 @@ def main():
             if row['wikiart_url']:
                 all_paintings.append(row)
 
+    profiler.begin('detect_collisions')
     # Find paintings with duplicate filenames (including year)
     filename_to_paintings = {}
     for painting in all_paintings:
@@ -85,12 +87,14 @@ def main():
 
     if not duplicates:
         print("✅ No duplicates found!")
+        profiler.finish()
         return
 
     # Images directory
     images_dir = Path('paintings_ios/Resources/Images')
 
     # Process each duplicate group
+    profiler.begin('redownload')
     updated_paintings = {}  # Map painting ID to new filename
 
     for dup_filename, paintings in duplicates.items():
@@ -142,6 +146,7 @@ def main():
     print(f"{'='*70}\n")
 
     # Update JSON files with new filenames
+    profiler.begin('update_json')
     periods_dir = Path('paintings_ios/Resources/Data/Periods')
     updated_count = 0
 
@@ -166,7 +171,10 @@ def main():
     print(f"{'='*70}")
     print(f"Fixed {len(duplicates)} filename collisions")
     print(f"Updated {updated_count} paintings in JSON files")
+    print_fetch_stats()
     print(f"{'='*70}")
 
+    profiler.finish()
+
 if __name__ == '__main__':
     main()
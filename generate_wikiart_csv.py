@@ -4,23 +4,14 @@ Generate a CSV file with WikiArt URLs for all paintings.
 WikiArt URLs follow the pattern: https://www.wikiart.org/en/[artist-slug]/[painting-slug]
 """
 
+import argparse
 import json
 import csv
 import os
-import re
 from pathlib import Path
 
-def slugify(text):
-    """Convert text to WikiArt-compatible URL slug."""
-    # Convert to lowercase
-    text = text.lower()
-    # Remove special characters and replace spaces/punctuation with hyphens
-    text = re.sub(r'[^\w\s-]', '', text)
-    text = re.sub(r'[\s_]+', '-', text)
-    text = re.sub(r'-+', '-', text)
-    # Remove leading/trailing hyphens
-    text = text.strip('-')
-    return text
+from profiling import add_profile_argument, create_profiler
+from slugs import slugify
 
 def generate_wikiart_url(artist, title, year):
     """Generate a WikiArt URL for a painting."""
@@ -36,11 +27,17 @@ def generate_wikiart_url(artist, title, year):
         'url_with_year': f"{base_url}-{year}"
     }
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate a CSV file with WikiArt URLs for all paintings.')
+    add_profile_argument(parser)
+    args = parser.parse_args(argv)
+    profiler = create_profiler('generate_wikiart_csv', args.profile)
+
     # Path to period JSON files
     periods_dir = Path('paintings_ios/Resources/Data/Periods')
 
     # Collect all paintings
+    profiler.begin('load_paintings')
     all_paintings = []
 
     for json_file in sorted(periods_dir.glob('*.json')):
@@ -52,6 +49,7 @@ def main():
     print(f"\nTotal paintings: {len(all_paintings)}")
 
     # Generate CSV
+    profiler.begin('write_csv')
     output_file = 'paintings_wikiart_urls.csv'
 
     with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
@@ -92,5 +90,7 @@ def main():
     print(f"      Some URLs may need manual verification or adjustment.")
     print(f"      Both versions (with/without year) are provided for flexibility.")
 
+    profiler.finish()
+
 if __name__ == '__main__':
     main()
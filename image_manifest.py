@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Per-painting image manifest (image_manifest.json).
+
+Maps each painting id to the image file name allocated for it before any
+download, plus whatever the pipeline learns about its source image. A name
+is never changed once its image file exists (see allocate_filenames.py), so
+reruns and new paintings can't rename files that already exist.
+"""
+
+import json
+from pathlib import Path
+
+from file_digests import write_json_atomic
+
+MANIFEST_FILE = 'image_manifest.json'
+MANIFEST_VERSION = 1
+
+
+def load_manifest(path=MANIFEST_FILE):
+    """Load the manifest, or return an empty one if it doesn't exist yet."""
+    if not Path(path).exists():
+        return {'version': MANIFEST_VERSION, 'paintings': {}}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_manifest(manifest, path=MANIFEST_FILE):
+    """Write the manifest atomically with stable key order."""
+    manifest['paintings'] = dict(sorted(manifest['paintings'].items()))
+    write_json_atomic(path, manifest, indent=2)
+
+
+def manifest_entry(manifest, painting_id):
+    """Return (creating if needed) the manifest record for a painting."""
+    return manifest['paintings'].setdefault(painting_id, {})
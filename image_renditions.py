@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Target-size policy for painting images.
+
+The bundled images are WikiArt "!Large" renditions (long side 600-750 px)
+and the app shows them no larger than that, so there is no point bundling
+anything bigger. When URLs are resolved, each upstream is asked for a
+server-side rendition at least TARGET_WIDTH wide:
+
+    WikiArt    the "!<Name>.jpg" size suffix on uploads*.wikiart.org URLs
+    Commons    imageinfo thumbnails via iiurlwidth / pageimages pithumbsize
+
+A WikiArt page's og:image already names a rendition (usually "!Large");
+nothing larger than that one is ever chosen, and it is the fallback when a
+smaller preferred rendition is missing. The original is only used when the
+page advertises nothing else. The chosen rendition is recorded in
+image_manifest.json (see rendition_label).
+"""
+
+import posixpath
+import re
+import urllib.parse
+
+# Largest size the app displays; also the bundled images' long side
+TARGET_WIDTH = 750
+
+# WikiArt size suffixes, smallest first, with the width each is scaled to
+WIKIART_RENDITIONS = [
+    ('PinterestSmall', 236),
+    ('Blog', 500),
+    ('Large', 750),
+    ('HalfHD', 1280),
+    ('HD', 1920),
+]
+
+_COMMONS_THUMB = re.compile(r'/thumb/.+/(\d+)px-[^/]+$')
+
+
+def is_wikiart_upload(url):
+    host = urllib.parse.urlsplit(url).hostname or ''
+    return host.startswith('uploads') and host.endswith('.wikiart.org')
+
+
+def wikiart_original_url(url):
+    """Strip any "!<Name>.jpg" size suffix from a WikiArt upload URL."""
+    return url.split('!', 1)[0]
+
+
+def wikiart_rendition_width(url):
+    """Width of the WikiArt rendition url points at; None for the original or an unknown suffix."""
+    if '!' not in url:
+        return None
+    name = posixpath.splitext(url.rsplit('!', 1)[1])[0]
+    return dict(WIKIART_RENDITIONS).get(name)
+
+
+def wikiart_rendition_url(url, target_width=TARGET_WIDTH):
+    """
+    Smallest WikiArt rendition at least target_width wide, but never larger
+    than the one url already points at (which is kept if nothing fits).
+    """
+    original = wikiart_original_url(url)
+    advertised = wikiart_rendition_width(url)
+    if advertised is None and '!' in url:
+        return url  # unknown suffix: leave it alone
+    extension = posixpath.splitext(urllib.parse.urlsplit(original).path)[1] or '.jpg'
+    for name, width in WIKIART_RENDITIONS:
+        if advertised is not None and width >= advertised:
+            return url
+        if width >= target_width:
+            return f"{original}!{name}{extension}"
+    return url
+
+
+def apply_size_policy(url, target_width=TARGET_WIDTH):
+    """Rewrite url to the preferred rendition where the host supports it."""
+    if url and is_wikiart_upload(url):
+        return wikiart_rendition_url(url, target_width)
+    return url
+
+
+def download_candidates(url, target_width=TARGET_WIDTH):
+    """URLs to try in order: the preferred rendition, then the one url advertises."""
+    candidates = [apply_size_policy(url, target_width)]
+    if url not in candidates:
+        candidates.append(url)
+    return candidates
+
+
+def rendition_label(url):
+    """Describe which rendition a URL points at, for the manifest."""
+    path = urllib.parse.urlsplit(url).path
+    if is_wikiart_upload(url) and '!' in path:
+        return posixpath.splitext(path.rsplit('!', 1)[1])[0]
+    match = _COMMONS_THUMB.search(path)
+    if match:
+        return f"{match.group(1)}px"
+    return 'original'
@@ -0,0 +1,540 @@
+#!/usr/bin/env python3
+"""
+Local mock of the WikiArt, Wikidata, Commons and Wikipedia endpoints used by
+the fetch scripts, so they can be benchmarked and regression-tested offline.
+Seeded from paintings_wikiart_urls.csv. Uses only standard library.
+
+Run standalone:
+    python mock_wiki_server.py --port 8765 --config mock_config.json
+
+Or in-process: start a MockWikiServer and call install_mock_opener() so every
+urllib.request.urlopen() call to the real hosts is routed to the mock.
+"""
+
+import argparse
+import csv
+import gzip
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import urllib.parse
+import urllib.request
+import zlib
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_CONFIG = {
+    'seed': 1,
+    # Latency per request: fixed | uniform | lognormal (values in ms)
+    'latency': {'distribution': 'lognormal', 'median_ms': 20, 'sigma': 0.6},
+    # Optional per-host overrides, e.g. {"uploads0.wikiart.org": {...}}
+    'latency_by_host': {},
+    # Fraction of requests answered with 503
+    'error_rate': 0.0,
+    # Every `burst_every` requests, answer `burst_length` requests with 429
+    'burst_every': 0,
+    'burst_length': 5,
+    # Payload sizes (of originals; renditions scale with their area)
+    'image_kb_min': 80,
+    'image_kb_max': 400,
+    'original_width': 3000,
+    # Share of WikiArt pages that answer HEAD with 405 (GET still works)
+    'head_rejected_rate': 0.0,
+    # Share of WikiArt images with only the advertised "!Large" rendition (other suffixes 404)
+    'wikiart_rendition_miss_rate': 0.05,
+    'page_kb': 40,
+    # Honor Accept-Encoding: gzip/deflate for HTML and JSON responses
+    'compression': True,
+    # Share of paintings without a WikiArt URL that the fallbacks can find
+    'wikidata_hit_rate': 0.6,
+    'wikipedia_hit_rate': 0.5,
+    # Share of searches whose first hit is the wrong item: the artist's own
+    # entity/page (with a portrait photo, per artist) or a same-titled work
+    # by another artist (per painting)
+    'search_decoy_rate': 0.0,
+}
+
+WIKIART_HOST = 'www.wikiart.org'
+WIKIDATA_HOST = 'www.wikidata.org'
+COMMONS_HOST = 'commons.wikimedia.org'
+WIKIPEDIA_HOST = 'en.wikipedia.org'
+UPLOAD_HOST = 'upload.wikimedia.org'
+
+MOCKED_HOSTS = {WIKIART_HOST, WIKIDATA_HOST, COMMONS_HOST, WIKIPEDIA_HOST, UPLOAD_HOST}
+
+# Width each WikiArt size suffix is scaled to
+WIKIART_SUFFIX_WIDTHS = {'PinterestSmall': 236, 'Blog': 500, 'Large': 750, 'HalfHD': 1280, 'HD': 1920}
+COMMONS_THUMB_PATH = re.compile(r'^/wikipedia/commons/thumb/(.+)/(\d+)px-[^/]+$')
+
+
+def is_mocked_host(host):
+    """Return True if requests to this host should go to the mock."""
+    return host in MOCKED_HOSTS or (host.startswith('uploads') and host.endswith('.wikiart.org'))
+
+
+def stable_fraction(*parts):
+    """Deterministic value in [0, 1) derived from the given strings."""
+    digest = hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()
+    return int(digest[:8], 16) / 0x100000000
+
+
+def entity_id(*parts):
+    """Deterministic fake Wikidata Q-id."""
+    digest = hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()
+    return f"Q{int(digest[:8], 16) % 90000000 + 1000}"
+
+
+def load_config(path=None, overrides=None):
+    """Merge DEFAULT_CONFIG with an optional JSON file and explicit overrides."""
+    config = json.loads(json.dumps(DEFAULT_CONFIG))
+    if path:
+        with open(path, 'r', encoding='utf-8') as f:
+            config.update(json.load(f))
+    if overrides:
+        config.update(overrides)
+    return config
+
+
+class MockCatalog:
+    """Fake upstream data derived from the paintings CSV."""
+
+    def __init__(self, csv_file, config):
+        self.wikiart_pages = {}     # URL path -> painting row
+        self.search_index = {}      # normalized "title artist" -> Q-ids / page title
+        self.entities = {}          # Q-id -> entity dict
+        self.commons_files = {}     # Commons file name -> painting row
+        self.wikipedia_pages = {}   # page title -> painting row
+        self.artists = []
+
+        with open(csv_file, 'r', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                self._add_painting(row, config)
+
+    def _add_painting(self, row, config):
+        title = row['title']
+        artist = row['artist']
+
+        if row.get('wikiart_url'):
+            path = urllib.parse.urlsplit(row['wikiart_url']).path
+            self.wikiart_pages[path] = row
+            return
+
+        key = normalize_query(f"{title} {artist}")
+        artist_qid = entity_id('artist', artist)
+        if artist_qid not in self.entities:
+            self.artists.append(artist)
+            self.entities[artist_qid] = {
+                'id': artist_qid,
+                'labels': {'en': {'language': 'en', 'value': artist}},
+                'claims': {},
+            }
+            if stable_fraction(artist, 'portrait') < config['search_decoy_rate']:
+                # The artist's entity and biography page lead with their portrait
+                portrait = {'id': f"portrait-{artist_qid}", 'title': 'Portrait photograph', 'artist': artist}
+                file_name = f"{portrait['title']} by {artist}.jpg"
+                self.commons_files[file_name] = portrait
+                self.entities[artist_qid]['claims']['P18'] = [claim('commonsMedia', file_name)]
+                self.wikipedia_pages[artist] = portrait
+        decoys, page_decoys = [], []
+        if self.entities[artist_qid]['claims'].get('P18'):
+            page_decoys.append(artist)
+        if stable_fraction(row['id'], 'namesake') < config['search_decoy_rate'] and len(self.artists) > 1:
+            # Same title, another artist, another century
+            other = next(name for name in reversed(self.artists) if name != artist)
+            namesake = {'id': f"namesake-{row['id']}", 'title': title, 'artist': other}
+            year = int(row['year'] or 1900) + 60
+            qid = entity_id('namesake', row['id'])
+            file_name = f"{title} by {other}.jpg".replace('/', '-')
+            self.commons_files[file_name] = namesake
+            self.entities[qid] = {
+                'id': qid,
+                'labels': {'en': {'language': 'en', 'value': title}},
+                'claims': {
+                    'P18': [claim('commonsMedia', file_name)],
+                    'P170': [claim('wikibase-entityid', {'id': entity_id('artist', other)})],
+                    'P571': [claim('time', {'time': f"+{year}-00-00T00:00:00Z"})],
+                },
+            }
+            page = f"{title} ({other})"
+            self.wikipedia_pages[page] = namesake
+            decoys.append(qid)
+            page_decoys.insert(0, page)
+
+        if stable_fraction(row['id'], 'wikidata') < config['wikidata_hit_rate']:
+            qid = entity_id('painting', row['id'])
+            file_name = f"{title} by {artist}.jpg".replace('/', '-')
+            self.commons_files[file_name] = row
+            self.entities[qid] = {
+                'id': qid,
+                'labels': {'en': {'language': 'en', 'value': title}},
+                'claims': {
+                    'P18': [claim('commonsMedia', file_name)],
+                    'P170': [claim('wikibase-entityid', {'id': artist_qid})],
+                    'P571': [claim('time', {'time': f"+{row['year']}-00-00T00:00:00Z"})],
+                },
+            }
+            self.search_index[key] = decoys + [artist_qid, qid]
+        else:
+            self.search_index[key] = decoys + [artist_qid]
+
+        pages = list(page_decoys)
+        if stable_fraction(row['id'], 'wikipedia') < config['wikipedia_hit_rate']:
+            self.wikipedia_pages.setdefault(title, row)
+            pages.append(title)
+        if pages:
+            self.search_index.setdefault('wp:' + key, pages)
+
+
+def claim(datatype, value):
+    """Build a minimal Wikibase claim."""
+    return {'mainsnak': {'datatype': datatype, 'datavalue': {'value': value}}}
+
+
+def normalize_query(text):
+    return ' '.join(text.lower().split())
+
+
+def commons_upload_url(file_name, thumb_width=None):
+    """Commons-style upload URL for a file name."""
+    name = file_name.replace(' ', '_')
+    digest = hashlib.md5(name.encode('utf-8')).hexdigest()
+    quoted = urllib.parse.quote(name)
+    if thumb_width:
+        return (f"https://{UPLOAD_HOST}/wikipedia/commons/thumb/{digest[0]}/{digest[:2]}/"
+                f"{quoted}/{thumb_width}px-{quoted}")
+    return f"https://{UPLOAD_HOST}/wikipedia/commons/{digest[0]}/{digest[:2]}/{quoted}"
+
+
+class MockWikiServer:
+    """Threaded HTTP server emulating the upstream endpoints."""
+
+    def __init__(self, csv_file='paintings_wikiart_urls.csv', config=None, host='127.0.0.1', port=0):
+        self.config = config or load_config()
+        self.catalog = MockCatalog(csv_file, self.config)
+        self.rng = random.Random(self.config['seed'])
+        self.lock = threading.Lock()
+        self.request_count = 0
+        self.stats = Counter()
+        self.bytes_sent = 0
+        self._filler = random.Random(self.config['seed']).randbytes(self.config['image_kb_max'] * 1024)
+        self.page_filler = self._page_filler(self.config['page_kb'] * 1024)
+
+        handler = type('BoundMockHandler', (MockWikiHandler,), {'server_ref': self})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def snapshot_stats(self):
+        """Return a copy of the request counters."""
+        with self.lock:
+            return {
+                'requests': self.request_count,
+                'bytes_sent': self.bytes_sent,
+                'counters': dict(self.stats),
+            }
+
+    def next_request(self, upstream_host):
+        """Register a request; return (index, latency seconds, forced status or None)."""
+        with self.lock:
+            self.request_count += 1
+            index = self.request_count
+            self.stats[f"host:{upstream_host}"] += 1
+            latency = self._sample_latency(upstream_host)
+            forced = None
+            every = self.config['burst_every']
+            if every and index % every < self.config['burst_length']:
+                forced = 429
+            elif self.rng.random() < self.config['error_rate']:
+                forced = 503
+        return index, latency, forced
+
+    def _sample_latency(self, upstream_host):
+        spec = self.config['latency_by_host'].get(upstream_host, self.config['latency'])
+        kind = spec.get('distribution', 'fixed')
+        if kind == 'uniform':
+            ms = self.rng.uniform(spec['min_ms'], spec['max_ms'])
+        elif kind == 'lognormal':
+            ms = self.rng.lognormvariate(0, spec.get('sigma', 0.5)) * spec['median_ms']
+        else:
+            ms = spec.get('ms', 0)
+        return ms / 1000.0
+
+    def record_response(self, status, length):
+        with self.lock:
+            self.stats[f"status:{status}"] += 1
+            self.bytes_sent += length
+
+    def _page_filler(self, size):
+        """Body markup standing in for the rest of a WikiArt page (compresses like real HTML)."""
+        rows = list(self.catalog.wikiart_pages.items()) or [('/en/unknown/untitled', {'title': '', 'artist': ''})]
+        rng = random.Random(self.config['seed'])
+        parts = []
+        length = 0
+        while length < size:
+            path, row = rng.choice(rows)
+            part = (f'<li class="painting-list-item"><a href="{path}" title="{row["title"]}">'
+                    f'<img src="https://uploads{rng.randrange(8)}.wikiart.org/images{path[3:]}.jpg!PinterestSmall.jpg" '
+                    f'alt="{row["title"]} - {row["artist"]}" loading="lazy"></a>'
+                    f'<span class="artist">{row["artist"]}</span></li>\n')
+            parts.append(part)
+            length += len(part)
+        return ''.join(parts)[:size]
+
+    def rendition(self, path):
+        """Split an upload path into (original path, rendition width or None)."""
+        if '!' in path:
+            original, suffix = path.split('!', 1)
+            width = WIKIART_SUFFIX_WIDTHS.get(suffix.rsplit('.', 1)[0])
+            return original, width or -1
+        match = COMMONS_THUMB_PATH.match(path)
+        if match:
+            return f"/wikipedia/commons/{match.group(1)}", int(match.group(2))
+        return path, None
+
+    def image_bytes(self, path):
+        """Deterministic fake JPEG payload for an upload path, or None if there is no such rendition."""
+        original, width = self.rendition(path)
+        if width == -1 or (width and '!' in path and not path.endswith('!Large.jpg') and
+                           stable_fraction(original, 'rendition') < self.config['wikiart_rendition_miss_rate']):
+            return None
+        low, high = self.config['image_kb_min'], self.config['image_kb_max']
+        size = int((low + (high - low) * stable_fraction(original)) * 1024)
+        if width:
+            scale = min(width, self.config['original_width']) / self.config['original_width']
+            size = max(int(size * scale * scale), 4096)
+        return b'\xff\xd8\xff\xe0' + self._filler[:max(size - 6, 0)] + b'\xff\xd9'
+
+
+class MockWikiHandler(BaseHTTPRequestHandler):
+    """Routes /<upstream-host>/<path> to the emulated endpoint."""
+
+    server_ref = None
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self._dispatch(head=True)
+
+    def do_GET(self):
+        self._dispatch(head=False)
+
+    def _dispatch(self, head):
+        mock = self.server_ref
+        parts = urllib.parse.urlsplit(self.path)
+        upstream_host, _, upstream_path = parts.path.lstrip('/').partition('/')
+        upstream_path = '/' + upstream_path
+        params = {k: v[0] for k, v in urllib.parse.parse_qs(parts.query, keep_blank_values=True).items()}
+
+        _, latency, forced = mock.next_request(upstream_host)
+        if latency:
+            time.sleep(latency)
+
+        if forced == 429:
+            return self._send(429, b'Too Many Requests', 'text/plain', head, {'Retry-After': '1'})
+        if forced:
+            return self._send(forced, b'Service Unavailable', 'text/plain', head)
+
+        if upstream_host == WIKIART_HOST:
+            return self._wikiart_page(upstream_path, head)
+        if upstream_host.endswith('.wikiart.org') or upstream_host == UPLOAD_HOST:
+            image = mock.image_bytes(upstream_path)
+            if image is None:
+                return self._send(404, b'Not Found', 'text/plain', head)
+            etag = '"' + hashlib.sha1(image).hexdigest()[:16] + '"'
+            return self._send(200, image, 'image/jpeg', head, {'ETag': etag})
+        if upstream_host == WIKIDATA_HOST:
+            return self._json(self._wikidata(params), head)
+        if upstream_host in (COMMONS_HOST, WIKIPEDIA_HOST):
+            return self._json(self._mediawiki(upstream_host, params), head)
+        return self._send(404, b'Not Found', 'text/plain', head)
+
+    def _wikiart_page(self, path, head):
+        mock = self.server_ref
+        # Slugs with non-ASCII letters arrive percent-encoded
+        path = urllib.parse.unquote(path)
+        if head and stable_fraction(path, 'head') < mock.config['head_rejected_rate']:
+            return self._send(405, b'Method Not Allowed', 'text/plain', head, {'Allow': 'GET'})
+        row = mock.catalog.wikiart_pages.get(path)
+        if row is None:
+            return self._send(404, b'<html><body>Not found</body></html>', 'text/html', head)
+
+        # Like the real site, og:image points at the "!Large" rendition
+        image_url = f"https://uploads{int(stable_fraction(path) * 8)}.wikiart.org/images{path[3:]}.jpg!Large.jpg"
+        filler = '<ul class="related">' + mock.page_filler + '</ul>'
+        html = (
+            '<!DOCTYPE html><html><head>'
+            f'<title>{row["title"]} - {row["artist"]} - WikiArt.org</title>'
+            f'<meta property="og:image" content="{image_url}">'
+            f'<meta itemprop="image" content="{image_url}">'
+            f'</head><body>{filler}</body></html>'
+        )
+        return self._send(200, html.encode('utf-8'), 'text/html; charset=utf-8', head)
+
+    def _wikidata(self, params):
+        catalog = self.server_ref.catalog
+        action = params.get('action')
+        if action == 'wbsearchentities':
+            ids = catalog.search_index.get(normalize_query(params.get('search', '')), [])
+            limit = int(params.get('limit', 7))
+            return {'searchinfo': {'search': params.get('search', '')},
+                    'search': [{'id': qid} for qid in ids[:limit]]}
+        if action == 'wbgetentities':
+            entities = {}
+            for qid in params.get('ids', '').split('|'):
+                entities[qid] = catalog.entities.get(qid, {'id': qid, 'missing': ''})
+            return {'entities': entities}
+        return {'error': {'code': 'badvalue'}}
+
+    def _mediawiki(self, host, params):
+        catalog = self.server_ref.catalog
+        action = params.get('action')
+        if host == WIKIPEDIA_HOST and action == 'opensearch':
+            query = params.get('search', '')
+            titles = catalog.search_index.get('wp:' + normalize_query(query), [])[:int(params.get('limit', 10))]
+            return [query, titles, [''] * len(titles),
+                    [f"https://{WIKIPEDIA_HOST}/wiki/{urllib.parse.quote(t)}" for t in titles]]
+        if action != 'query':
+            return {'error': {'code': 'badvalue'}}
+
+        pages = {}
+        for index, title in enumerate(params.get('titles', '').split('|')):
+            title = title.replace('_', ' ')  # MediaWiki title normalization
+            page_id = str(-1 - index)
+            page = {'ns': 0, 'title': title}
+            if title.startswith('File:') and title[5:] in catalog.commons_files:
+                page_id = str(1000 + index)
+                original_width = self.server_ref.config['original_width']
+                info = {'url': commons_upload_url(title[5:]),
+                        'width': original_width, 'height': original_width * 3 // 4}
+                if 'sha1' in params.get('iiprop', '') or 'size' in params.get('iiprop', ''):
+                    original = self.server_ref.image_bytes(urllib.parse.urlsplit(info['url']).path)
+                    info['size'] = len(original)
+                    info['sha1'] = hashlib.sha1(original).hexdigest()
+                if params.get('iiurlwidth'):
+                    # Like Commons: no upscaling, the original stands in for larger thumbs
+                    width = int(params['iiurlwidth'])
+                    if width < original_width:
+                        info['thumburl'] = commons_upload_url(title[5:], width)
+                        info['thumbwidth'], info['thumbheight'] = width, width * 3 // 4
+                    else:
+                        info['thumburl'] = info['url']
+                        info['thumbwidth'], info['thumbheight'] = info['width'], info['height']
+                page['imageinfo'] = [info]
+            elif title in catalog.wikipedia_pages:
+                page_id = str(2000 + index)
+                row = catalog.wikipedia_pages[title]
+                file_name = f"{row['title']} by {row['artist']}.jpg".replace('/', '-')
+                if 'pageimages' in params.get('prop', ''):
+                    size = params.get('pithumbsize', '50')
+                    page['thumbnail'] = {'source': commons_upload_url(file_name, size)}
+                    page['pageimage'] = file_name.replace(' ', '_')
+            else:
+                page['missing'] = ''
+            pages[page_id] = page
+        return {'batchcomplete': '', 'query': {'pages': pages}}
+
+    def _json(self, payload, head):
+        return self._send(200, json.dumps(payload).encode('utf-8'), 'application/json; charset=utf-8', head)
+
+    def _send(self, status, body, content_type, head, extra_headers=None):
+        extra_headers = dict(extra_headers or {})
+        byte_range = re.fullmatch(r'bytes=(\d+)-(\d*)', self.headers.get('Range', ''))
+        if status == 200 and byte_range:
+            start = int(byte_range.group(1))
+            end = min(int(byte_range.group(2) or len(body) - 1), len(body) - 1)
+            extra_headers['Content-Range'] = f"bytes {start}-{end}/{len(body)}"
+            status, body = 206, body[start:end + 1]
+        if (self.server_ref.config['compression'] and status != 206
+                and content_type.startswith(('text/html', 'application/json'))):
+            accepted = {token.split(';')[0].strip().lower()
+                        for token in self.headers.get('Accept-Encoding', '').split(',')}
+            if 'gzip' in accepted:
+                body = gzip.compress(body, compresslevel=6, mtime=0)
+                extra_headers['Content-Encoding'] = 'gzip'
+            elif 'deflate' in accepted:
+                body = zlib.compress(body, 6)
+                extra_headers['Content-Encoding'] = 'deflate'
+            extra_headers['Vary'] = 'Accept-Encoding'
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in extra_headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+        self.server_ref.record_response(status, 0 if head else len(body))
+
+
+class RedirectToMockHandler(urllib.request.BaseHandler):
+    """urllib pre-processor that rewrites upstream URLs to the mock server."""
+
+    handler_order = 100  # before the default HTTP(S) request processors
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def _rewrite(self, req):
+        parts = urllib.parse.urlsplit(req.full_url)
+        if parts.hostname and is_mocked_host(parts.hostname):
+            query = f"?{parts.query}" if parts.query else ''
+            req.full_url = f"{self.base_url}/{parts.hostname}{parts.path}{query}"
+        return req
+
+    http_request = _rewrite
+    https_request = _rewrite
+
+
+def install_mock_opener(base_url):
+    """Route all urllib.request.urlopen() traffic for mocked hosts to base_url."""
+    opener = urllib.request.build_opener(RedirectToMockHandler(base_url))
+    urllib.request.install_opener(opener)
+    return opener
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--csv', default='paintings_wikiart_urls.csv')
+    parser.add_argument('--config', help='JSON file overriding DEFAULT_CONFIG')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    server = MockWikiServer(args.csv, load_config(args.config), args.host, args.port)
+    catalog = server.catalog
+    print(f"Mock upstreams listening on {server.base_url}")
+    print(f"  WikiArt pages: {len(catalog.wikiart_pages)}")
+    print(f"  Wikidata entities: {len(catalog.entities)}")
+    print(f"  Commons files: {len(catalog.commons_files)}")
+    print(f"  Wikipedia pages: {len(catalog.wikipedia_pages)}")
+    print("Requests are addressed as /<upstream-host>/<path>, e.g.")
+    print(f"  {server.base_url}/{WIKIART_HOST}/en/claude-monet/impression-sunrise")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"\n{json.dumps(server.snapshot_stats(), indent=2)}")
+        server.httpd.server_close()
+
+if __name__ == '__main__':
+    main()
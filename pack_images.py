@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Pack all images into one memory-mappable archive with a sorted offset index.
+
+Archive layout (little-endian):
+    header   64 bytes   magic, version, alignment, entry count, index and
+                        name-table offsets/sizes
+    data     blobs, each starting on an `alignment` boundary
+    index    entry_count x 64-byte entries sorted by key:
+                 key (16 bytes, BLAKE2b of the file name), offset, length,
+                 SHA-1 digest, name-table offset, name length
+    names    UTF-8 file names
+
+A reader mmaps the file, binary-searches the fixed-size index and slices the
+blob out of the mapping without copying. PackReader below is the pure-Python
+reader used for --verify and --benchmark.
+
+Rebuilds are incremental: if no input changed (by size/mtime, then digest)
+the archive is left alone, and unchanged blobs are copied from the previous
+archive instead of being re-read from the source files.
+"""
+
+import argparse
+import hashlib
+import mmap
+import os
+import random
+import struct
+import sys
+import tempfile
+import time
+from contextlib import nullcontext
+from pathlib import Path
+
+from file_digests import CACHE_DIR, StatCache, sha1_file
+from profiling import add_profile_argument, create_profiler
+
+MAGIC = b'PIMGPACK'
+VERSION = 1
+HEADER = struct.Struct('<8sHHIQQQQ16x')
+ENTRY = struct.Struct('<16sQQ20sIH6x')
+assert HEADER.size == 64 and ENTRY.size == 64
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+
+def name_key(name):
+    """Fixed-size sort/search key for a file name."""
+    return hashlib.blake2b(name.encode('utf-8'), digest_size=16).digest()
+
+
+def align(value, alignment):
+    return (value + alignment - 1) // alignment * alignment
+
+
+class PackReader:
+    """Zero-copy reader for a packed image archive."""
+
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        try:
+            # An empty file can't be mapped
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except BaseException:
+            self._file.close()
+            raise
+        self._view = memoryview(self._map)
+        try:
+            (magic, version, alignment_log2, self.count, self.index_offset, index_size,
+             self.names_offset, names_size) = HEADER.unpack_from(self._map, 0)
+        except struct.error:
+            self.close()
+            raise
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {VERSION} image pack")
+        self.alignment = 1 << alignment_log2
+
+    def close(self):
+        self._view.release()
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def _entry(self, i):
+        return ENTRY.unpack_from(self._map, self.index_offset + i * ENTRY.size)
+
+    def _name(self, name_offset, name_length):
+        start = self.names_offset + name_offset
+        return bytes(self._view[start:start + name_length]).decode('utf-8')
+
+    def entries(self):
+        """Yield (name, offset, length, sha1 hex) in index order."""
+        for i in range(self.count):
+            _, offset, length, digest, name_offset, name_length = self._entry(i)
+            yield self._name(name_offset, name_length), offset, length, digest.hex()
+
+    def find(self, name):
+        """Binary-search the index; return (offset, length, sha1 bytes) or None."""
+        key = name_key(name)
+        low, high = 0, self.count
+        while low < high:
+            mid = (low + high) // 2
+            entry = self._entry(mid)
+            if entry[0] < key:
+                low = mid + 1
+            else:
+                high = mid
+        # Keys are 128-bit hashes; still confirm the name on a match
+        while low < self.count:
+            entry = self._entry(low)
+            if entry[0] != key:
+                break
+            if self._name(entry[4], entry[5]) == name:
+                return entry[1], entry[2], entry[3]
+            low += 1
+        return None
+
+    def get(self, name):
+        """Return a memoryview of the image bytes (no copy), or None."""
+        found = self.find(name)
+        if found is None:
+            return None
+        offset, length, _ = found
+        return self._view[offset:offset + length]
+
+    def __contains__(self, name):
+        return self.find(name) is not None
+
+    def verify(self):
+        """Return names whose stored bytes don't match their digest."""
+        bad = []
+        for name, offset, length, digest in self.entries():
+            if hashlib.sha1(self._view[offset:offset + length]).hexdigest() != digest:
+                bad.append(name)
+        return bad
+
+
+def read_existing(path):
+    """Map name -> (offset, length, sha1 hex) for a previous archive, if valid."""
+    try:
+        reader = PackReader(path)
+    except (OSError, ValueError, struct.error):
+        return None, {}
+    try:
+        return reader, {name: (offset, length, digest) for name, offset, length, digest in reader.entries()}
+    except (ValueError, struct.error):
+        # Corrupt index: treat as no previous archive
+        reader.close()
+        return None, {}
+
+
+def write_pack(output, sources, previous, previous_entries, alignment):
+    """Write a new archive to a temp file and rename it over output."""
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=output.parent, prefix=f".{output.name}.", suffix='.tmp')
+    reused = 0
+    try:
+        # Leaving the block also closes the old archive, before it is replaced
+        with os.fdopen(fd, 'wb') as out, (previous if previous is not None else nullcontext()):
+            out.write(b'\0' * HEADER.size)
+            position = HEADER.size
+            entries = []
+            names = bytearray()
+
+            for name, (path, digest) in sorted(sources.items()):
+                position = align(position, alignment)
+                out.seek(position)
+                old = previous_entries.get(name)
+                if previous is not None and old and old[2] == digest:
+                    # Copy straight out of the old mapping; the slice is
+                    # dropped right away so the map can be closed later
+                    length = out.write(previous._view[old[0]:old[0] + old[1]])
+                    reused += 1
+                else:
+                    with open(path, 'rb') as f:
+                        length = out.write(f.read())
+                encoded = name.encode('utf-8')
+                entries.append((name_key(name), position, length, bytes.fromhex(digest),
+                                len(names), len(encoded)))
+                names += encoded
+                position += length
+
+            entries.sort()
+            index_offset = align(position, 8)
+            out.seek(index_offset)
+            for entry in entries:
+                out.write(ENTRY.pack(*entry))
+            names_offset = index_offset + len(entries) * ENTRY.size
+            out.write(names)
+
+            out.seek(0)
+            out.write(HEADER.pack(MAGIC, VERSION, alignment.bit_length() - 1, len(entries),
+                                  index_offset, len(entries) * ENTRY.size, names_offset, len(names)))
+        os.replace(tmp_name, output)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+    return reused
+
+
+def benchmark(reader, images_dir, rounds):
+    """Compare random lookups from the pack against opening loose files."""
+    names = [name for name, _, _, _ in reader.entries()]
+    order = [random.choice(names) for _ in range(rounds)]
+
+    start = time.perf_counter()
+    total = 0
+    for name in order:
+        total += len(reader.get(name))
+    pack_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for name in order:
+        with open(images_dir / name, 'rb') as f:
+            total -= len(f.read())
+    loose_s = time.perf_counter() - start
+
+    print(f"{rounds} random lookups:")
+    print(f"  pack (mmap + index search): {pack_s * 1000:.1f} ms ({pack_s / rounds * 1e6:.1f} µs each)")
+    print(f"  loose files (open + read):  {loose_s * 1000:.1f} ms ({loose_s / rounds * 1e6:.1f} µs each)")
+    assert total == 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Pack images into one mmap-friendly archive.')
+    parser.add_argument('--images-dir', default='paintings_ios/Resources/Images',
+                        help='directory of images or derivatives to pack')
+    parser.add_argument('--output', default='build/images.pack')
+    parser.add_argument('--alignment', type=int, default=4096, help='blob alignment in bytes (power of two)')
+    parser.add_argument('--cache', default=str(CACHE_DIR / 'pack_images.json'))
+    parser.add_argument('--verify', action='store_true', help='check every blob against its digest')
+    parser.add_argument('--benchmark', type=int, metavar='N', help='time N random lookups against loose files')
+    add_profile_argument(parser)
+    args = parser.parse_args(argv)
+
+    if args.alignment & (args.alignment - 1):
+        parser.error('--alignment must be a power of two')
+
+    profiler = create_profiler('pack_images', args.profile)
+    images_dir = Path(args.images_dir)
+
+    profiler.begin('scan')
+    cache = StatCache(args.cache)
+    sources = {}
+    changed = 0
+    with os.scandir(images_dir) as entries:
+        for entry in entries:
+            if not (entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS)):
+                continue
+            stat = entry.stat()
+            cached = cache.lookup(entry.name, stat)
+            if cached:
+                digest = cached['sha1']
+            else:
+                digest = sha1_file(entry.path)
+                cache.store(entry.name, stat, digest)
+                changed += 1
+            sources[entry.name] = (entry.path, digest)
+    cache.prune(sources)
+    cache.save()
+
+    profiler.begin('pack')
+    previous, previous_entries = read_existing(args.output)
+    current = {name: digest for name, (_, digest) in sources.items()}
+    up_to_date = (previous is not None
+                  and previous.alignment == args.alignment
+                  and {n: e[2] for n, e in previous_entries.items()} == current)
+
+    print(f"Images: {len(sources)} in {images_dir} ({changed} re-hashed)")
+    if up_to_date:
+        print(f"✅ {args.output} is up to date")
+        previous.close()
+    else:
+        reused = write_pack(args.output, sources, previous, previous_entries, args.alignment)
+        size = os.path.getsize(args.output)
+        print(f"✅ Wrote {args.output}: {len(sources)} images, {size / 1024 / 1024:.1f} MB "
+              f"({reused} blobs reused from the previous archive)")
+
+    if args.verify or args.benchmark:
+        profiler.begin('verify')
+        with PackReader(args.output) as reader:
+            if args.verify:
+                bad = reader.verify()
+                missing = [name for name in sources if name not in reader]
+                for name in bad:
+                    print(f"  ❌ digest mismatch: {name}")
+                for name in missing:
+                    print(f"  ❌ missing from index: {name}")
+                print(f"Verified {len(reader)} entries: {'OK' if not bad and not missing else 'FAILED'}")
+                if bad or missing:
+                    profiler.finish()
+                    sys.exit(1)
+            if args.benchmark:
+                benchmark(reader, images_dir, args.benchmark)
+
+    profiler.finish()
+
+if __name__ == '__main__':
+    main()
@@ -100,6 +100,25 @@ enum ArtPeriod: String, Codable, CaseIterable {
     var displayName: String {
         return self.rawValue
     }
+
+    // Period for a quiz key ("postImpressionism", "abstract") or a period name,
+    // matched like match_period in work_scheduler.py
+    init?(matching key: String) {
+        let normalize = { (name: String) in String(name.lowercased().filter { $0.isLetter || $0.isNumber }) }
+        let wanted = normalize(key)
+        guard !wanted.isEmpty else { return nil }
+        if let period = ArtPeriod.allCases.first(where: {
+            normalize($0.rawValue) == wanted || normalize(String(describing: $0)) == wanted
+        }) {
+            self = period
+            return
+        }
+        // "abstract" covers "Abstract Expressionism"
+        guard let period = ArtPeriod.allCases
+            .filter({ normalize($0.rawValue).hasPrefix(wanted) })
+            .min(by: { normalize($0.rawValue) < normalize($1.rawValue) }) else { return nil }
+        self = period
+    }
 }
 
 // MARK: - Sample Data Extension
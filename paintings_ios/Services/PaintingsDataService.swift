@@ -12,6 +12,93 @@ struct PaintingsResponse: Codable {
     let paintings: [Painting]
 }
 
+// MARK: - Catalog Manifest
+// Generated by build_catalog_manifest.py
+struct CatalogManifest: Codable {
+    let version: Int
+    let pageSize: Int
+    let totalRecords: Int
+    let periods: [CatalogPeriod]
+}
+
+struct CatalogPeriod: Codable {
+    let period: String
+    let file: String
+    let recordCount: Int
+    let byteSize: Int
+    let sha256: String
+    let artists: [String]
+    let preview: PeriodPreview?
+    let pages: [String]
+}
+
+extension CatalogPeriod {
+    // Resources to decode, in order: the pages if the period was split,
+    // otherwise the whole period file
+    var shards: [(name: String, subdirectory: String)] {
+        pages.isEmpty
+            ? [(name: file, subdirectory: "Data/Periods")]
+            : pages.map { (name: $0, subdirectory: "Data/Pages") }
+    }
+}
+
+// First painting of a period, so the period list needs no painting data
+struct PeriodPreview: Codable {
+    let title: String
+    let imageName: String
+}
+
+// MARK: - Catalog Aggregates
+// Generated by build_catalog_manifest.py; ids are in load order
+struct CatalogAggregates: Codable {
+    let version: Int
+    let totalRecords: Int
+    let artists: [ArtistAggregate]
+    let periods: [PeriodAggregate]
+}
+
+struct ArtistAggregate: Codable {
+    let name: String
+    let count: Int
+    let ids: [String]
+    let periods: [String]
+}
+
+struct PeriodAggregate: Codable {
+    let period: String
+    let count: Int
+    let ids: [String]
+}
+
+extension CatalogAggregates {
+    // Same lookups computed in one pass over loaded paintings, for when
+    // the bundled resource is missing
+    init(paintings: [Painting]) {
+        var artistIds: [String: [String]] = [:]
+        var artistPeriods: [String: [String]] = [:]
+        var periodIds: [ArtPeriod: [String]] = [:]
+        for painting in paintings {
+            let id = painting.id.uuidString.lowercased()
+            artistIds[painting.artist, default: []].append(id)
+            if !(artistPeriods[painting.artist]?.contains(painting.period.rawValue) ?? false) {
+                artistPeriods[painting.artist, default: []].append(painting.period.rawValue)
+            }
+            periodIds[painting.period, default: []].append(id)
+        }
+
+        version = 1
+        totalRecords = paintings.count
+        artists = artistIds.keys.sorted().map { name in
+            ArtistAggregate(name: name, count: artistIds[name]!.count,
+                            ids: artistIds[name]!, periods: artistPeriods[name] ?? [])
+        }
+        periods = ArtPeriod.allCases.compactMap { period in
+            guard let ids = periodIds[period] else { return nil }
+            return PeriodAggregate(period: period.rawValue, count: ids.count, ids: ids)
+        }
+    }
+}
+
 // MARK: - Error Types
 enum DataServiceError: Error {
     case fileNotFound
@@ -24,55 +111,60 @@ class PaintingsDataService {
 
     private init() {}
 
-    // Load paintings from bundled JSON files (one per period)
-    func loadPaintings() async throws -> [Painting] {
-        let periodFiles = [
-            "renaissance",
-            "baroque",
-            "rococo",
-            "neoclassicism",
-            "realism",
-            "impressionism",
-            "post-impressionism",
-            "expressionism",
-            "cubism",
-            "surrealism",
-            "abstract_expressionism",
-            "futurism",
-            "minimalism",
-            "pop_art",
-            "symbolism",
-            "contemporary_conceptual_art"
-        ]
-
-        var allPaintings: [Painting] = []
-        let decoder = JSONDecoder()
-        decoder.dateDecodingStrategy = .iso8601
+    // Load the catalog manifest generated by build_catalog_manifest.py.
+    // It lists every period with its record count and artists, so screens
+    // can be built before any painting data is decoded.
+    func loadCatalogManifest() throws -> CatalogManifest {
+        guard let url = Bundle.main.url(
+            forResource: "catalog_manifest",
+            withExtension: "json",
+            subdirectory: "Data"
+        ) else {
+            throw DataServiceError.fileNotFound
+        }
 
-        for periodFile in periodFiles {
-            guard let url = Bundle.main.url(
-                forResource: periodFile,
-                withExtension: "json",
-                subdirectory: "Data/Periods"
-            ) else {
-                print("⚠️ Warning: Could not find \(periodFile).json")
-                continue
-            }
+        do {
+            let data = try Data(contentsOf: url)
+            return try JSONDecoder().decode(CatalogManifest.self, from: data)
+        } catch {
+            throw DataServiceError.decodingError
+        }
+    }
 
-            do {
-                let data = try Data(contentsOf: url)
-                let response = try decoder.decode(PaintingsResponse.self, from: data)
-                allPaintings.append(contentsOf: response.paintings)
-            } catch {
-                print("⚠️ Warning: Could not decode \(periodFile).json - \(error)")
-            }
+    // Load the artist/period aggregates generated by build_catalog_manifest.py
+    func loadCatalogAggregates() throws -> CatalogAggregates {
+        guard let url = Bundle.main.url(
+            forResource: "catalog_aggregates",
+            withExtension: "json",
+            subdirectory: "Data"
+        ) else {
+            throw DataServiceError.fileNotFound
         }
 
-        guard !allPaintings.isEmpty else {
+        do {
+            let data = try Data(contentsOf: url)
+            return try JSONDecoder().decode(CatalogAggregates.self, from: data)
+        } catch {
+            throw DataServiceError.decodingError
+        }
+    }
+
+    // Load one shard (a page, or the whole file if the period isn't split)
+    // of a period's paintings
+    func loadPaintings(for period: CatalogPeriod, shard index: Int) throws -> [Painting] {
+        let shard = period.shards[index]
+        guard let url = Bundle.main.url(
+            forResource: shard.name,
+            withExtension: "json",
+            subdirectory: shard.subdirectory
+        ) else {
             throw DataServiceError.fileNotFound
         }
 
-        return allPaintings
+        let decoder = JSONDecoder()
+        decoder.dateDecodingStrategy = .iso8601
+        let data = try Data(contentsOf: url)
+        return try decoder.decode(PaintingsResponse.self, from: data).paintings
     }
 
     // Save paintings to local storage
@@ -11,6 +11,7 @@ internal import Combine
 
 @MainActor
 class PaintingsViewModel: ObservableObject {
+    // Paintings decoded so far; periods and pages are loaded on demand
     @Published var paintings: [Painting] = []
     @Published var filteredPaintings: [Painting] = []
     @Published var userProgress: UserProgress = UserProgress()
@@ -18,24 +19,33 @@ class PaintingsViewModel: ObservableObject {
     @Published var selectedPeriod: ArtPeriod?
     @Published var isLoading: Bool = false
     @Published var errorMessage: String?
+    @Published var aggregates: CatalogAggregates?
+
+    private var paintingsById: [UUID: Painting] = [:]
+    private var periodAggregates: [String: PeriodAggregate] = [:]
+    private var catalogPeriods: [String: CatalogPeriod] = [:]
+    // Number of shards (pages) decoded per period, in manifest order
+    private var loadedShards: [String: Int] = [:]
 
     private let dataService = PaintingsDataService.shared
 
     init() {
         Task {
-            await loadPaintings()
+            loadCatalog()
             loadUserProgress()
         }
     }
 
-    func loadPaintings() async {
+    // Read only the manifest and aggregates at launch; painting data is
+    // decoded when a screen asks for a period or page
+    func loadCatalog() {
         isLoading = true
         errorMessage = nil
 
         do {
-            // Always load from bundle
-            paintings = try await dataService.loadPaintings()
-            filteredPaintings = paintings
+            let manifest = try dataService.loadCatalogManifest()
+            catalogPeriods = Dictionary(manifest.periods.map { ($0.period, $0) }, uniquingKeysWith: { first, _ in first })
+            loadAggregates(manifest: manifest)
         } catch {
             errorMessage = "Failed to load paintings: \(error.localizedDescription)"
         }
@@ -43,6 +53,73 @@ class PaintingsViewModel: ObservableObject {
         isLoading = false
     }
 
+    private func loadAggregates(manifest: CatalogManifest) {
+        let loaded: CatalogAggregates
+        if let bundled = try? dataService.loadCatalogAggregates() {
+            loaded = bundled
+        } else {
+            // Without the bundled aggregates every period has to be decoded
+            loadPeriods(named: manifest.periods.map(\.period))
+            loaded = CatalogAggregates(paintings: paintings)
+        }
+        periodAggregates = Dictionary(loaded.periods.map { ($0.period, $0) }, uniquingKeysWith: { first, _ in first })
+        aggregates = loaded
+    }
+
+    func catalogPeriod(for period: ArtPeriod) -> CatalogPeriod? {
+        catalogPeriods[period.rawValue]
+    }
+
+    func isFullyLoaded(_ period: ArtPeriod) -> Bool {
+        guard let catalogPeriod = catalogPeriods[period.rawValue] else { return true }
+        return loadedShards[period.rawValue, default: 0] >= catalogPeriod.shards.count
+    }
+
+    // Decode the next page of a period; returns false once all are loaded
+    @discardableResult
+    func loadNextPage(of period: ArtPeriod) -> Bool {
+        guard let catalogPeriod = catalogPeriods[period.rawValue] else { return false }
+        let next = loadedShards[period.rawValue, default: 0]
+        guard next < catalogPeriod.shards.count else { return false }
+        loadedShards[period.rawValue] = next + 1
+
+        do {
+            add(try dataService.loadPaintings(for: catalogPeriod, shard: next))
+        } catch {
+            print("⚠️ Warning: Could not load \(catalogPeriod.shards[next].name).json - \(error)")
+        }
+        return true
+    }
+
+    // Decode whatever isn't loaded yet of the given periods (e.g. before a quiz)
+    func loadPeriods(_ periods: [ArtPeriod]) {
+        for period in periods {
+            while loadNextPage(of: period) {}
+        }
+    }
+
+    // Period names or quiz keys ("postImpressionism")
+    func loadPeriods(named names: [String]) {
+        loadPeriods(names.compactMap { ArtPeriod(matching: $0) })
+    }
+
+    private func add(_ loaded: [Painting]) {
+        paintings.append(contentsOf: loaded)
+        for painting in loaded where paintingsById[painting.id] == nil {
+            paintingsById[painting.id] = painting
+        }
+        searchPaintings()
+    }
+
+    // Paintings for aggregate ids, in the order given
+    func paintings(withIds ids: [String]) -> [Painting] {
+        ids.compactMap { UUID(uuidString: $0).flatMap { paintingsById[$0] } }
+    }
+
+    func periodAggregate(for period: ArtPeriod) -> PeriodAggregate? {
+        periodAggregates[period.rawValue]
+    }
+
     func searchPaintings() {
         var results = paintings
 
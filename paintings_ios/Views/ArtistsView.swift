@@ -10,13 +10,14 @@ import SwiftUI
 struct ArtistsView: View {
     @ObservedObject var viewModel: PaintingsViewModel
 
-    var uniqueArtists: [String] {
-        Array(Set(viewModel.paintings.map { $0.artist })).sorted()
+    // Sorted, with counts, precomputed by build_catalog_manifest.py
+    var artists: [ArtistAggregate] {
+        viewModel.aggregates?.artists ?? []
     }
 
     var body: some View {
         List {
-            ForEach(uniqueArtists, id: \.self) { artist in
+            ForEach(artists, id: \.name) { artist in
                 NavigationLink(destination: ArtistDetailView(artist: artist, viewModel: viewModel)) {
                     HStack {
                         ZStack {
@@ -34,10 +35,10 @@ struct ArtistsView: View {
                         .clipShape(Circle())
 
                         VStack(alignment: .leading, spacing: 4) {
-                            Text(artist)
+                            Text(artist.name)
                                 .font(.headline)
 
-                            Text("\(viewModel.paintings.filter { $0.artist == artist }.count) paintings")
+                            Text("\(artist.count) paintings")
                                 .font(.caption)
                                 .foregroundStyle(.secondary)
                         }
@@ -51,17 +52,21 @@ struct ArtistsView: View {
 }
 
 struct ArtistDetailView: View {
-    let artist: String
+    let artist: ArtistAggregate
     @ObservedObject var viewModel: PaintingsViewModel
 
     var paintings: [Painting] {
-        viewModel.paintings.filter { $0.artist == artist }
+        viewModel.paintings(withIds: artist.ids)
     }
 
     var body: some View {
         List(paintings) { painting in
             PaintingRow(painting: painting)
         }
-        .navigationTitle(artist)
+        .navigationTitle(artist.name)
+        .task {
+            // Only the artist's periods are decoded
+            viewModel.loadPeriods(named: artist.periods)
+        }
     }
 }
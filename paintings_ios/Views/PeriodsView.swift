@@ -15,19 +15,21 @@ struct PeriodsView: View {
         horizontalSizeClass == .regular ? 100 : 80
     }
 
-    func paintingsForPeriod(_ period: ArtPeriod) -> [Painting] {
-        viewModel.paintings.filter { $0.period == period }
+    // Painting count from the precomputed aggregates (see build_catalog_manifest.py)
+    func paintingCount(for period: ArtPeriod) -> Int {
+        viewModel.periodAggregate(for: period)?.count ?? 0
     }
 
-    func mostFamousPainting(for period: ArtPeriod) -> Painting? {
-        paintingsForPeriod(period).first
+    // First painting of the period, from the manifest (no period is decoded here)
+    func mostFamousPainting(for period: ArtPeriod) -> PeriodPreview? {
+        viewModel.catalogPeriod(for: period)?.preview
     }
 
     var body: some View {
         List {
             ForEach(ArtPeriod.allCases, id: \.self) { period in
-                let paintings = paintingsForPeriod(period)
-                if !paintings.isEmpty {
+                let count = paintingCount(for: period)
+                if count > 0 {
                     NavigationLink(destination: PeriodDetailView(period: period, viewModel: viewModel)) {
                         HStack(alignment: .center, spacing: 12) {
                             // Painting preview
@@ -65,7 +67,7 @@ struct PeriodsView: View {
                                 Text(period.displayName)
                                     .font(.headline)
 
-                                Text("\(paintings.count) painting\(paintings.count == 1 ? "" : "s")")
+                                Text("\(count) painting\(count == 1 ? "" : "s")")
                                     .font(.subheadline)
                                     .foregroundStyle(.secondary)
 
@@ -92,8 +94,9 @@ struct PeriodDetailView: View {
     let period: ArtPeriod
     @ObservedObject var viewModel: PaintingsViewModel
 
+    // The pages loaded so far, in period order
     var paintings: [Painting] {
-        viewModel.paintings.filter { $0.period == period }
+        viewModel.paintings(withIds: viewModel.periodAggregate(for: period)?.ids ?? [])
     }
 
     var body: some View {
@@ -102,9 +105,25 @@ struct PeriodDetailView: View {
                 ForEach(paintings) { painting in
                     PaintingRow(painting: painting)
                         .padding(.horizontal)
+                        .onAppear {
+                            // Next page when the last loaded row scrolls into view
+                            if painting.id == paintings.last?.id {
+                                viewModel.loadNextPage(of: period)
+                            }
+                        }
+                }
+
+                if !viewModel.isFullyLoaded(period) {
+                    ProgressView()
+                        .padding()
                 }
             }
         }
         .navigationTitle(period.displayName)
+        .task {
+            if paintings.isEmpty {
+                viewModel.loadNextPage(of: period)
+            }
+        }
     }
 }
@@ -44,6 +44,10 @@ struct QuizDetailView: View {
                 set: { if !$0 { selectedPainting = nil } }
             ))
         }
+        .task {
+            // Example paintings come from the periods this quiz covers
+            viewModel.loadPeriods(named: quiz.coversPeriods)
+        }
     }
 
     @ViewBuilder
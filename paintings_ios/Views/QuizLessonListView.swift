@@ -104,7 +104,7 @@ struct QuizLessonListView: View {
                     }
 
                     Text(quiz.coversPeriods.compactMap { periodString in
-                        ArtPeriod(rawValue: periodString)?.displayName
+                        ArtPeriod(matching: periodString)?.displayName
                     }.joined(separator: ", "))
                         .font(.caption)
                         .foregroundStyle(.secondary)
@@ -194,7 +194,9 @@ struct QuizSessionView: View {
         }
         .navigationTitle(quiz.title)
         .navigationBarTitleDisplayMode(.inline)
-        .onAppear {
+        .task {
+            // The quiz's periods are decoded when it starts
+            viewModel.loadPeriods(named: quiz.coversPeriods)
             generateQuestions()
         }
     }
@@ -347,7 +349,7 @@ struct QuizSessionView: View {
 
     func generateQuestions() {
         var generatedQuestions: [QuizQuestion] = []
-        let coveredPeriods = quiz.coversPeriods.compactMap { ArtPeriod(rawValue: $0) }
+        let coveredPeriods = quiz.coversPeriods.compactMap { ArtPeriod(matching: $0) }
         let relevantPaintings = viewModel.paintings.filter { coveredPeriods.contains($0.period) }
 
         let questionsPerType = quiz.settings.questionsPerSession / 2  // 5 of each type
@@ -48,8 +48,8 @@ struct QuizView: View {
             // Individual period lessons
             Section {
                 ForEach(ArtPeriod.allCases, id: \.self) { period in
-                    let paintings = viewModel.paintings.filter { $0.period == period }
-                    if !paintings.isEmpty {
+                    let count = viewModel.periodAggregate(for: period)?.count ?? 0
+                    if count > 0 {
                         NavigationLink(destination: QuizLessonListView(viewModel: viewModel, lessonType: .specificPeriod(period))) {
                             HStack(spacing: 16) {
                                 ZStack {
@@ -70,7 +70,7 @@ struct QuizView: View {
                                     Text(period.displayName)
                                         .font(.headline)
 
-                                    Text("\(paintings.count) painting\(paintings.count == 1 ? "" : "s")")
+                                    Text("\(count) painting\(count == 1 ? "" : "s")")
                                         .font(.caption)
                                         .foregroundStyle(.secondary)
                                 }
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Per-stage profiling hooks shared by the pipeline scripts.
+
+A script adds the option with add_profile_argument(parser), creates a profiler
+with create_profiler(name, args.profile) and marks its stages:
+
+    profiler.begin('read_csv')
+    ...
+    profiler.begin('download')
+    ...
+    profiler.finish()
+
+With --profile DIR every stage gets a cProfile pstats file, a flamegraph
+collapsed-stack file (for flamegraph.pl / speedscope), wall vs CPU time and
+peak tracemalloc allocation, summarised in DIR/<script>.summary.json.
+Without --profile the profiler is a no-op object.
+"""
+
+import cProfile
+import json
+import os
+import pstats
+import time
+import tracemalloc
+from pathlib import Path
+
+
+def add_profile_argument(parser):
+    """Add the common --profile option to an argparse parser."""
+    parser.add_argument(
+        '--profile', metavar='DIR',
+        help='profile each stage (cProfile + tracemalloc) and write results to DIR',
+    )
+
+
+def create_profiler(script_name, profile_dir):
+    """Return a StageProfiler when profile_dir is set, otherwise a no-op."""
+    if not profile_dir:
+        return NULL_PROFILER
+    return StageProfiler(script_name, profile_dir)
+
+
+class NullProfiler:
+    """Profiler stand-in used when profiling is off."""
+
+    def begin(self, stage):
+        pass
+
+    def end(self):
+        pass
+
+    def finish(self):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
+
+
+class StageProfiler:
+    """Profiles consecutive stages of one script run."""
+
+    def __init__(self, script_name, profile_dir):
+        self.script_name = script_name
+        self.profile_dir = Path(profile_dir)
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+        self.stages = []
+        self._current = None
+        self._profile = None
+        self._started_tracemalloc = False
+
+    def begin(self, stage):
+        """Start a new stage, ending the current one if any."""
+        self.end()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        tracemalloc.reset_peak()
+        self._current = {
+            'stage': stage,
+            'wall_start': time.perf_counter(),
+            'cpu_start': time.process_time(),
+        }
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+
+    def end(self):
+        """End the current stage and write its profile files."""
+        if self._current is None:
+            return
+        self._profile.disable()
+        wall = time.perf_counter() - self._current['wall_start']
+        cpu = time.process_time() - self._current['cpu_start']
+        _, peak = tracemalloc.get_traced_memory()
+
+        stage = self._current['stage']
+        base = self.profile_dir / f"{self.script_name}.{stage}"
+        stats = pstats.Stats(self._profile)
+        stats.dump_stats(f"{base}.pstats")
+        with open(f"{base}.collapsed", 'w', encoding='utf-8') as f:
+            for stack, micros in collapsed_stacks(stats):
+                f.write(f"{stack} {micros}\n")
+
+        self.stages.append({
+            'stage': stage,
+            'wall_s': round(wall, 4),
+            'cpu_s': round(cpu, 4),
+            # Time not spent on the CPU: network and disk waits, sleeps
+            'wait_s': round(max(wall - cpu, 0.0), 4),
+            'peak_alloc_kb': round(peak / 1024, 1),
+        })
+        self._current = None
+        self._profile = None
+
+    def finish(self):
+        """End the last stage, write the summary and print it."""
+        self.end()
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+        summary_file = self.profile_dir / f"{self.script_name}.summary.json"
+        with open(summary_file, 'w', encoding='utf-8') as f:
+            json.dump({'script': self.script_name, 'stages': self.stages}, f, indent=2)
+
+        print(f"\n{'='*70}")
+        print(f"PROFILE: {self.script_name}")
+        print(f"{'='*70}")
+        print(f"{'stage':<20} {'wall s':>9} {'cpu s':>9} {'wait s':>9} {'peak KB':>11}")
+        for s in self.stages:
+            print(f"{s['stage']:<20} {s['wall_s']:>9.3f} {s['cpu_s']:>9.3f} "
+                  f"{s['wait_s']:>9.3f} {s['peak_alloc_kb']:>11.1f}")
+        print(f"Profiles written to {self.profile_dir}/")
+        print(f"{'='*70}")
+
+
+def _frame_label(func):
+    filename, lineno, name = func
+    if filename == '~':
+        return name.replace(';', ',')
+    return f"{name} ({os.path.basename(filename)}:{lineno})".replace(';', ',')
+
+
+def collapsed_stacks(stats):
+    """
+    Approximate flamegraph stacks from a pstats call graph.
+
+    cProfile only records caller -> callee edges, so each function's own time
+    is attributed to the chain of its heaviest callers up to a root.
+    """
+    entries = stats.stats
+    heaviest_caller = {}
+    for func, (_, _, _, _, callers) in entries.items():
+        if callers:
+            # callers maps caller -> (cc, nc, tt, ct); pick by cumulative time
+            heaviest_caller[func] = max(callers.items(), key=lambda item: item[1][3])[0]
+
+    stacks = {}
+    for func, (_, _, own_time, _, _) in entries.items():
+        micros = int(own_time * 1_000_000)
+        if micros <= 0:
+            continue
+        chain = [func]
+        seen = {func}
+        caller = heaviest_caller.get(func)
+        while caller is not None and caller not in seen:
+            chain.append(caller)
+            seen.add(caller)
+            caller = heaviest_caller.get(caller)
+        stack = ';'.join(_frame_label(f) for f in reversed(chain))
+        stacks[stack] = stacks.get(stack, 0) + micros
+
+    return sorted(stacks.items())
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Remote content metadata for image URLs, used to skip re-downloading files
+that are already present and identical.
+
+    Commons originals   imageinfo iiprop=sha1|size (exact content digest)
+    anything else       HEAD: ETag and Content-Length (Commons thumbnails
+                        and WikiArt renditions have no published digest)
+
+compare_local() decides whether a local file matches the remote resource,
+using the digest when there is one and otherwise the ETag/size recorded when
+the file was last downloaded. A file is only ever found stale against the
+URL it was downloaded from; without that provenance the verdict is
+'unknown' and the file is kept.
+"""
+
+import urllib.parse
+
+from fetch import fetch_headers, fetch_json
+
+COMMONS_API = 'https://commons.wikimedia.org/w/api.php'
+UPLOAD_HOST = 'upload.wikimedia.org'
+
+
+def commons_original_name(url):
+    """File name for an upload.wikimedia.org original, or None (thumbs included)."""
+    parts = urllib.parse.urlsplit(url)
+    if parts.hostname != UPLOAD_HOST or '/thumb/' in parts.path:
+        return None
+    # Page titles use spaces where upload paths use underscores
+    return urllib.parse.unquote(parts.path.rsplit('/', 1)[-1]).replace('_', ' ')
+
+
+def probe_remote(url):
+    """Return {'size', 'sha1'?, 'etag'?} for an image URL (raises on network errors)."""
+    name = commons_original_name(url)
+    if name:
+        query = urllib.parse.urlencode({
+            'action': 'query', 'titles': f"File:{name}", 'prop': 'imageinfo',
+            'iiprop': 'sha1|size', 'format': 'json',
+        })
+        pages = fetch_json(f"{COMMONS_API}?{query}").get('query', {}).get('pages', {})
+        for page in pages.values():
+            if page.get('imageinfo'):
+                info = page['imageinfo'][0]
+                return {'size': info['size'], 'sha1': info['sha1']}
+
+    headers = fetch_headers(url)
+    metadata = {}
+    if headers.get('content-length'):
+        metadata['size'] = int(headers['content-length'])
+    if headers.get('etag'):
+        metadata['etag'] = headers['etag']
+    return metadata
+
+
+def compare_local(local, remote, url, source_url=None):
+    """
+    Compare a local digest-cache entry with remote metadata for url.
+
+    source_url is where the file was downloaded from (default: the one
+    recorded in the entry). Returns 'identical', 'stale' or 'unknown'
+    (nothing to compare against, or url isn't where the file came from).
+    """
+    if not remote:
+        return 'unknown'
+    source_url = source_url or local.get('source_url')
+    if remote.get('sha1') and remote['sha1'] == local['sha1']:
+        return 'identical'
+    # Another URL (e.g. a different rendition) says nothing about this file
+    if source_url != url:
+        return 'unknown'
+    if remote.get('sha1'):
+        return 'stale'
+    if 'size' in remote and remote['size'] != local['size']:
+        return 'stale'
+    # ETags are only comparable if we saw one when downloading
+    if remote.get('etag') and local.get('etag'):
+        return 'identical' if remote['etag'] == local['etag'] else 'stale'
+    return 'identical' if 'size' in remote else 'unknown'
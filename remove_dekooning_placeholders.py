@@ -3,10 +3,10 @@
 Remove de Kooning placeholder images and update CSV/JSON to reflect unavailability.
 """
 
-import json
-import csv
 from pathlib import Path
 
+from stream_transform import transform_csv, transform_json
+
 def main():
     # Remove the placeholder images
     placeholder_images = [
@@ -33,38 +33,29 @@ def main():
         "e12c68b8-60b8-46d1-8ed1-0a9d69c1b6cb"   # Gotham News
     ]
 
-    rows = []
-    with open(csv_file, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            if row['id'] in painting_ids:
-                row['wikiart_url'] = ''  # Clear the URL
-            rows.append(row)
-
-    # Write updated CSV
-    with open(csv_file, 'w', newline='', encoding='utf-8') as f:
-        if rows:
-            writer = csv.DictWriter(f, fieldnames=rows[0].keys())
-            writer.writeheader()
-            writer.writerows(rows)
+    def clear_url(row):
+        if row['id'] in painting_ids:
+            row['wikiart_url'] = ''  # Clear the URL
+        return row
+
+    transform_csv(csv_file, [clear_url])
 
     print(f"✅ Updated CSV: Removed WikiArt URLs for de Kooning paintings")
 
     # Update JSON to clear imageNames
     json_file = Path('paintings_ios/Resources/Data/Periods/abstract_expressionism.json')
 
-    with open(json_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-
     updated_count = 0
-    for painting in data['paintings']:
+
+    def clear_image_name(painting):
+        nonlocal updated_count
         if painting['id'] in painting_ids:
             painting['imageName'] = ''
             print(f"✅ Cleared imageName for: {painting['title']}")
             updated_count += 1
+        return painting
 
-    with open(json_file, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    transform_json(json_file, [clear_image_name])
 
     print(f"✅ Updated: {json_file.name}")
 
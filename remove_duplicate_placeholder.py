@@ -3,9 +3,10 @@
 Remove the duplicate Hockney image and clear imageName in JSON.
 """
 
-import json
 from pathlib import Path
 
+from stream_transform import transform_json
+
 def main():
     # Remove the duplicate image file
     duplicate_image = Path('paintings_ios/Resources/Images/david-hockney-peter-getting-out-of-nicks-pool.jpg')
@@ -18,17 +19,13 @@ def main():
     painting_id = "d15c7e4f-8b50-4e3c-b9f0-62b7c3657a13"
     json_file = Path('paintings_ios/Resources/Data/Periods/pop_art.json')
 
-    with open(json_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-
-    for painting in data['paintings']:
+    def clear_image_name(painting):
         if painting['id'] == painting_id:
             painting['imageName'] = ''
             print(f"✅ Cleared imageName for: {painting['title']}")
-            break
+        return painting
 
-    with open(json_file, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    transform_json(json_file, [clear_image_name])
 
     print(f"✅ Updated: {json_file.name}")
 
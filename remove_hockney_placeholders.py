@@ -3,10 +3,10 @@
 Remove Hockney placeholder images and update CSV/JSON to reflect unavailability.
 """
 
-import json
-import csv
 from pathlib import Path
 
+from stream_transform import transform_csv, transform_json
+
 def main():
     # Remove the placeholder image
     placeholder_image = Path('paintings_ios/Resources/Images/david-hockney-a-bigger-splash.jpg')
@@ -22,38 +22,29 @@ def main():
         "d15c7e4f-8b50-4e3c-b9f0-62b7c3657a13"   # Peter Getting Out of Nick's Pool
     ]
 
-    rows = []
-    with open(csv_file, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            if row['id'] in painting_ids:
-                row['wikiart_url'] = ''  # Clear the URL
-            rows.append(row)
+    def clear_url(row):
+        if row['id'] in painting_ids:
+            row['wikiart_url'] = ''  # Clear the URL
+        return row
 
-    # Write updated CSV
-    with open(csv_file, 'w', newline='', encoding='utf-8') as f:
-        if rows:
-            writer = csv.DictWriter(f, fieldnames=rows[0].keys())
-            writer.writeheader()
-            writer.writerows(rows)
+    transform_csv(csv_file, [clear_url])
 
     print(f"✅ Updated CSV: Removed WikiArt URLs for both Hockney paintings")
 
     # Update JSON to clear imageNames
     json_file = Path('paintings_ios/Resources/Data/Periods/pop_art.json')
 
-    with open(json_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-
     updated_count = 0
-    for painting in data['paintings']:
+
+    def clear_image_name(painting):
+        nonlocal updated_count
         if painting['id'] in painting_ids:
             painting['imageName'] = ''
             print(f"✅ Cleared imageName for: {painting['title']}")
             updated_count += 1
+        return painting
 
-    with open(json_file, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    transform_json(json_file, [clear_image_name])
 
     print(f"✅ Updated: {json_file.name}")
 
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Resolve an image for each painting from WikiArt, Wikidata and Wikipedia in a
+single pass, querying the sources concurrently or in a hedged order.
+
+For every painting the sources are ranked by expected time-to-image (median
+latency divided by hit rate), using statistics observed for the painting's
+artist, then its period, then overall. The best source starts immediately;
+each next one starts after a hedge delay derived from the previous source's
+latency percentiles and hit rate, or as soon as it comes back empty. The
+first result that passes validation wins and sources not yet started are
+cancelled. Hit rates and latencies persist in .cache/resolver_stats.json.
+
+Results go to the same CSV columns as the single-source scripts (wikiart_url
+for WikiArt pages, wikipedia_url for Wikidata/Wikipedia image URLs) and the
+winning source is recorded in image_manifest.json.
+
+Paintings are taken in priority order (see work_scheduler.py); --deadline
+bounds the run to the most valuable work that fits.
+
+With --trace FILE, each painting is recorded as a trace with a span per
+source it raced, including sources still running after another won
+(see tracing.py).
+"""
+
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+from allocate_filenames import load_period_paintings
+from download_wikiart_images import get_image_url_from_wikiart
+from fetch import print_fetch_stats
+from file_digests import CACHE_DIR, write_json_atomic
+from find_wikiart_urls_fast import find_wikiart_url
+from find_wikidata_images import search_wikidata
+from find_wikipedia_urls import get_wikipedia_image_url, search_wikipedia
+from image_manifest import load_manifest, manifest_entry, save_manifest
+from image_renditions import apply_size_policy, rendition_label
+from profiling import add_profile_argument, create_profiler
+from remote_metadata import probe_remote
+from stream_transform import iter_csv, transform_csv
+from tracing import add_trace_arguments, bind, create_tracer, span, trace
+from work_scheduler import Budget, Scheduler, add_schedule_arguments, csv_history
+
+STATS_FILE = CACHE_DIR / 'resolver_stats.json'
+
+# Used until a source has been observed often enough
+DEFAULT_LATENCY = {'wikiart': 1.5, 'wikidata': 2.0, 'wikipedia': 2.0}
+DEFAULT_HIT_RATE = {'wikiart': 0.4, 'wikidata': 0.5, 'wikipedia': 0.4}
+MIN_SAMPLES = 3
+MAX_SAMPLES = 64
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.tif', '.tiff', '.webp')
+
+
+def resolve_wikiart(painting):
+    page_url = find_wikiart_url(painting['artist'], painting['title'], painting['year'])
+    if not page_url:
+        return None
+    image_url = apply_size_policy(get_image_url_from_wikiart(page_url))
+    return {'image_url': image_url, 'page_url': page_url} if image_url else None
+
+
+def resolve_wikidata(painting):
+    image_url = search_wikidata(painting['title'], painting['artist'], painting.get('year'))
+    return {'image_url': image_url} if image_url else None
+
+
+def resolve_wikipedia(painting):
+    page = search_wikipedia(painting['title'], painting['artist'], painting.get('year'))
+    if not page:
+        return None
+    image_url = get_wikipedia_image_url(page)
+    return {'image_url': image_url, 'page_title': page} if image_url else None
+
+
+SOURCES = {
+    'wikiart': resolve_wikiart,
+    'wikidata': resolve_wikidata,
+    'wikipedia': resolve_wikipedia,
+}
+
+
+def is_valid_image_url(url):
+    """Reject non-images and the icons/logos Wikipedia pages often lead with."""
+    if not url or not url.startswith(('http://', 'https://')):
+        return False
+    path = url.split('?', 1)[0].lower()
+    # WikiArt size suffixes look like "...jpg!Large.jpg"
+    if not path.split('!', 1)[0].endswith(IMAGE_EXTENSIONS):
+        return False
+    name = path.rsplit('/', 1)[-1]
+    return not any(word in name for word in ('logo', 'icon', 'symbol', 'flag_of'))
+
+
+class SourceStats:
+    """Per-source hit counts and latency samples by artist, period and overall."""
+
+    def __init__(self, path=STATS_FILE):
+        self.path = Path(path)
+        self.lock = threading.Lock()
+        self.data = {}
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.data = json.load(f)
+
+    def _buckets(self, source, painting):
+        return [f"{source}|artist:{painting['artist']}",
+                f"{source}|period:{painting['period']}",
+                f"{source}|all"]
+
+    def record(self, source, painting, hit, latency):
+        with self.lock:
+            for key in self._buckets(source, painting):
+                bucket = self.data.setdefault(key, {'attempts': 0, 'hits': 0, 'latencies': []})
+                bucket['attempts'] += 1
+                bucket['hits'] += int(hit)
+                bucket['latencies'] = (bucket['latencies'] + [round(latency, 3)])[-MAX_SAMPLES:]
+
+    def estimate(self, source, painting):
+        """Return (hit rate, p50 latency, p90 latency) for a source and painting."""
+        with self.lock:
+            buckets = [self.data.get(key) for key in self._buckets(source, painting)]
+        overall = buckets[-1]
+        prior = (overall['hits'] / overall['attempts']
+                 if overall and overall['attempts'] >= MIN_SAMPLES else DEFAULT_HIT_RATE[source])
+
+        hit_rate, latencies = prior, []
+        for bucket in buckets:
+            if bucket and bucket['attempts'] >= MIN_SAMPLES:
+                # Smooth towards the overall rate so small buckets don't dominate
+                hit_rate = (bucket['hits'] + 2 * prior) / (bucket['attempts'] + 2)
+                latencies = sorted(bucket['latencies'])
+                break
+        if not latencies:
+            return hit_rate, DEFAULT_LATENCY[source], DEFAULT_LATENCY[source] * 2
+        p50 = latencies[len(latencies) // 2]
+        p90 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.9))]
+        return hit_rate, p50, p90
+
+    def save(self):
+        with self.lock:
+            write_json_atomic(self.path, self.data)
+
+
+def plan_sources(stats, painting, sources, concurrent):
+    """Return [(source, start delay in seconds)] ordered by expected time-to-image."""
+    estimates = {source: stats.estimate(source, painting) for source in sources}
+    order = sorted(sources, key=lambda s: estimates[s][1] / max(estimates[s][0], 0.05))
+    if concurrent:
+        return [(source, 0.0) for source in order]
+
+    plan = []
+    delay = 0.0
+    for source in order:
+        plan.append((source, delay))
+        hit_rate, _, p90 = estimates[source]
+        # A source that rarely hits is not worth waiting for
+        delay += p90 * min(1.0, hit_rate * 2)
+    return plan
+
+
+def resolve_painting(painting, stats, pool, sources, concurrent):
+    """Race the sources for one painting; return (source, result, elapsed) or (None, None, elapsed)."""
+    plan = plan_sources(stats, painting, sources, concurrent)
+    cancelled = threading.Event()
+    start = time.perf_counter()
+
+    def run(source):
+        if cancelled.is_set():
+            return source, None, 0.0
+        began = time.perf_counter()
+        with span('source', source=source) as source_span:
+            try:
+                result = SOURCES[source](painting)
+            except Exception as e:
+                print(f"    {source} error: {e}")
+                source_span.set(error=str(e))
+                result = None
+            latency = time.perf_counter() - began
+            if result and not is_valid_image_url(result['image_url']):
+                source_span.set(rejected_url=result['image_url'])
+                result = None
+            source_span.set(hit=bool(result))
+        stats.record(source, painting, bool(result), latency)
+        return source, result, latency
+
+    pending = set()
+    waiting = list(plan)
+    winner = None
+    while waiting or pending:
+        now = time.perf_counter() - start
+        # Launch every source whose hedge delay has passed, or the next one
+        # if nothing is in flight any more
+        while waiting and (waiting[0][1] <= now or not pending):
+            pending.add(pool.submit(bind(run), waiting.pop(0)[0]))
+        timeout = max(waiting[0][1] - now, 0.0) if waiting else None
+        done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        for future in done:
+            source, result, _ = future.result()
+            if result and winner is None:
+                winner = (source, result)
+        if winner:
+            cancelled.set()
+            break
+
+    elapsed = time.perf_counter() - start
+    if winner:
+        return winner[0], winner[1], elapsed
+    return None, None, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Resolve painting images from all sources in one pass.')
+    parser.add_argument('--csv', default='paintings_wikiart_urls.csv')
+    parser.add_argument('--all', action='store_true', help='re-resolve paintings that already have a URL')
+    parser.add_argument('--sources', nargs='+', default=list(SOURCES), choices=list(SOURCES))
+    parser.add_argument('--concurrent', action='store_true',
+                        help='start all sources at once instead of hedging')
+    parser.add_argument('--paintings-in-flight', type=int, default=4)
+    parser.add_argument('--delay', type=float, default=0.2,
+                        help='pause after each painting per worker, to be nice to the servers')
+    parser.add_argument('--stats', default=str(STATS_FILE))
+    add_schedule_arguments(parser)
+    add_profile_argument(parser)
+    add_trace_arguments(parser)
+    args = parser.parse_args(argv)
+    profiler = create_profiler('resolve_images', args.profile)
+    tracer = create_tracer('resolve_images', args.trace, args.trace_sample, args.trace_format)
+
+    profiler.begin('read_csv')
+    rows = list(iter_csv(args.csv))
+    for row in rows:
+        row.setdefault('wikipedia_url', '')
+
+    todo = [row for row in rows
+            if args.all or not (row.get('wikiart_url') or row.get('wikipedia_url'))]
+    print(f"Resolving {len(todo)} of {len(rows)} paintings "
+          f"({'concurrent' if args.concurrent else 'hedged'}: {', '.join(args.sources)})\n")
+
+    manifest = load_manifest()
+    profiler.begin('schedule')
+    scheduler = Scheduler('resolve_images', load_period_paintings(), manifest, csv_history(rows))
+    if not args.file_order:
+        total = len(todo)
+        fitting, rest = scheduler.plan(todo, args.deadline, parallelism=max(1, args.paintings_in_flight))
+        scheduler.describe(fitting, total)
+        todo = fitting + rest
+        print()
+    budget = Budget(args.deadline)
+
+    profiler.begin('resolve')
+    stats = SourceStats(args.stats)
+    found = {source: 0 for source in args.sources}
+    resolved = {}        # painting id -> updated CSV columns
+    times = []
+    lock = threading.Lock()
+    counter = iter(range(1, len(todo) + 1))
+
+    source_pool = ThreadPoolExecutor(max_workers=max(1, args.paintings_in_flight) * len(args.sources))
+
+    def work(row):
+        with lock:
+            if not budget.fits(scheduler.expected_seconds(row)):
+                return
+        with trace('resolve_painting', row['id'], title=row['title'], artist=row['artist']) as root:
+            source, result, elapsed = resolve_painting(row, stats, source_pool, args.sources, args.concurrent)
+            root.set(winner=source)
+            remote = None
+            if source:
+                # Content metadata lets the downloader skip files it already has
+                try:
+                    with span('probe_remote', url=result['image_url']):
+                        remote = probe_remote(result['image_url'])
+                except Exception as e:
+                    print(f"    Error checking remote: {e}")
+        with lock:
+            i = next(counter)
+            times.append(elapsed)
+            scheduler.observe(row, elapsed, source is not None)
+            if source:
+                found[source] += 1
+                if source == 'wikiart':
+                    resolved[row['id']] = {'wikiart_url': result['page_url']}
+                else:
+                    resolved[row['id']] = {'wikipedia_url': result['image_url']}
+                entry = manifest_entry(manifest, row['id'])
+                entry['source'] = source
+                entry['source_url'] = result['image_url']
+                entry['rendition'] = rendition_label(result['image_url'])
+                if remote:
+                    entry['remote'] = remote
+                print(f"[{i}/{len(todo)}] ✅ {row['title']} - {source} ({elapsed:.2f}s)")
+            else:
+                print(f"[{i}/{len(todo)}] ❌ {row['title']} ({elapsed:.2f}s)")
+        time.sleep(args.delay)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, args.paintings_in_flight)) as painting_pool:
+            list(painting_pool.map(work, todo))
+    finally:
+        source_pool.shutdown(wait=True, cancel_futures=True)
+        # Whatever was resolved is kept, even if the run was cut short; the
+        # CSV is replaced atomically
+        profiler.begin('write')
+        transform_csv(args.csv, [lambda row: {**row, **resolved.get(row['id'], {})}],
+                      add_columns=['wikipedia_url'])
+        save_manifest(manifest)
+        stats.save()
+        scheduler.save()
+
+    total_found = sum(found.values())
+    print(f"\n{'='*70}")
+    print(f"FINAL RESULTS")
+    print(f"{'='*70}")
+    print(f"✅ CSV updated: {args.csv}")
+    print(f"Found: {total_found}/{len(todo)}")
+    if budget.skipped:
+        print(f"⏰ Deadline reached: skipped {budget.skipped} lower-priority paintings")
+    for source, count in found.items():
+        print(f"  {source}: {count}")
+    if times:
+        ordered = sorted(times)
+        print(f"Time-to-image: p50 {ordered[len(ordered) // 2]:.2f}s, "
+              f"p90 {ordered[min(len(ordered) - 1, int(len(ordered) * 0.9))]:.2f}s")
+    print_fetch_stats()
+    tracer.finish()
+    print(f"{'='*70}")
+
+    profiler.finish()
+
+if __name__ == '__main__':
+    main()
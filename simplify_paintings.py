@@ -1,29 +1,14 @@
 #!/usr/bin/env python3
-import json
+from stream_transform import transform_json
 
-# Read current paintings
-with open('paintings_ios/Resources/Data/paintings.json', 'r') as f:
-    data = json.load(f)
+FIELDS = ['id', 'title', 'artist', 'year', 'period', 'imageName', 'museum', 'location']
 
 # Simplify each painting
-simplified_paintings = []
-for painting in data['paintings']:
-    simplified = {
-        'id': painting['id'],
-        'title': painting['title'],
-        'artist': painting['artist'],
-        'year': painting['year'],
-        'period': painting['period'],
-        'imageName': painting['imageName'],
-        'museum': painting['museum'],
-        'location': painting['location']
-    }
-    simplified_paintings.append(simplified)
+def simplify(painting):
+    return {field: painting[field] for field in FIELDS}
 
-# Write simplified version
-output = {'paintings': simplified_paintings}
-with open('paintings_ios/Resources/Data/paintings.json', 'w') as f:
-    json.dump(output, f, indent=2)
+# Rewrite paintings.json one record at a time
+count, _ = transform_json('paintings_ios/Resources/Data/paintings.json', [simplify], ensure_ascii=True)
 
-print(f"✅ Simplified {len(simplified_paintings)} paintings")
+print(f"✅ Simplified {count} paintings")
 print(f"Removed fields: description, dimensions, medium, wikiURL")
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Shared slug engine for WikiArt URLs and image file names.
+
+One set of rules for every script:
+- text is lowercased and folded to ASCII where there is a sensible
+  equivalent (accents dropped, ß -> ss, ø -> o, Cyrillic and Greek
+  transliterated); other scripts such as CJK are kept as they are;
+- parenthesised notes are dropped;
+- apostrophes are dropped ("Campbell's" -> campbells);
+- any other run of punctuation or whitespace becomes one hyphen.
+
+slug_variants() ranks alternative spellings for probing WikiArt (apostrophe
+as a separator, article added or dropped, "No." spelled out, Roman numerals
+as digits), and wikiart_candidates() turns them into URLs.
+
+The regular expressions are compiled once and results are memoized, so the
+scripts can call these per painting (or per candidate) without cost.
+
+    python slugs.py hitrate     # how well candidates cover the recorded URLs
+"""
+
+import argparse
+import csv
+import re
+import unicodedata
+from functools import lru_cache
+
+WIKIART_BASE = 'https://www.wikiart.org/en'
+
+_TRANSLITERATION = str.maketrans({
+    'ß': 'ss', 'æ': 'ae', 'œ': 'oe', 'ø': 'o', 'ł': 'l', 'đ': 'd', 'ð': 'd', 'þ': 'th', 'ı': 'i',
+    # Cyrillic
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'e', 'ж': 'zh', 'з': 'z',
+    'и': 'i', 'й': 'y', 'к': 'k', 'л': 'l', 'м': 'm', 'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r',
+    'с': 's', 'т': 't', 'у': 'u', 'ф': 'f', 'х': 'kh', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh',
+    'щ': 'shch', 'ъ': '', 'ы': 'y', 'ь': '', 'э': 'e', 'ю': 'yu', 'я': 'ya', 'і': 'i', 'ї': 'yi',
+    'є': 'ye', 'ґ': 'g',
+    # Greek (accents are removed by the NFKD step afterwards)
+    'α': 'a', 'β': 'v', 'γ': 'g', 'δ': 'd', 'ε': 'e', 'ζ': 'z', 'η': 'i', 'θ': 'th', 'ι': 'i',
+    'κ': 'k', 'λ': 'l', 'μ': 'm', 'ν': 'n', 'ξ': 'x', 'ο': 'o', 'π': 'p', 'ρ': 'r', 'σ': 's',
+    'ς': 's', 'τ': 't', 'υ': 'y', 'φ': 'f', 'χ': 'ch', 'ψ': 'ps', 'ω': 'o',
+    'ά': 'a', 'έ': 'e', 'ή': 'i', 'ί': 'i', 'ό': 'o', 'ύ': 'y', 'ώ': 'o', 'ϊ': 'i', 'ϋ': 'y',
+})
+
+_PARENTHESES = re.compile(r'\([^)]*\)')
+_APOSTROPHES = re.compile(r"['’ʼ‘`´]")
+_SEPARATORS = re.compile(r'[\W_]+')
+_NUMBER_PREFIX = re.compile(r'(?:^|(?<=-))(no|nr|number)-(?=\d)')
+# Roman numerals up to 39, as used to number series ("The Lovers II")
+_ROMAN = re.compile(r'(?:^|(?<=-))(x{0,3}(?:ix|iv|v?i{0,3}))(?=-|$)')
+_ARTICLES = ('the', 'a', 'an', 'le', 'la', 'les', 'l', 'el', 'los', 'las', 'il', 'lo', 'der', 'die', 'das')
+_ROMAN_VALUES = {'x': 10, 'v': 5, 'i': 1}
+
+
+@lru_cache(maxsize=65536)
+def fold(text):
+    """Lowercase text and fold it to ASCII where there is an equivalent."""
+    text = text.lower().translate(_TRANSLITERATION)
+    return ''.join(c for c in unicodedata.normalize('NFKD', text) if not unicodedata.combining(c))
+
+
+def _slug(text, keep_parens=False, apostrophe=''):
+    text = fold(text)
+    if not keep_parens:
+        text = _PARENTHESES.sub('', text)
+    text = _APOSTROPHES.sub(apostrophe, text)
+    return _SEPARATORS.sub('-', text).strip('-')
+
+
+@lru_cache(maxsize=65536)
+def slugify(text):
+    """Convert text to a lowercase, hyphen-separated slug."""
+    return _slug(text)
+
+
+def _roman_to_int(numeral):
+    total = 0
+    for char, following in zip(numeral, numeral[1:] + ' '):
+        value = _ROMAN_VALUES[char]
+        total += -value if _ROMAN_VALUES.get(following, 0) > value else value
+    return total
+
+
+def _roman_as_digits(match):
+    numeral = match.group(1)
+    # A lone "i", "v" or "x" is far more often a word or an initial
+    if len(numeral) < 2:
+        return numeral
+    return str(_roman_to_int(numeral))
+
+
+@lru_cache(maxsize=65536)
+def slug_variants(text, title=True):
+    """
+    Return distinct slugs for text, most likely first.
+
+    The first is always slugify(text). Titles also get article and
+    numbering variants; names only the spelling ones.
+    """
+    primary = _slug(text)
+    variants = [primary, _slug(text, apostrophe='-')]
+    if title:
+        first, _, rest = primary.partition('-')
+        variants.append(rest if first in _ARTICLES and rest else f"the-{primary}")
+    variants.append(_slug(text, keep_parens=True))
+    if title:
+        variants.append(_NUMBER_PREFIX.sub(lambda m: 'number-' if m.group(1) != 'number' else 'no-', primary))
+        variants.append(_ROMAN.sub(_roman_as_digits, primary))
+    return tuple(dict.fromkeys(v for v in variants if v))
+
+
+@lru_cache(maxsize=65536)
+def wikiart_candidates(artist, title, year, limit=8):
+    """
+    Ranked WikiArt page URLs for a painting, at most limit of them.
+
+    The year-suffixed form comes first: it is the one most recorded
+    URLs use.
+    """
+    urls = []
+    for artist_slug in slug_variants(artist, title=False)[:2]:
+        for title_slug in slug_variants(title):
+            base = f"{WIKIART_BASE}/{artist_slug}/{title_slug}"
+            urls += [f"{base}-{year}", base] if year else [base]
+    return tuple(dict.fromkeys(urls))[:limit]
+
+
+def hit_rate(rows, limit=8):
+    """Return (recorded URLs, how many the candidates cover, mean 1-based rank of those)."""
+    recorded = covered = rank_total = 0
+    for row in rows:
+        url = row.get('wikiart_url')
+        if not url:
+            continue
+        recorded += 1
+        candidates = wikiart_candidates(row['artist'], row['title'], row['year'], limit)
+        if url in candidates:
+            covered += 1
+            rank_total += candidates.index(url) + 1
+    return recorded, covered, rank_total / max(covered, 1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Inspect slugs and WikiArt candidate URLs.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    show = subparsers.add_parser('show', help='print the slug variants for some text')
+    show.add_argument('text')
+    show.add_argument('--artist', help='also print the WikiArt candidates for this artist')
+    show.add_argument('--year', default='')
+    rate = subparsers.add_parser('hitrate', help='check candidates against the URLs recorded in the CSV')
+    rate.add_argument('--csv', default='paintings_wikiart_urls.csv')
+    rate.add_argument('--limit', type=int, default=8, help='candidates per painting')
+    args = parser.parse_args(argv)
+
+    if args.command == 'show':
+        for variant in slug_variants(args.text):
+            print(variant)
+        if args.artist:
+            print()
+            for url in wikiart_candidates(args.artist, args.text, args.year):
+                print(url)
+        return
+
+    with open(args.csv, 'r', encoding='utf-8', newline='') as f:
+        rows = list(csv.DictReader(f))
+    recorded, covered, mean_rank = hit_rate(rows, args.limit)
+    probes = sum(len(wikiart_candidates(row['artist'], row['title'], row['year'], args.limit))
+                 for row in rows if not row.get('wikiart_url'))
+    print(f"Recorded WikiArt URLs: {recorded}")
+    print(f"{'✅' if covered == recorded else '⚠️ '} Covered by candidates: {covered}/{recorded}, "
+          f"mean rank {mean_rank:.2f}")
+    print(f"Candidates for the {len(rows) - recorded} paintings without a URL: {probes}")
+    if covered < recorded:
+        raise SystemExit(1)
+
+if __name__ == '__main__':
+    main()
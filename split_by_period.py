@@ -1,38 +1,33 @@
 #!/usr/bin/env python3
-import json
 import os
-from collections import defaultdict
+from contextlib import ExitStack
 
-# Read the main paintings.json
-with open('paintings_ios/Resources/Data/paintings.json', 'r') as f:
-    data = json.load(f)
+from stream_transform import JsonArrayWriter, iter_json_array
 
-# Group paintings by period
-paintings_by_period = defaultdict(list)
-for painting in data['paintings']:
-    # Add empty imageName field if missing
-    if 'imageName' not in painting:
-        painting['imageName'] = ""
-
-    period = painting['period']
-    paintings_by_period[period].append(painting)
-
-# Create output directory if needed
+# Stream the main paintings.json into one writer per period, so memory
+# stays flat however large the monolith is
 output_dir = 'paintings_ios/Resources/Data/Periods'
 os.makedirs(output_dir, exist_ok=True)
 
-# Write each period to a separate file
-for period, paintings in sorted(paintings_by_period.items()):
-    # Convert period name to snake_case filename
-    filename = period.lower().replace(' / ', '_').replace(' ', '_') + '.json'
-    filepath = os.path.join(output_dir, filename)
-
-    output = {'paintings': paintings}
-
-    with open(filepath, 'w') as f:
-        json.dump(output, f, indent=2, ensure_ascii=False)
-
-    print(f"✅ Created {filename} with {len(paintings)} paintings")
+writers = {}
+filenames = {}
+total = 0
+with ExitStack() as stack:
+    for painting in iter_json_array('paintings_ios/Resources/Data/paintings.json'):
+        # Add empty imageName field if missing
+        if 'imageName' not in painting:
+            painting['imageName'] = ""
+
+        period = painting['period']
+        if period not in writers:
+            # Convert period name to snake_case filename
+            filenames[period] = period.lower().replace(' / ', '_').replace(' ', '_') + '.json'
+            writers[period] = stack.enter_context(JsonArrayWriter(os.path.join(output_dir, filenames[period])))
+        writers[period].write(painting)
+        total += 1
+
+for period, writer in sorted(writers.items()):
+    print(f"✅ Created {filenames[period]} with {writer.count} paintings")
 
 print(f"\n📁 All files created in {output_dir}/")
-print(f"📊 Total: {len(data['paintings'])} paintings across {len(paintings_by_period)} periods")
+print(f"📊 Total: {total} paintings across {len(writers)} periods")
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Constant-memory transforms for the catalog CSV and paintings JSON files.
+
+Rows and records are streamed one at a time through a list of stages and
+written to a temp file next to the output, which is renamed over it only
+when the whole pass succeeded. An interrupted run leaves the old file intact,
+and memory use does not grow with the catalog size.
+
+A stage is a callable taking one row/record (a dict) and returning it,
+a replacement, or None to drop it:
+
+    transform_csv('paintings_wikiart_urls.csv', [clear_url], add_columns=['wikipedia_url'])
+    transform_json('paintings.json', [simplify])
+
+    for painting in iter_json_array('paintings.json'):
+        ...
+
+Output JSON is byte-for-byte what json.dump(..., indent=2) would write for
+the same {"paintings": [...]} document.
+"""
+
+import csv
+import json
+import os
+import tempfile
+from pathlib import Path
+
+CHUNK_SIZE = 64 * 1024
+ARRAY_KEY = 'paintings'
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+_NUMBER_CHARS = '0123456789.eE+-'
+
+
+def _apply(stages, item):
+    for stage in stages:
+        item = stage(item)
+        if item is None:
+            return None
+    return item
+
+
+class AtomicOutput:
+    """Text file written under a temp name and renamed into place on success."""
+
+    def __init__(self, path, newline=None):
+        self.path = Path(path)
+        self.newline = newline
+
+    def __enter__(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, self.tmp_name = tempfile.mkstemp(dir=self.path.parent, prefix=f".{self.path.name}.", suffix='.tmp')
+        self.file = os.fdopen(fd, 'w', encoding='utf-8', newline=self.newline)
+        return self.file
+
+    def __exit__(self, exc_type, exc, tb):
+        self.file.close()
+        if exc_type is None:
+            os.replace(self.tmp_name, self.path)
+        else:
+            os.unlink(self.tmp_name)
+        return False
+
+
+# CSV
+
+def iter_csv(path):
+    """Yield the rows of a CSV file as dicts."""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        yield from csv.DictReader(f)
+
+
+def count_csv(path, predicate=None):
+    """Count rows (matching predicate) without keeping them."""
+    return sum(1 for row in iter_csv(path) if predicate is None or predicate(row))
+
+
+def transform_csv(path, stages, add_columns=(), output=None):
+    """
+    Stream path through stages into output (default: path itself, replaced atomically).
+
+    Columns in add_columns are appended if missing and default to ''.
+    Returns (rows read, rows written).
+    """
+    read = written = 0
+    with open(path, 'r', encoding='utf-8', newline='') as source:
+        reader = csv.DictReader(source)
+        fieldnames = list(reader.fieldnames or [])
+        fieldnames += [column for column in add_columns if column not in fieldnames]
+        with AtomicOutput(output or path, newline='') as target:
+            writer = csv.DictWriter(target, fieldnames=fieldnames)
+            writer.writeheader()
+            for row in reader:
+                read += 1
+                for column in add_columns:
+                    row.setdefault(column, '')
+                row = _apply(stages, row)
+                if row is not None:
+                    writer.writerow(row)
+                    written += 1
+    return read, written
+
+
+# JSON
+
+class _Scanner:
+    """Buffered text reader for pulling JSON values off a stream one at a time."""
+
+    def __init__(self, f):
+        self.f = f
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def _more(self):
+        chunk = self.f.read(CHUNK_SIZE)
+        if not chunk:
+            self.eof = True
+            return False
+        # Drop what has been consumed so the buffer stays one value long
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Next non-whitespace character ('' at end of input)."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._more():
+                return ''
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"expected {char!r} in JSON stream, found {found or 'end of input'!r}")
+        self.pos += 1
+
+    def value(self):
+        """Decode the next complete JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self._more():
+                    continue
+                raise
+            # A number cut off by the end of the buffer may decode as a shorter one
+            if isinstance(value, (int, float)) and not isinstance(value, bool) and not self.eof:
+                tail = end
+                while tail < len(self.buffer) and self.buffer[tail] in _NUMBER_CHARS:
+                    tail += 1
+                if tail == len(self.buffer) and self._more():
+                    continue
+            self.pos = end
+            return value
+
+
+def iter_json_array(path, key=ARRAY_KEY):
+    """
+    Yield the elements of the array at top-level key of a JSON object, one at a time.
+
+    Other top-level keys are decoded and skipped.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        scanner = _Scanner(f)
+        scanner.expect('{')
+        if scanner.peek() == '}':
+            return
+        while True:
+            name = scanner.value()
+            scanner.expect(':')
+            if name == key:
+                scanner.expect('[')
+                if scanner.peek() == ']':
+                    scanner.pos += 1
+                else:
+                    while True:
+                        yield scanner.value()
+                        if scanner.peek() == ']':
+                            scanner.pos += 1
+                            break
+                        scanner.expect(',')
+            else:
+                scanner.value()
+            if scanner.peek() == '}':
+                return
+            scanner.expect(',')
+
+
+class JsonArrayWriter:
+    """
+    Write {"<key>": [...]} one record at a time, atomically replacing path.
+
+        with JsonArrayWriter(path) as out:
+            out.write(record)
+    """
+
+    def __init__(self, path, key=ARRAY_KEY, indent=2, ensure_ascii=False):
+        self.output = AtomicOutput(path)
+        self.key = key
+        self.indent = indent
+        self.ensure_ascii = ensure_ascii
+        self.count = 0
+
+    def __enter__(self):
+        self.file = self.output.__enter__()
+        return self
+
+    def write(self, record):
+        pad = ' ' * (self.indent * 2)
+        text = json.dumps(record, indent=self.indent, ensure_ascii=self.ensure_ascii)
+        if self.count == 0:
+            self.file.write('{\n' + ' ' * self.indent + json.dumps(self.key) + ': [\n')
+        else:
+            self.file.write(',\n')
+        self.file.write(pad + text.replace('\n', '\n' + pad))
+        self.count += 1
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            if self.count:
+                self.file.write('\n' + ' ' * self.indent + ']\n}')
+            else:
+                self.file.write('{\n' + ' ' * self.indent + json.dumps(self.key) + ': []\n}')
+        return self.output.__exit__(exc_type, exc, tb)
+
+
+def transform_json(path, stages, output=None, key=ARRAY_KEY, ensure_ascii=False):
+    """
+    Stream the records of path through stages into output (default: path itself).
+
+    Returns (records read, records written).
+    """
+    read = 0
+    with JsonArrayWriter(output or path, key, ensure_ascii=ensure_ascii) as out:
+        for record in iter_json_array(path, key):
+            read += 1
+            record = _apply(stages, record)
+            if record is not None:
+                out.write(record)
+    return read, out.count
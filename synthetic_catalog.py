@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Seeded generator for large, realistic synthetic catalogs.
+
+Writes the same layout the pipeline works on, under OUT:
+
+    paintings_wikiart_urls.csv
+    paintings_ios/Resources/Data/paintings.json       (monolith)
+    paintings_ios/Resources/Data/Periods/*.json
+    paintings_ios/Resources/Images/*.jpg              (small fake JPEGs)
+
+The data is shaped like the real catalog, only bigger:
+- artist popularity is Zipf-distributed, so a few artists own most paintings;
+- titles and names mix Latin accents, Cyrillic, Greek and CJK;
+- some titles slug-collide on purpose (generic titles, and variants that
+  differ only in case, punctuation or a parenthesised note);
+- image names use the pre-allocator artist-title.jpg scheme, so colliding
+  paintings share a file, some paintings have no image and a few files
+  are orphans.
+
+Records are streamed to disk as they are generated; memory grows only with
+the number of artists. The same seed and count always give the same catalog.
+
+    python synthetic_catalog.py /tmp/catalog-100k --count 100000
+"""
+
+import argparse
+import bisect
+import csv
+import itertools
+import os
+import random
+import uuid
+from contextlib import ExitStack
+from pathlib import Path
+
+from slugs import slugify
+from stream_transform import JsonArrayWriter
+
+CSV_FIELDS = ['id', 'title', 'artist', 'year', 'period', 'museum', 'location',
+              'imageName', 'wikiart_url', 'wikipedia_url']
+
+# (period, first year, last year), as in the real catalog
+PERIODS = [
+    ('Renaissance', 1400, 1550), ('Baroque', 1590, 1680), ('Rococo', 1710, 1790),
+    ('Neoclassicism', 1760, 1860), ('Realism', 1780, 1890), ('Impressionism', 1865, 1916),
+    ('Post-Impressionism', 1885, 1910), ('Symbolism', 1870, 1915), ('Expressionism', 1890, 1935),
+    ('Cubism', 1907, 1925), ('Futurism', 1909, 1940), ('Surrealism', 1913, 1965),
+    ('Abstract Expressionism', 1943, 1972), ('Pop Art', 1947, 2010), ('Minimalism', 1950, 2005),
+    ('Contemporary / Conceptual Art', 1965, 2020),
+]
+
+FIRST_NAMES = ['Jan', 'Maria', 'Pieter', 'Élisabeth', 'José', 'Zdzisław', 'Søren', 'Ilya', 'Amrita',
+               'Frida', 'Katsushika', 'Łucja', 'Björn', 'Nikolaos', 'Chloé', 'Dmitri', 'Илья', 'Ана',
+               'Giovanni', 'Hilma', 'Mehmet', 'Ngozi', 'Yūko', 'François', 'Άννα', 'Wassily']
+LAST_NAMES = ['van Eyck', 'Brueghel', 'Vigée Le Brun', 'Sorolla', 'Beksiński', 'Krøyer', 'Repin',
+              'Sher-Gil', 'Kahlo', 'Hokusai', 'Müller', 'Đorđević', 'Øvergaard', 'Γύζης', 'Репин',
+              'Łempicka', 'af Klint', "O'Keeffe", 'Çelebi', 'Nguyễn', '葛飾', 'Kandinsky', 'Dürer']
+TITLE_SUBJECTS = ['Woman', 'Landscape', 'Still Life', 'Portrait of a Man', 'Harbour', 'Madonna',
+                  'Bathers', 'Composition', 'Nocturne', 'Café Terrace', 'Garden', 'Москва', 'Θάλασσα',
+                  '富士', 'Straße', 'Façade', 'Señora', 'Self-Portrait', 'Sunflowers', 'Reclining Nude']
+TITLE_DETAILS = ['at Dusk', 'with Flowers', 'in Blue', 'No. {n}', 'I', 'II', 'at Étretat', 'in Winter',
+                 'by the Sea', 'and Child', 'with a Pearl', 'on the Terrace', '{n}', 'in Red and Gold']
+TITLE_PLACES = ['', '', 'Arles', 'Giverny', 'Toledo', 'Delft', 'Петербург', 'Αθήνα', '京都', 'Kraków',
+                'Montmartre', 'Zürich', 'São Paulo', 'Venezia', 'Saint-Rémy', 'Kyiv']
+GENERIC_TITLES = ['Untitled', 'Composition', 'Self-Portrait', 'Study', 'Landscape']
+MUSEUMS = [('Louvre Museum', 'Paris, France'), ('Museo del Prado', 'Madrid, Spain'),
+           ('Tretyakov Gallery', 'Moscow, Russia'), ('Museum of Modern Art', 'New York, USA'),
+           ('Rijksmuseum', 'Amsterdam, Netherlands'), ('Tokyo National Museum', 'Tokyo, Japan'),
+           ('Private Collection', '')]
+
+# Smallest valid-looking JPEG framing around filler bytes
+JPEG_HEAD = b'\xff\xd8\xff\xe0\x00\x10JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00'
+JPEG_TAIL = b'\xff\xd9'
+
+
+def period_file(period):
+    """File stem used by split_by_period.py."""
+    return period.lower().replace(' / ', '_').replace(' ', '_')
+
+
+def _artists(rng, count):
+    names = set()
+    artists = []
+    for first, last in itertools.product(FIRST_NAMES, LAST_NAMES):
+        if len(artists) == count:
+            break
+        if rng.random() < 0.5:
+            name = f"{first} {last}"
+            if name not in names:
+                names.add(name)
+                artists.append(name)
+    # Beyond the name product, number the extras (not in parentheses, which
+    # slugify drops - that would make every extra artist collide)
+    for n in itertools.count(2):
+        if len(artists) >= count:
+            break
+        artists.append(f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {n}")
+    rng.shuffle(artists)
+    return artists
+
+
+def _collision_variant(rng, title):
+    """A title that differs from title but slugs to the same file name."""
+    return rng.choice([
+        title.upper(),
+        title.replace(' ', ', ', 1) if ' ' in title else f"{title}.",
+        f"{title} (study)",
+        f"{title}!",
+        f"  {title}  ",
+    ])
+
+
+def iter_paintings(count, seed=0, collision_rate=0.03):
+    """Yield count synthetic painting records, deterministically for a seed."""
+    rng = random.Random(seed)
+    artists = _artists(rng, max(20, count // 25))
+    # Zipf-like popularity: artist k gets weight 1 / k^1.1
+    cum_weights = list(itertools.accumulate(1 / (k ** 1.1) for k in range(1, len(artists) + 1)))
+    careers = {}
+    recent_titles = {}
+
+    for i in range(count):
+        artist = artists[bisect.bisect(cum_weights, rng.random() * cum_weights[-1])]
+        if artist not in careers:
+            period_index = rng.randrange(len(PERIODS))
+            careers[artist] = [period_index] + ([period_index + 1] if period_index + 1 < len(PERIODS)
+                                                and rng.random() < 0.3 else [])
+        period, first, last = PERIODS[rng.choice(careers[artist])]
+
+        titles = recent_titles.setdefault(artist, [])
+        roll = rng.random()
+        if titles and roll < collision_rate:
+            title = _collision_variant(rng, rng.choice(titles))
+        elif roll < collision_rate * 2:
+            title = rng.choice(GENERIC_TITLES)
+        else:
+            detail = rng.choice(TITLE_DETAILS).format(n=rng.randint(1, 400))
+            place = rng.choice(TITLE_PLACES)
+            title = f"{rng.choice(TITLE_SUBJECTS)} {detail}" + (f", {place}" if place else '')
+        titles.append(title)
+        del titles[:-8]
+
+        museum, location = rng.choice(MUSEUMS)
+        yield {
+            'id': str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            'title': title,
+            'artist': artist,
+            'year': rng.randint(first, last),
+            'period': period,
+            'museum': museum,
+            'location': location,
+        }
+
+
+def generate_catalog(root, count, seed=0, collision_rate=0.03, image_fraction=0.9,
+                     orphan_rate=0.02, image_size=2048):
+    """Write a synthetic catalog under root; return counts of what was written."""
+    root = Path(root)
+    data_dir = root / 'paintings_ios/Resources/Data'
+    periods_dir = data_dir / 'Periods'
+    images_dir = root / 'paintings_ios/Resources/Images'
+    periods_dir.mkdir(parents=True, exist_ok=True)
+    images_dir.mkdir(parents=True, exist_ok=True)
+
+    rng = random.Random(seed + 1)
+    filler = bytes(rng.getrandbits(8) for _ in range(max(0, image_size - len(JPEG_HEAD) - len(JPEG_TAIL))))
+    image = JPEG_HEAD + filler + JPEG_TAIL
+    stats = {'paintings': 0, 'images': 0, 'orphans': 0, 'with_wikiart_url': 0}
+
+    with ExitStack() as stack:
+        monolith = stack.enter_context(JsonArrayWriter(data_dir / 'paintings.json', ensure_ascii=True))
+        csv_file = stack.enter_context(open(root / 'paintings_wikiart_urls.csv', 'w', newline='', encoding='utf-8'))
+        writer = csv.DictWriter(csv_file, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        period_writers = {}
+
+        for painting in iter_paintings(count, seed, collision_rate):
+            monolith.write(painting)
+            name = ''
+            if rng.random() < image_fraction:
+                name = f"{slugify(painting['artist'] + '-' + painting['title'])}.jpg"
+                # Colliding paintings share one file, as before the allocator
+                if not os.path.exists(images_dir / name):
+                    (images_dir / name).write_bytes(image)
+                    stats['images'] += 1
+            record = {**painting, 'imageName': name}
+
+            period = painting['period']
+            if period not in period_writers:
+                period_writers[period] = stack.enter_context(
+                    JsonArrayWriter(periods_dir / f"{period_file(period)}.json"))
+            period_writers[period].write(record)
+
+            slug = f"{slugify(painting['artist'])}/{slugify(painting['title'])}"
+            wikiart_url = f"https://www.wikiart.org/en/{slug}" if name and rng.random() < 0.6 else ''
+            stats['with_wikiart_url'] += bool(wikiart_url)
+            writer.writerow({**record, 'wikiart_url': wikiart_url, 'wikipedia_url': ''})
+            stats['paintings'] += 1
+
+            if rng.random() < orphan_rate:
+                (images_dir / f"orphan-{stats['orphans']:07d}.jpg").write_bytes(image)
+                stats['orphans'] += 1
+
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate a synthetic catalog for offline benchmarks.')
+    parser.add_argument('output', type=Path, help='directory to create the catalog in')
+    parser.add_argument('--count', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--collision-rate', type=float, default=0.03,
+                        help='share of titles that deliberately slug-collide with an earlier one')
+    parser.add_argument('--image-fraction', type=float, default=0.9, help='share of paintings with an image file')
+    parser.add_argument('--image-size', type=int, default=2048, help='bytes per fake image')
+    args = parser.parse_args(argv)
+
+    if args.output.exists() and any(args.output.iterdir()):
+        parser.error(f"{args.output} is not empty")
+    stats = generate_catalog(args.output, args.count, args.seed, args.collision_rate,
+                             args.image_fraction, image_size=args.image_size)
+    size = sum(f.stat().st_size for f in (args.output / 'paintings_ios/Resources/Data').rglob('*.json'))
+    print(f"✅ Generated {stats['paintings']} paintings in {args.output}")
+    print(f"  {stats['images']} image files, {stats['orphans']} orphans, "
+          f"{stats['with_wikiart_url']} WikiArt URLs, {size / 1024 / 1024:.1f} MB of JSON")
+
+if __name__ == '__main__':
+    main()
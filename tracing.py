@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Per-painting span tracing for the fetch scripts.
+
+Aggregate counters say how long a run took; a trace says why one painting
+took 20 s. With --trace FILE, each painting a script handles becomes a
+trace with child spans for every function it goes through, every HTTP
+request (status, bytes, whether it was coalesced), retry, cache lookup and
+file write:
+
+    with trace('process_painting', painting['id'], title=painting['title']):
+        ...                                   # root span of a new trace
+
+    @traced
+    def download_image(url, path): ...        # child span per call
+
+    with span('write', bytes=len(data)) as s:
+        ...
+
+Spans only exist inside a sampled trace: outside one - tracing off, or the
+painting not sampled - span() and @traced cost one context-variable lookup.
+Sampling (--trace-sample) is by a hash of the painting id, so the same
+paintings are traced on every run. Work handed to a thread pool keeps its
+trace when submitted through bind().
+
+The file is written when the script finishes, in Chrome trace format
+(chrome://tracing, https://ui.perfetto.dev: one row per painting and
+thread) or as OTLP/JSON (--trace-format otlp) for OpenTelemetry tools.
+"""
+
+import contextvars
+import functools
+import hashlib
+import os
+import random
+import threading
+import time
+import traceback
+from pathlib import Path
+
+from file_digests import write_json_atomic
+
+_current = contextvars.ContextVar('current_span', default=None)
+_tracer = None
+
+
+class Span:
+    """One timed operation; attributes are set with set() while it runs."""
+
+    __slots__ = ('tracer', 'trace_id', 'span_id', 'parent_id', 'name', 'attributes',
+                 'start_ns', 'end_ns', 'thread', 'error', '_token')
+
+    def __init__(self, tracer, name, trace_id, parent_id, attributes):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = f"{tracer.random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.thread = threading.get_ident()
+        self.error = None
+        self.end_ns = None
+        self.start_ns = time.perf_counter_ns()
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def __enter__(self):
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end_ns = time.perf_counter_ns()
+        if exc is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        _current.reset(self._token)
+        self.tracer.spans.append(self)
+        return False
+
+
+class _NullSpan:
+    """Stand-in returned outside a sampled trace."""
+
+    def set(self, **attributes):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+def trace(name, key, **attributes):
+    """Root span of a new trace for key (a painting id), or a no-op if key isn't sampled."""
+    tracer = _tracer
+    if tracer is None or not tracer.sampled(key):
+        return NULL_SPAN
+    trace_id = f"{tracer.random.getrandbits(128):032x}"
+    tracer.labels[trace_id] = attributes.get('title') or key
+    return Span(tracer, name, trace_id, None, {'painting': key, **attributes})
+
+
+def span(name, **attributes):
+    """Child span of the current one, or a no-op outside a sampled trace."""
+    parent = _current.get()
+    if parent is None:
+        return NULL_SPAN
+    return Span(parent.tracer, name, parent.trace_id, parent.span_id, attributes)
+
+
+def current_span():
+    """The innermost open span (NULL_SPAN if none), to add attributes to it."""
+    return _current.get() or NULL_SPAN
+
+
+def traced(func):
+    """Decorator: run func in a span named after it when inside a trace."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        parent = _current.get()
+        if parent is None:
+            return func(*args, **kwargs)
+        with Span(parent.tracer, func.__name__, parent.trace_id, parent.span_id, {}):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def bind(fn):
+    """fn bound to the current trace, for running on another thread."""
+    if _current.get() is None:
+        return fn
+    context = contextvars.copy_context()
+    return functools.partial(context.run, fn)
+
+
+def _attribute_value(value):
+    """OTLP AnyValue for a Python value."""
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+class Tracer:
+    """Collects finished spans of sampled traces and writes them out at finish()."""
+
+    def __init__(self, service, path, sample_rate=1.0, trace_format='chrome'):
+        self.service = service
+        self.path = Path(path)
+        self.sample_rate = sample_rate
+        self.trace_format = trace_format
+        self.random = random.Random(int.from_bytes(os.urandom(8), 'big'))
+        # list.append is atomic, so worker threads need no lock
+        self.spans = []
+        self.labels = {}
+        # perf_counter_ns + offset = Unix time in ns
+        self.epoch_offset_ns = time.time_ns() - time.perf_counter_ns()
+
+    def sampled(self, key):
+        if self.sample_rate >= 1:
+            return True
+        digest = hashlib.sha1(str(key).encode('utf-8')).digest()
+        return int.from_bytes(digest[:8], 'big') / 2 ** 64 < self.sample_rate
+
+    def chrome_trace(self):
+        """Chrome trace event format: one row per (trace, thread), sorted by start."""
+        spans = [s for s in self.spans if s.end_ns is not None]
+        origin = min((s.start_ns for s in spans), default=0)
+        rows = {}
+        for s in sorted(spans, key=lambda s: s.start_ns):
+            rows.setdefault((s.trace_id, s.thread), len(rows) + 1)
+        threads_per_trace = {}
+        for trace_id, thread in rows:
+            threads_per_trace[trace_id] = threads_per_trace.get(trace_id, 0) + 1
+
+        pid = os.getpid()
+        events = [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'args': {'name': self.service}}]
+        for (trace_id, thread), tid in rows.items():
+            label = self.labels.get(trace_id, trace_id)
+            if threads_per_trace[trace_id] > 1:
+                label = f"{label} [thread {thread}]"
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': label}})
+            events.append({'name': 'thread_sort_index', 'ph': 'M', 'pid': pid, 'tid': tid,
+                           'args': {'sort_index': tid}})
+        for s in spans:
+            args = {**s.attributes, 'trace_id': s.trace_id, 'span_id': s.span_id}
+            if s.error:
+                args['error'] = s.error
+            events.append({
+                'name': s.name, 'cat': 'error' if s.error else 'span', 'ph': 'X',
+                'ts': (s.start_ns - origin) / 1000, 'dur': (s.end_ns - s.start_ns) / 1000,
+                'pid': pid, 'tid': rows[s.trace_id, s.thread], 'args': args,
+            })
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def otlp_json(self):
+        """OTLP/JSON ExportTraceServiceRequest."""
+        spans = []
+        for s in self.spans:
+            if s.end_ns is None:
+                continue
+            record = {
+                'traceId': s.trace_id,
+                'spanId': s.span_id,
+                'name': s.name,
+                'kind': 3 if s.name == 'http' else 1,  # CLIENT / INTERNAL
+                'startTimeUnixNano': str(s.start_ns + self.epoch_offset_ns),
+                'endTimeUnixNano': str(s.end_ns + self.epoch_offset_ns),
+                'attributes': [{'key': k, 'value': _attribute_value(v)} for k, v in s.attributes.items()
+                               if v is not None],
+                'status': {'code': 2, 'message': s.error} if s.error else {'code': 1},
+            }
+            if s.parent_id:
+                record['parentSpanId'] = s.parent_id
+            spans.append(record)
+        return {'resourceSpans': [{
+            'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': self.service}}]},
+            'scopeSpans': [{'scope': {'name': 'tracing'}, 'spans': spans}],
+        }]}
+
+    def slowest(self, count=5):
+        """The count slowest root spans as (seconds, label, error count)."""
+        errors = {}
+        for s in self.spans:
+            if s.error:
+                errors[s.trace_id] = errors.get(s.trace_id, 0) + 1
+        roots = [s for s in self.spans if s.parent_id is None and s.end_ns is not None]
+        roots.sort(key=lambda s: s.end_ns - s.start_ns, reverse=True)
+        return [((s.end_ns - s.start_ns) / 1e9, self.labels.get(s.trace_id, s.trace_id), errors.get(s.trace_id, 0))
+                for s in roots[:count]]
+
+    def finish(self):
+        global _tracer
+        _tracer = None
+        try:
+            data = self.otlp_json() if self.trace_format == 'otlp' else self.chrome_trace()
+            write_json_atomic(self.path, data)
+        except Exception:
+            print(f"⚠️  Could not write trace {self.path}:")
+            traceback.print_exc()
+            return
+        traces = len({s.trace_id for s in self.spans})
+        print(f"🧭 Trace: {traces} paintings, {len(self.spans)} spans -> {self.path}")
+        for seconds, label, error_count in self.slowest():
+            print(f"   {seconds:7.2f}s  {label}" + (f"  ({error_count} failed spans)" if error_count else ''))
+
+
+class NullTracer:
+    """Tracer stand-in used when tracing is off."""
+
+    def finish(self):
+        pass
+
+
+NULL_TRACER = NullTracer()
+
+
+def add_trace_arguments(parser):
+    """Add the common --trace options to an argparse parser."""
+    parser.add_argument('--trace', metavar='FILE',
+                        help='record a span trace per painting and write it to FILE')
+    parser.add_argument('--trace-sample', type=float, default=1.0, metavar='RATE',
+                        help='share of paintings to trace (default 1.0)')
+    parser.add_argument('--trace-format', choices=['chrome', 'otlp'], default='chrome',
+                        help='Chrome trace (chrome://tracing, Perfetto) or OTLP/JSON (default chrome)')
+
+
+def create_tracer(script_name, path, sample_rate=1.0, trace_format='chrome'):
+    """Install and return a Tracer when path is set, otherwise a no-op."""
+    global _tracer
+    if not path:
+        return NULL_TRACER
+    _tracer = Tracer(script_name, path, sample_rate, trace_format)
+    return _tracer
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Existence probes for candidate page URLs, with three outcomes instead of a
+yes/no:
+
+    found          the server answered 2xx
+    missing        the server answered 404/410 - a definite "no such page"
+    inconclusive   timeout, connection reset, 429/5xx, or any other failure
+
+Only "missing" is safe to send down the Wikidata/Wikipedia fallbacks;
+"inconclusive" results should be probed again later.
+
+Timeouts are per host, derived from the latency percentiles observed so far
+(persisted in .cache/probe_latency.json). A HEAD rejected with 403/405/501
+is retried as a one-byte ranged GET.
+"""
+
+import json
+import socket
+import threading
+import time
+import urllib.error
+import urllib.parse
+
+from fetch import fetch_status
+from file_digests import CACHE_DIR, write_json_atomic
+from tracing import span
+
+FOUND = 'found'
+MISSING = 'missing'
+INCONCLUSIVE = 'inconclusive'
+
+MISSING_STATUSES = {404, 410}
+HEAD_REJECTED_STATUSES = {403, 405, 501}
+
+LATENCY_FILE = CACHE_DIR / 'probe_latency.json'
+MIN_SAMPLES = 10
+MAX_SAMPLES = 200
+
+
+class HostTimeouts:
+    """Per-host probe timeouts from observed latency percentiles."""
+
+    def __init__(self, path=LATENCY_FILE, default=5.0, floor=0.5, ceiling=20.0, multiplier=3.0):
+        self.path = path
+        self.default = default
+        self.floor = floor
+        self.ceiling = ceiling
+        self.multiplier = multiplier
+        self.lock = threading.Lock()
+        self.samples = {}
+        if path and path.exists():
+            with open(path, 'r', encoding='utf-8') as f:
+                self.samples = json.load(f)
+
+    def timeout(self, host):
+        """multiplier x p95 latency for host, clamped; the default until warmed up."""
+        with self.lock:
+            samples = sorted(self.samples.get(host, []))
+        if len(samples) < MIN_SAMPLES:
+            return self.default
+        p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+        return min(max(p95 * self.multiplier, self.floor), self.ceiling)
+
+    def record(self, host, seconds):
+        with self.lock:
+            samples = self.samples.setdefault(host, [])
+            samples.append(round(seconds, 4))
+            del samples[:-MAX_SAMPLES]
+
+    def save(self):
+        if self.path:
+            with self.lock:
+                write_json_atomic(self.path, self.samples)
+
+
+_default_timeouts = None
+_default_lock = threading.Lock()
+
+
+def default_timeouts():
+    """Process-wide HostTimeouts shared by every probe that doesn't pass its own."""
+    global _default_timeouts
+    with _default_lock:
+        if _default_timeouts is None:
+            _default_timeouts = HostTimeouts()
+        return _default_timeouts
+
+
+def _status_outcome(status):
+    if 200 <= status < 300:
+        return FOUND
+    if status in MISSING_STATUSES:
+        return MISSING
+    return INCONCLUSIVE
+
+
+def _timed_status(url, host, timeouts, method, headers=None):
+    """Return the HTTP status, or None if the request failed without one."""
+    timeout = timeouts.timeout(host)
+    start = time.perf_counter()
+    try:
+        status = fetch_status(url, timeout=timeout, method=method, headers=headers)
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except (urllib.error.URLError, socket.timeout, TimeoutError, ConnectionError) as e:
+        timed_out = isinstance(e, (socket.timeout, TimeoutError)) or \
+            isinstance(getattr(e, 'reason', None), (socket.timeout, TimeoutError))
+        if timed_out:
+            # Censored sample: the real latency was at least the timeout
+            timeouts.record(host, timeout)
+        return None
+    except Exception:
+        return None
+    timeouts.record(host, time.perf_counter() - start)
+    return status
+
+
+def probe_url(url, timeouts=None, method='HEAD'):
+    """Probe one URL; return FOUND, MISSING or INCONCLUSIVE."""
+    timeouts = timeouts or default_timeouts()
+    host = urllib.parse.urlsplit(url).hostname or ''
+    status = _timed_status(url, host, timeouts, method)
+    if method == 'HEAD' and status in HEAD_REJECTED_STATUSES:
+        with span('retry', reason=f'HEAD rejected with {status}', method='GET'):
+            status = _timed_status(url, host, timeouts, 'GET', {'Range': 'bytes=0-0'})
+    if status is None:
+        return INCONCLUSIVE
+    return _status_outcome(status)
+
+
+def probe_first(urls, timeouts=None, method='HEAD'):
+    """
+    Probe candidate URLs in order; return (outcome, url).
+
+    FOUND with the first URL that exists; MISSING only if every candidate
+    was definitely missing; otherwise INCONCLUSIVE.
+    """
+    outcome = MISSING
+    for url in urls:
+        result = probe_url(url, timeouts, method)
+        if result == FOUND:
+            return FOUND, url
+        if result == INCONCLUSIVE:
+            outcome = INCONCLUSIVE
+    return outcome, None
+
+
+def reprobe_inconclusive(results, probe, rounds, delay, sleep=time.sleep):
+    """
+    Re-run probe(key) for keys in results whose outcome is INCONCLUSIVE.
+
+    results maps key -> (outcome, url) and is updated in place. Waits delay
+    seconds (doubling) before each round; returns the number of rounds run.
+    """
+    for round_number in range(1, rounds + 1):
+        pending = [key for key, (outcome, _) in results.items() if outcome == INCONCLUSIVE]
+        if not pending:
+            return round_number - 1
+        print(f"\n🔁 Re-probing {len(pending)} inconclusive (round {round_number}/{rounds})...", flush=True)
+        sleep(delay * 2 ** (round_number - 1))
+        for key in pending:
+            results[key] = probe(key)
+    return rounds
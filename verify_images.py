@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Verify that every file in Resources/Images is a complete, decodable JPEG.
+
+Catches HTML error pages and truncated downloads saved as .jpg before the app
+silently falls back to its placeholder. Each changed file is checked for JPEG
+magic bytes and fully decoded in a process pool (Pillow if installed, else a
+marker-level structural parse). Dimensions, color mode and decode time are
+cached in .cache/verify_images.json keyed by (size, mtime, digest), so reruns
+only look at files that changed.
+
+Exits with status 1 if any image is corrupt or undersized.
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from pathlib import Path
+
+from file_digests import CACHE_DIR, StatCache
+from profiling import add_profile_argument, create_profiler
+
+try:
+    from PIL import Image
+except ImportError:  # structural check only
+    Image = None
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg')
+
+# SOFn markers carrying frame dimensions (excludes DHT, JPG and DAC)
+SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+COMPONENT_MODES = {1: 'L', 3: 'RGB', 4: 'CMYK'}
+
+
+def sniff_format(data):
+    """Identify the file type from its leading bytes."""
+    if not data:
+        return 'empty'
+    if data.startswith(b'\xff\xd8\xff'):
+        return 'jpeg'
+    if data.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'png'
+    if data.startswith(b'GIF8'):
+        return 'gif'
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'webp'
+    if data.lstrip(b'\xef\xbb\xbf \t\r\n')[:1] == b'<':
+        return 'html'
+    return 'unknown'
+
+
+def parse_jpeg_structure(data):
+    """
+    Walk the JPEG marker segments up to EOI.
+
+    Returns (width, height, mode); raises ValueError on a malformed or
+    truncated stream.
+    """
+    width = height = None
+    mode = None
+    pos = 2
+    end = len(data)
+    while pos + 1 < end:
+        if data[pos] != 0xFF:
+            raise ValueError(f"expected marker at offset {pos}")
+        marker = data[pos + 1]
+        if marker == 0xFF:  # fill byte
+            pos += 1
+            continue
+        if marker == 0xD9:  # EOI
+            if width is None:
+                raise ValueError('no frame header before EOI')
+            return width, height, mode
+        if marker == 0x01 or 0xD0 <= marker <= 0xD7:
+            pos += 2
+            continue
+        if pos + 4 > end:
+            raise ValueError('truncated segment header')
+        length = int.from_bytes(data[pos + 2:pos + 4], 'big')
+        if pos + 2 + length > end:
+            raise ValueError('truncated segment')
+        if marker in SOF_MARKERS:
+            height = int.from_bytes(data[pos + 5:pos + 7], 'big')
+            width = int.from_bytes(data[pos + 7:pos + 9], 'big')
+            mode = COMPONENT_MODES.get(data[pos + 9], f"{data[pos + 9]}-component")
+        pos += 2 + length
+        if marker == 0xDA:  # SOS: skip entropy-coded data to the next marker
+            while True:
+                pos = data.find(b'\xff', pos)
+                if pos < 0 or pos + 1 >= end:
+                    raise ValueError('truncated scan data (missing EOI)')
+                following = data[pos + 1]
+                if following == 0x00 or 0xD0 <= following <= 0xD7 or following == 0xFF:
+                    pos += 1
+                    continue
+                break
+    raise ValueError('missing EOI (truncated)')
+
+
+def decode_image(data):
+    """Fully decode the image; return (width, height, mode, decoder)."""
+    if Image is not None:
+        with Image.open(io.BytesIO(data)) as img:
+            img.load()
+            return img.width, img.height, img.mode, 'pillow'
+    width, height, mode = parse_jpeg_structure(data)
+    return width, height, mode, 'structural'
+
+
+def verify_file(path, previous_sha1, min_width, min_height, min_bytes):
+    """Worker: check one file. Returns a result dict (or 'unchanged')."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    sha1 = hashlib.sha1(data).hexdigest()
+    if sha1 == previous_sha1:
+        return {'sha1': sha1, 'unchanged': True}
+
+    result = {
+        'sha1': sha1,
+        'bytes': len(data),
+        'format': sniff_format(data),
+        'width': None,
+        'height': None,
+        'mode': None,
+        'decode_ms': None,
+        'problems': [],
+    }
+    if result['format'] != 'jpeg':
+        result['problems'].append(f"not a JPEG ({result['format']})")
+        return result
+
+    start = time.perf_counter()
+    try:
+        width, height, mode, decoder = decode_image(data)
+    except Exception as e:
+        result['problems'].append(f"decode failed: {e}")
+        return result
+    result['decode_ms'] = round((time.perf_counter() - start) * 1000, 2)
+    result.update(width=width, height=height, mode=mode, decoder=decoder)
+
+    if len(data) < min_bytes:
+        result['problems'].append(f"only {len(data)} bytes")
+    if width < min_width or height < min_height:
+        result['problems'].append(f"undersized {width}x{height}")
+    return result
+
+
+def scan_images(images_dir):
+    """One os.scandir pass: name -> stat for every image file."""
+    found = {}
+    with os.scandir(images_dir) as entries:
+        for entry in entries:
+            if entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                found[entry.name] = entry.stat()
+    return found
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Verify image files are complete, decodable JPEGs.')
+    parser.add_argument('--images-dir', default='paintings_ios/Resources/Images')
+    parser.add_argument('--min-width', type=int, default=200)
+    parser.add_argument('--min-height', type=int, default=200)
+    parser.add_argument('--min-bytes', type=int, default=2048)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--cache', default=str(CACHE_DIR / 'verify_images.json'))
+    parser.add_argument('--no-cache', action='store_true', help='re-verify every file')
+    parser.add_argument('--report', help='write the full per-file results to this JSON file')
+    add_profile_argument(parser)
+    args = parser.parse_args(argv)
+    profiler = create_profiler('verify_images', args.profile)
+
+    start = time.perf_counter()
+    profiler.begin('scan')
+    images_dir = Path(args.images_dir)
+    files = scan_images(images_dir)
+    cache = StatCache(args.cache)
+    if args.no_cache:
+        cache.entries = {}
+    limits = {'min_width': args.min_width, 'min_height': args.min_height, 'min_bytes': args.min_bytes}
+    if cache.entries and any(e.get('limits') != limits for e in cache.entries.values()):
+        cache.entries = {}  # thresholds changed; cached verdicts no longer apply
+
+    results = {}
+    todo = []
+    for name, stat in files.items():
+        entry = cache.lookup(name, stat)
+        if entry:
+            results[name] = entry
+        else:
+            previous = cache.entries.get(name, {}).get('sha1')
+            todo.append((name, stat, previous))
+
+    print(f"Found {len(files)} images in {images_dir}")
+    print(f"Cached: {len(results)}, to verify: {len(todo)}"
+          f" ({'Pillow decode' if Image is not None else 'structural check, Pillow not installed'})\n")
+
+    profiler.begin('verify')
+    if todo:
+        workers = max(1, min(args.workers or 1, len(todo)))
+        chunksize = max(1, len(todo) // (workers * 8))
+        paths = [str(images_dir / name) for name, _, _ in todo]
+        previous = [prev for _, _, prev in todo]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            outcomes = pool.map(verify_file, paths, previous, repeat(args.min_width),
+                                repeat(args.min_height), repeat(args.min_bytes), chunksize=chunksize)
+            for (name, stat, _), outcome in zip(todo, outcomes):
+                if outcome.get('unchanged'):
+                    fields = {k: v for k, v in cache.entries[name].items()
+                              if k not in ('size', 'mtime_ns', 'sha1')}
+                else:
+                    fields = {k: v for k, v in outcome.items() if k != 'sha1'}
+                    fields['limits'] = limits
+                results[name] = cache.store(name, stat, outcome['sha1'], **fields)
+
+    profiler.begin('report')
+    cache.prune(files)
+    cache.save()
+
+    failures = {name: r for name, r in sorted(results.items()) if r['problems']}
+    decode_times = [r['decode_ms'] for r in results.values() if r.get('decode_ms') is not None]
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    for name, r in failures.items():
+        print(f"  ❌ {name}: {'; '.join(r['problems'])}")
+
+    print(f"\n{'='*70}")
+    print(f"IMAGE VERIFICATION {'FAILED' if failures else 'PASSED'}")
+    print(f"{'='*70}")
+    print(f"Checked: {len(results)} ({len(todo)} verified this run)")
+    print(f"Problems: {len(failures)}")
+    if decode_times:
+        print(f"Decode time: mean {sum(decode_times) / len(decode_times):.1f} ms, max {max(decode_times):.1f} ms")
+    print(f"Elapsed: {time.perf_counter() - start:.2f}s")
+    print(f"{'='*70}")
+
+    profiler.finish()
+    if failures:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
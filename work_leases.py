@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+"""
+Lease-based sharding of per-painting work across processes and hosts.
+
+Tasks (stage, painting id) live in a SQLite database that every worker can
+open - a file on a shared filesystem, or a local file for several processes
+on one machine. A worker leases a few tasks at a time:
+
+    pending -> leased (worker, token, expiry) -> done (result)
+                  |                                  ^
+                  +-- expired or released -----------+-> pending again
+
+Each task id hashes to one of SHARDS shards, and shards are spread over the
+live workers (those that heartbeat within the lease TTL) with a consistent
+hash ring, so a worker mostly takes its own shards and only a few move when
+workers join or leave. Once its own shards are empty a worker takes
+whatever is left, including leases that expired because their worker died.
+
+Commits are idempotent: the first commit for a task wins and records its
+result; repeated or late commits (e.g. from a worker whose lease expired
+while it was still downloading) are no-ops that return False. Nothing is
+written to the shared JSON files until every task is finished, and then
+by exactly one worker (claim_finalize).
+
+SQLite relies on the filesystem's file locking; use a local disk or a
+network filesystem whose locks actually work (not every NFS setup does).
+
+    python work_leases.py status .cache/download_leases.db
+    python work_leases.py selftest --processes 4 --tasks 300
+"""
+
+import argparse
+import bisect
+import hashlib
+import json
+import multiprocessing
+import os
+import random
+import socket
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+
+SHARDS = 64
+VIRTUAL_NODES = 32
+DEFAULT_TTL = 60.0
+MAX_ATTEMPTS = 3
+
+PENDING = 'pending'
+LEASED = 'leased'
+DONE = 'done'
+FAILED = 'failed'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    stage TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    shard INTEGER NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    token TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    finished_by TEXT,
+    PRIMARY KEY (stage, task_id)
+);
+CREATE INDEX IF NOT EXISTS tasks_by_shard ON tasks (stage, state, shard);
+CREATE TABLE IF NOT EXISTS workers (
+    worker TEXT PRIMARY KEY,
+    last_seen REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS finalized (
+    stage TEXT PRIMARY KEY,
+    worker TEXT NOT NULL,
+    at REAL NOT NULL
+);
+"""
+
+
+def _hash(text):
+    return int.from_bytes(hashlib.sha1(text.encode('utf-8')).digest()[:8], 'big')
+
+
+def shard_of(task_id, shards=SHARDS):
+    return _hash(task_id) % shards
+
+
+def owned_shards(worker, workers, shards=SHARDS):
+    """Shards assigned to worker on a consistent hash ring of workers."""
+    ring = sorted((_hash(f"{w}#{i}"), w) for w in workers for i in range(VIRTUAL_NODES))
+    if not ring:
+        return set(range(shards))
+    points = [point for point, _ in ring]
+    owned = set()
+    for shard in range(shards):
+        index = bisect.bisect(points, _hash(f"shard-{shard}")) % len(ring)
+        if ring[index][1] == worker:
+            owned.add(shard)
+    return owned
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class Lease:
+    __slots__ = ('stage', 'task_id', 'token')
+
+    def __init__(self, stage, task_id, token):
+        self.stage = stage
+        self.task_id = task_id
+        self.token = token
+
+    def __repr__(self):
+        return f"Lease({self.stage!r}, {self.task_id!r})"
+
+
+class LeaseStore:
+    """Task leases in a SQLite file shared by all workers (one connection per thread)."""
+
+    def __init__(self, path, ttl=DEFAULT_TTL, shards=SHARDS, max_attempts=MAX_ATTEMPTS, clock=time.time):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.shards = shards
+        self.max_attempts = max_attempts
+        self.clock = clock
+        self._local = threading.local()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db().executescript(SCHEMA)
+
+    def _db(self):
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            # Autocommit; writes take the lock up front with BEGIN IMMEDIATE
+            db = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+            self._local.db = db
+        return db
+
+    def _write(self, fn):
+        db = self._db()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            result = fn(db)
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
+        return result
+
+    def add_tasks(self, stage, task_ids):
+        """Register tasks (already-known ones are left alone); return how many were new."""
+        rows = [(stage, task_id, shard_of(task_id, self.shards)) for task_id in task_ids]
+        return self._write(lambda db: db.executemany(
+            'INSERT OR IGNORE INTO tasks (stage, task_id, shard) VALUES (?, ?, ?)', rows).rowcount)
+
+    def heartbeat(self, worker):
+        """Mark worker alive and extend the leases it holds."""
+        now = self.clock()
+
+        def beat(db):
+            db.execute('INSERT INTO workers (worker, last_seen) VALUES (?, ?) '
+                       'ON CONFLICT (worker) DO UPDATE SET last_seen = excluded.last_seen', (worker, now))
+            db.execute('UPDATE tasks SET lease_expires = ? WHERE worker = ? AND state = ? AND lease_expires > ?',
+                       (now + self.ttl, worker, LEASED, now))
+        self._write(beat)
+
+    def leave(self, worker):
+        """Deregister worker so its shards move to the others right away."""
+        self._write(lambda db: db.execute('DELETE FROM workers WHERE worker = ?', (worker,)))
+
+    def live_workers(self):
+        cutoff = self.clock() - self.ttl
+        return [row[0] for row in self._db().execute(
+            'SELECT worker FROM workers WHERE last_seen >= ? ORDER BY worker', (cutoff,))]
+
+    def acquire(self, stage, worker, limit=1):
+        """Lease up to limit tasks, preferring worker's own shards; [] when nothing is left."""
+        mine = sorted(owned_shards(worker, self.live_workers() or [worker], self.shards))
+        now = self.clock()
+
+        def take(db):
+            # Leases that ran out on their final attempt are given up on
+            db.execute('UPDATE tasks SET state = ?, worker = NULL, token = NULL '
+                       'WHERE stage = ? AND state = ? AND lease_expires <= ? AND attempts >= ?',
+                       (FAILED, stage, LEASED, now, self.max_attempts))
+            available = '(state = ? OR (state = ? AND lease_expires <= ?))'
+            params = [PENDING, LEASED, now]
+            marks = ','.join('?' * len(mine))
+            rows = db.execute(
+                f'SELECT task_id FROM tasks WHERE stage = ? AND {available} AND shard IN ({marks}) '
+                'ORDER BY shard, task_id LIMIT ?', [stage, *params, *mine, limit]).fetchall()
+            if len(rows) < limit:
+                # Own shards drained: help with everyone else's
+                rows += db.execute(
+                    f'SELECT task_id FROM tasks WHERE stage = ? AND {available} AND shard NOT IN ({marks}) '
+                    'ORDER BY shard, task_id LIMIT ?', [stage, *params, *mine, limit - len(rows)]).fetchall()
+            leases = []
+            for (task_id,) in rows:
+                token = uuid.uuid4().hex
+                db.execute('UPDATE tasks SET state = ?, worker = ?, token = ?, lease_expires = ?, '
+                           'attempts = attempts + 1 WHERE stage = ? AND task_id = ?',
+                           (LEASED, worker, token, now + self.ttl, stage, task_id))
+                leases.append(Lease(stage, task_id, token))
+            return leases
+        return self._write(take)
+
+    def commit(self, lease, worker, result):
+        """
+        Record result for a leased task.
+
+        Returns True if this call finished the task, False if it was already
+        finished (by this lease on an earlier try, or by someone else).
+        """
+        encoded = json.dumps(result, ensure_ascii=False, sort_keys=True)
+        return self._write(lambda db: db.execute(
+            'UPDATE tasks SET state = ?, result = ?, finished_by = ?, token = ?, lease_expires = NULL '
+            'WHERE stage = ? AND task_id = ? AND state NOT IN (?, ?)',
+            (DONE, encoded, worker, lease.token, lease.stage, lease.task_id, DONE, FAILED)).rowcount == 1)
+
+    def release(self, lease):
+        """Give a lease back unfinished (e.g. after an error) so it can be retried."""
+        def give_back(db):
+            db.execute('UPDATE tasks SET state = CASE WHEN attempts >= ? THEN ? ELSE ? END, '
+                       'worker = NULL, token = NULL, lease_expires = NULL '
+                       'WHERE stage = ? AND task_id = ? AND state = ? AND token = ?',
+                       (self.max_attempts, FAILED, PENDING, lease.stage, lease.task_id, LEASED, lease.token))
+        self._write(give_back)
+
+    def progress(self, stage):
+        """Task counts by state."""
+        counts = {PENDING: 0, LEASED: 0, DONE: 0, FAILED: 0}
+        for state, count in self._db().execute(
+                'SELECT state, COUNT(*) FROM tasks WHERE stage = ? GROUP BY state', (stage,)):
+            counts[state] = count
+        return counts
+
+    def finished(self, stage):
+        counts = self.progress(stage)
+        return counts[PENDING] == 0 and counts[LEASED] == 0
+
+    def results(self, stage):
+        """{task_id: result} for every done task."""
+        return {task_id: json.loads(result) for task_id, result in self._db().execute(
+            'SELECT task_id, result FROM tasks WHERE stage = ? AND state = ?', (stage, DONE))}
+
+    def claim_finalize(self, stage, worker):
+        """True for exactly one caller once every task of stage is finished."""
+        def claim(db):
+            unfinished = db.execute('SELECT COUNT(*) FROM tasks WHERE stage = ? AND state IN (?, ?)',
+                                    (stage, PENDING, LEASED)).fetchone()[0]
+            if unfinished:
+                return False
+            return db.execute('INSERT OR IGNORE INTO finalized (stage, worker, at) VALUES (?, ?, ?)',
+                              (stage, worker, self.clock())).rowcount == 1
+        return self._write(claim)
+
+
+class Heartbeat:
+    """Background thread that keeps a worker's leases alive (use as a context manager)."""
+
+    def __init__(self, store, worker, interval=None):
+        self.store = store
+        self.worker = worker
+        self.interval = interval or store.ttl / 3
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"heartbeat-{worker}", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.store.heartbeat(self.worker)
+            except sqlite3.Error as e:
+                print(f"⚠️  Heartbeat failed: {e}", file=sys.stderr)
+
+    def __enter__(self):
+        self.store.heartbeat(self.worker)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.store.leave(self.worker)
+
+
+def run_worker(store, stage, worker, handle, batch=4):
+    """
+    Lease and process tasks until none are left; return (finished, duplicates).
+
+    handle(task_id) returns a JSON-serializable result; if it raises, the
+    lease is released for a retry.
+    """
+    finished = duplicates = 0
+    with Heartbeat(store, worker):
+        while True:
+            leases = store.acquire(stage, worker, batch)
+            if not leases:
+                if store.finished(stage):
+                    break
+                # Others hold the rest; wait in case a lease expires
+                time.sleep(min(1.0, store.ttl / 4))
+                continue
+            for lease in leases:
+                try:
+                    result = handle(lease.task_id)
+                except Exception as e:
+                    print(f"  ⚠️  {lease.task_id}: {e} (released for retry)")
+                    store.release(lease)
+                    continue
+                if store.commit(lease, worker, result):
+                    finished += 1
+                else:
+                    duplicates += 1
+    return finished, duplicates
+
+
+def _selftest_worker(db_path, ttl, crash_rate, seed):
+    """Child process: process tasks, sometimes dying mid-lease."""
+    store = LeaseStore(db_path, ttl=ttl)
+    worker = default_worker_id()
+    rng = random.Random(seed)
+    log_path = Path(db_path).with_suffix(f".{worker}.log")
+
+    def handle(task_id):
+        time.sleep(rng.uniform(0.001, 0.005))
+        if rng.random() < crash_rate:
+            # Abandon the lease without committing, like a killed process
+            os._exit(1)
+        with open(log_path, 'a', encoding='utf-8') as f:
+            f.write(task_id + '\n')
+        return {'by': worker, 'value': _hash(task_id) % 1000}
+
+    run_worker(store, 'selftest', worker, handle)
+    store.claim_finalize('selftest', worker)
+
+
+def selftest(processes, tasks, ttl, crash_rate):
+    """Run several local worker processes against one store and check the outcome."""
+    workdir = Path(tempfile.mkdtemp(prefix='leases-'))
+    db_path = workdir / 'leases.db'
+    store = LeaseStore(db_path, ttl=ttl)
+    task_ids = [f"task-{i:05d}" for i in range(tasks)]
+    store.add_tasks('selftest', task_ids)
+
+    start = time.perf_counter()
+    context = multiprocessing.get_context('spawn')
+    generation = 0
+    # Keep restarting crashed workers until the stage is finished
+    while not store.finished('selftest'):
+        children = [context.Process(target=_selftest_worker, args=(db_path, ttl, crash_rate, generation * 100 + n))
+                    for n in range(processes)]
+        for child in children:
+            child.start()
+        for child in children:
+            child.join()
+        generation += 1
+    elapsed = time.perf_counter() - start
+
+    results = store.results('selftest')
+    finishers = {}
+    for result in results.values():
+        finishers[result['by']] = finishers.get(result['by'], 0) + 1
+    processed = sum(len(log.read_text().split()) for log in workdir.glob('*.log'))
+    problems = []
+    if set(results) != set(task_ids):
+        problems.append(f"{len(set(task_ids) - set(results))} tasks have no result")
+    if any(result['value'] != _hash(task_id) % 1000 for task_id, result in results.items()):
+        problems.append('a result was recorded for the wrong task')
+    finalized = store._db().execute('SELECT COUNT(*) FROM finalized WHERE stage = ?', ('selftest',)).fetchone()[0]
+    if finalized != 1:
+        problems.append(f"finalize claimed {finalized} times")
+
+    print(f"Tasks: {tasks}, worker processes: {processes} x {generation} generation(s), {elapsed:.1f}s")
+    print(f"Results: {len(results)} done, {store.progress('selftest')[FAILED]} failed, "
+          f"{processed - len(results)} tasks processed more than once (lease expiry/crashes)")
+    print(f"Finished by {len(finishers)} workers: {sorted(finishers.values(), reverse=True)}")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Inspect or test the shared work-lease store.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    status_cmd = commands.add_parser('status', help='show task counts per stage')
+    status_cmd.add_argument('db', type=Path)
+    test_cmd = commands.add_parser('selftest', help='run local worker processes and check for lost or double work')
+    test_cmd.add_argument('--processes', type=int, default=4)
+    test_cmd.add_argument('--tasks', type=int, default=300)
+    test_cmd.add_argument('--ttl', type=float, default=2.0, help='lease TTL in seconds')
+    test_cmd.add_argument('--crash-rate', type=float, default=0.01, help='chance a worker dies holding a lease')
+    args = parser.parse_args(argv)
+
+    if args.command == 'status':
+        store = LeaseStore(args.db)
+        stages = [row[0] for row in store._db().execute('SELECT DISTINCT stage FROM tasks ORDER BY stage')]
+        print(f"Live workers: {', '.join(store.live_workers()) or 'none'}")
+        for stage in stages:
+            counts = store.progress(stage)
+            print(f"  {stage:<20} " + ', '.join(f"{state} {count}" for state, count in counts.items()))
+        return
+
+    problems = selftest(args.processes, args.tasks, args.ttl, args.crash_rate)
+    if problems:
+        for problem in problems:
+            print(f"  ❌ {problem}")
+        sys.exit(1)
+    print("✅ Every task finished exactly once, results intact")
+
+if __name__ == '__main__':
+    main()
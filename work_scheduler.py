@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Order per-painting work so that a partial run leaves usable quizzes behind.
+
+Walking the catalog in file order means an interrupted or time-boxed run
+leaves gaps wherever it stopped. Instead each painting gets a value per
+expected second of work:
+
+- its period's place in the quiz unlock order (coversPeriods in
+  periods_quizzes.json): quiz 1's periods are worth twice quiz 2's, and
+  so on;
+- whether its period still needs images for a full quiz session: once it
+  has questionsPerSession / periods images it ranks below every period
+  that still needs some;
+- whether it is still missing an image (existing images only need a check);
+- its artist's historical hit rate for the stage (smoothed towards the
+  stage's overall rate; the resolver's history is seeded from the CSV);
+- its expected cost: seconds = overhead + expected download size (from
+  image_manifest.json) / throughput, fitted to the durations observed.
+
+Hit counts and the cost fit are kept per stage in .cache/schedule_stats.json.
+
+With a deadline, the plan only keeps the most valuable work that is expected
+to fit, and Budget skips anything that no longer fits while running.
+
+    python work_scheduler.py plan --deadline 300
+"""
+
+import argparse
+import csv
+import heapq
+import json
+import math
+import re
+import time
+from pathlib import Path
+
+from allocate_filenames import load_period_paintings
+from file_digests import CACHE_DIR, write_json_atomic
+from image_manifest import load_manifest
+
+QUIZZES_FILE = Path('paintings_ios/Resources/Data/periods_quizzes.json')
+IMAGES_DIR = Path('paintings_ios/Resources/Images')
+STATS_FILE = CACHE_DIR / 'schedule_stats.json'
+
+# Used until a stage has been observed often enough; bytes_per_second None
+# means the stage doesn't download, so size doesn't matter
+STAGE_DEFAULTS = {
+    'download_wikiart_images': {'overhead': 1.5, 'bytes_per_second': 1_000_000, 'hit_rate': 0.9},
+    'resolve_images': {'overhead': 3.0, 'bytes_per_second': None, 'hit_rate': 0.4},
+}
+DEFAULT_IMAGE_BYTES = 300_000
+MIN_SAMPLES = 5
+# Every painting costs at least a request round trip, even one already on
+# disk; keeps fitted costs (and value / seconds) away from zero
+MIN_OVERHEAD = 0.05
+# Older observations fade out of the cost fit at this rate per observation
+DECAY = 0.98
+# Value of re-checking a painting whose image is already on disk
+HAS_IMAGE = 0.1
+
+
+def _normalize(name):
+    return re.sub(r'[^a-z0-9]', '', name.lower())
+
+
+def match_period(key, periods):
+    """Catalog period for a quiz key ("postImpressionism" -> "Post-Impressionism"), or None."""
+    wanted = _normalize(key)
+    by_name = {_normalize(period): period for period in periods}
+    if wanted in by_name:
+        return by_name[wanted]
+    # "abstract" covers "Abstract Expressionism"
+    prefixed = sorted(name for name in by_name if name.startswith(wanted))
+    return by_name[prefixed[0]] if prefixed else None
+
+
+def quiz_targets(quizzes, periods):
+    """
+    Return ({period: weight}, {period: images wanted}, [unmatched quiz keys]).
+
+    Periods of the first quiz weigh 1, the next 1/2, ...; periods no quiz
+    covers come last.
+    """
+    weights, targets, unmatched = {}, {}, []
+    for index, quiz in enumerate(quizzes):
+        covers = quiz.get('coversPeriods', [])
+        per_session = quiz.get('settings', {}).get('questionsPerSession', 10)
+        for key in covers:
+            period = match_period(key, periods)
+            if period is None:
+                unmatched.append(key)
+            elif period not in weights:
+                weights[period] = 0.5 ** index
+                targets[period] = math.ceil(per_session / max(len(covers), 1))
+    for period in periods:
+        weights.setdefault(period, 0.5 ** len(quizzes))
+        targets.setdefault(period, 0)
+    return weights, targets, unmatched
+
+
+def csv_history(rows):
+    """{artist: [paintings, paintings with a WikiArt or image URL]} from the CSV."""
+    history = {}
+    for row in rows:
+        counts = history.setdefault(row['artist'], [0, 0])
+        counts[0] += 1
+        counts[1] += int(bool(row.get('wikiart_url') or row.get('wikipedia_url')))
+    return history
+
+
+class CostModel:
+    """seconds = overhead + bytes / throughput, fitted by decayed least squares."""
+
+    def __init__(self, defaults, sums=None):
+        self.defaults = defaults
+        self.sums = dict(sums or {'n': 0.0, 'x': 0.0, 'y': 0.0, 'xx': 0.0, 'xy': 0.0})
+        self.overhead, self.seconds_per_byte = self._fit()
+
+    def _fit(self):
+        default_slope = 1 / self.defaults['bytes_per_second'] if self.defaults['bytes_per_second'] else 0.0
+        sums = self.sums
+        if sums['n'] < MIN_SAMPLES:
+            return self.defaults['overhead'], default_slope
+        mean_x, mean_y = sums['x'] / sums['n'], sums['y'] / sums['n']
+        variance = sums['xx'] / sums['n'] - mean_x ** 2
+        slope = default_slope
+        # Sizes that barely vary can't separate overhead from throughput
+        if variance > (0.1 * mean_x) ** 2 and variance > 0:
+            slope = max((sums['xy'] / sums['n'] - mean_x * mean_y) / variance, 0.0)
+        return max(mean_y - slope * mean_x, MIN_OVERHEAD), slope
+
+    def seconds(self, size):
+        return self.overhead + self.seconds_per_byte * size
+
+    def observe(self, seconds, size):
+        for key in self.sums:
+            self.sums[key] *= DECAY
+        self.sums['n'] += 1
+        self.sums['x'] += size
+        self.sums['y'] += seconds
+        self.sums['xx'] += size * size
+        self.sums['xy'] += size * seconds
+        self.overhead, self.seconds_per_byte = self._fit()
+
+
+class Budget:
+    """Time budget for a run; None means unlimited."""
+
+    def __init__(self, seconds, clock=time.monotonic):
+        self.seconds = seconds
+        self.clock = clock
+        self.start = clock()
+        self.skipped = 0
+
+    def remaining(self):
+        if self.seconds is None:
+            return math.inf
+        return self.seconds - (self.clock() - self.start)
+
+    def fits(self, expected_seconds):
+        """True if work expected to take this long still fits; counts the misses."""
+        if expected_seconds <= self.remaining():
+            return True
+        self.skipped += 1
+        return False
+
+
+class Scheduler:
+    """Priority order and cost estimates for one stage's per-painting work."""
+
+    def __init__(self, stage, catalog, manifest=None, seed_history=None, quizzes_file=QUIZZES_FILE,
+                 images_dir=IMAGES_DIR, stats_path=STATS_FILE):
+        self.stage = stage
+        self.defaults = STAGE_DEFAULTS[stage]
+        self.stats_path = Path(stats_path) if stats_path else None
+        self.stats = {}
+        if self.stats_path and self.stats_path.exists():
+            with open(self.stats_path, 'r', encoding='utf-8') as f:
+                self.stats = json.load(f)
+        stage_stats = self.stats.get(stage, {})
+        self.cost = CostModel(self.defaults, stage_stats.get('cost'))
+        # Observed history wins over the seed for artists this stage has seen
+        self.history = {**(seed_history or {}), **stage_stats.get('artists', {})}
+
+        periods = sorted({painting['period'] for painting in catalog})
+        quizzes = []
+        if quizzes_file and Path(quizzes_file).exists():
+            with open(quizzes_file, 'r', encoding='utf-8') as f:
+                quizzes = json.load(f).get('quizzes', [])
+        self.weights, self.targets, self.unmatched = quiz_targets(quizzes, periods)
+        # Below the weight of any period still short of images
+        self.saturated = 0.5 ** (len(quizzes) + 1)
+
+        images_dir = Path(images_dir)
+        self.has_image = {painting['id'] for painting in catalog
+                          if painting.get('imageName') and (images_dir / painting['imageName']).exists()}
+        self.have = {period: 0 for period in periods}
+        for painting in catalog:
+            if painting['id'] in self.has_image:
+                self.have[painting['period']] += 1
+
+        entries = (manifest or {}).get('paintings', {})
+        self.sizes = {painting_id: entry['remote']['size'] for painting_id, entry in entries.items()
+                      if entry.get('remote', {}).get('size')}
+        by_artist = {}
+        artist_of = {painting['id']: painting['artist'] for painting in catalog}
+        for painting_id, size in self.sizes.items():
+            if painting_id in artist_of:
+                by_artist.setdefault(artist_of[painting_id], []).append(size)
+        self.artist_sizes = {artist: sum(sizes) / len(sizes) for artist, sizes in by_artist.items()}
+        self.mean_size = sum(self.sizes.values()) / len(self.sizes) if self.sizes else DEFAULT_IMAGE_BYTES
+        self._update_prior()
+
+    def _update_prior(self):
+        attempts = sum(counts[0] for counts in self.history.values())
+        hits = sum(counts[1] for counts in self.history.values())
+        self.prior = hits / attempts if attempts >= MIN_SAMPLES else self.defaults['hit_rate']
+
+    def expected_bytes(self, painting):
+        return self.sizes.get(painting['id'], self.artist_sizes.get(painting['artist'], self.mean_size))
+
+    def expected_seconds(self, painting):
+        # An image already on disk is only checked, not downloaded
+        size = 0 if painting['id'] in self.has_image else self.expected_bytes(painting)
+        return self.cost.seconds(size)
+
+    def hit_rate(self, painting):
+        attempts, hits = self.history.get(painting['artist'], (0, 0))
+        # Smooth towards the overall rate so one or two attempts don't dominate
+        return (hits + 2 * self.prior) / (attempts + 2)
+
+    def value(self, painting, have):
+        period = painting['period']
+        value = self.weights.get(period, 0.0) * self.hit_rate(painting)
+        # Re-checking an image on disk doesn't bring a period closer to its target
+        if painting['id'] in self.has_image:
+            value *= self.saturated * HAS_IMAGE
+        elif have.get(period, 0) >= self.targets.get(period, 0):
+            value *= self.saturated
+        return value
+
+    def plan(self, paintings, deadline=None, parallelism=1):
+        """
+        Return (fitting, rest): paintings in priority order, split by what is
+        expected to fit in deadline seconds (times parallelism workers).
+
+        Greedy by value per expected second; a period's value drops as the
+        plan fills it, so periods are completed one quiz at a time rather
+        than one period at a time. rest is worth running if the estimates
+        were pessimistic and time is left.
+        """
+        capacity = math.inf if deadline is None else deadline * parallelism
+        have = dict(self.have)
+        fitting, overflow = self._greedy(paintings, have, capacity)
+        # The rest continues the same greedy order from where the plan left off
+        rest, _ = self._greedy(overflow, have, math.inf)
+        return fitting, rest
+
+    def _greedy(self, paintings, have, capacity):
+        """Pick paintings by value density until capacity; updates have in place."""
+        heap = [(-self.value(painting, have) / self.expected_seconds(painting), index)
+                for index, painting in enumerate(paintings)]
+        heapq.heapify(heap)
+
+        picked, overflow, used = [], [], 0.0
+        while heap:
+            negative_density, index = heapq.heappop(heap)
+            painting = paintings[index]
+            density = self.value(painting, have) / self.expected_seconds(painting)
+            # Values only fall as periods fill, so a stale entry is re-queued
+            if density < -negative_density - 1e-12:
+                heapq.heappush(heap, (-density, index))
+                continue
+            seconds = self.expected_seconds(painting)
+            if used + seconds > capacity:
+                overflow.append(painting)
+                continue
+            used += seconds
+            picked.append(painting)
+            if painting['id'] not in self.has_image:
+                have[painting['period']] = have.get(painting['period'], 0) + self.hit_rate(painting)
+        return picked, overflow
+
+    def coverage(self, plan):
+        """{period: (expected images after plan, target)} for the periods a quiz covers."""
+        have = dict(self.have)
+        for painting in plan:
+            if painting['id'] not in self.has_image:
+                have[painting['period']] = have.get(painting['period'], 0) + self.hit_rate(painting)
+        return {period: (have.get(period, 0), target) for period, target in self.targets.items() if target}
+
+    def observe(self, painting, seconds, hit, downloaded_bytes=0):
+        """Record one painting's outcome and duration."""
+        counts = self.history.setdefault(painting['artist'], [0, 0])
+        self.history[painting['artist']] = [counts[0] + 1, counts[1] + int(bool(hit))]
+        self._update_prior()
+        self.cost.observe(seconds, downloaded_bytes)
+
+    def save(self):
+        if self.stats_path:
+            self.stats[self.stage] = {
+                'cost': {key: round(value, 4) for key, value in self.cost.sums.items()},
+                'artists': self.history,
+            }
+            write_json_atomic(self.stats_path, self.stats)
+
+    def describe(self, plan, total):
+        """Print how complete the quiz periods are expected to be after plan."""
+        coverage = self.coverage(plan)
+        complete = sum(1 for have, target in coverage.values() if have >= target)
+        print(f"🗓️  Scheduled {len(plan)}/{total} paintings "
+              f"(~{sum(self.expected_seconds(p) for p in plan):.0f}s of work); "
+              f"{complete}/{len(coverage)} quiz periods expected to have enough images")
+        if self.unmatched:
+            print(f"   Quiz periods not in the catalog: {', '.join(self.unmatched)}")
+
+
+def add_schedule_arguments(parser):
+    parser.add_argument('--deadline', type=float,
+                        help='time budget in seconds: do the most valuable work that fits, skip the rest')
+    parser.add_argument('--file-order', action='store_true', help='process paintings in file order (no scheduling)')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Show the priority schedule for per-painting work.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    plan_parser = subparsers.add_parser('plan', help='compare the schedule with file order')
+    plan_parser.add_argument('--stage', default='download_wikiart_images', choices=list(STAGE_DEFAULTS))
+    plan_parser.add_argument('--deadline', type=float, help='time budget in seconds')
+    plan_parser.add_argument('--csv', default='paintings_wikiart_urls.csv')
+    plan_parser.add_argument('--top', type=int, default=10, help='paintings to list')
+    args = parser.parse_args(argv)
+
+    catalog = load_period_paintings()
+    with open(args.csv, 'r', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    seed = csv_history(rows) if args.stage == 'resolve_images' else None
+    scheduler = Scheduler(args.stage, catalog, load_manifest(), seed)
+    if args.stage == 'download_wikiart_images':
+        todo = [row for row in rows if row['wikiart_url']]
+    else:
+        todo = [row for row in rows if not (row.get('wikiart_url') or row.get('wikipedia_url'))]
+
+    planned, _ = scheduler.plan(todo, args.deadline)
+    file_order = []
+    used = 0.0
+    for painting in todo:
+        used += scheduler.expected_seconds(painting)
+        if args.deadline is not None and used > args.deadline:
+            break
+        file_order.append(painting)
+
+    for label, plan in (('File order', file_order), ('Scheduled', planned)):
+        coverage = scheduler.coverage(plan)
+        complete = [period for period, (have, target) in coverage.items() if have >= target]
+        print(f"{label:<11} {len(plan):>4} paintings, {len(complete)}/{len(coverage)} quiz periods complete")
+    print(f"\nQuiz periods after the scheduled run (expected images / wanted):")
+    for period, (have, target) in sorted(scheduler.coverage(planned).items(),
+                                         key=lambda item: -scheduler.weights[item[0]]):
+        print(f"  {'✅' if have >= target else '⚠️ '} {period:<24} {have:5.1f} / {target}")
+    if scheduler.unmatched:
+        print(f"  Quiz periods not in the catalog: {', '.join(scheduler.unmatched)}")
+    print(f"\nFirst {args.top}:")
+    for painting in planned[:args.top]:
+        print(f"  {painting['period']:<24} {painting['artist']} - {painting['title']} "
+              f"(~{scheduler.expected_seconds(painting):.1f}s)")
+
+if __name__ == '__main__':
+    main()